@@ -0,0 +1,361 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from config import DATA_RAW, DATA_PROCESSED
+
+# Size of the real Instacart dataset, used by --scale.
+REAL_USERS = 206209
+REAL_PRODUCTS = 49688
+REAL_AISLES = 134
+
+DEPARTMENTS = [
+    "frozen", "other", "bakery", "produce", "alcohol", "international",
+    "beverages", "pets", "dry goods pasta", "bulk", "personal care",
+    "meat seafood", "pantry", "breakfast", "canned goods", "dairy eggs",
+    "household", "babies", "snacks", "deli", "missing",
+]
+ADJECTIVES = [
+    "Organic", "Fresh", "Classic", "Natural", "Whole", "Light", "Original",
+    "Sweet", "Crunchy", "Creamy", "Spicy", "Smoked", "Unsweetened", "Family Size",
+]
+NOUNS = [
+    "Apples", "Yogurt", "Bread", "Cheese", "Pasta", "Chips", "Juice", "Milk",
+    "Coffee", "Cereal", "Salsa", "Soup", "Crackers", "Tea", "Butter", "Eggs",
+    "Rice", "Beans", "Cookies", "Granola", "Hummus", "Spinach", "Tofu", "Water",
+]
+
+PLANTED_PATTERNS_FILE = "planted_patterns.csv"
+
+
+def build_catalog(rng, n_products: int, n_aisles: int, zipf_alpha: float):
+    """
+    departments, aisles and products tables, plus the popularity CDF over
+    products (Zipf-like long tail; product ids are shuffled against ranks).
+
+    Names end with a fixed-width id, so no product name is a substring of
+    another (is_similar_name would otherwise filter planted rules).
+    """
+    departments = pd.DataFrame({
+        "department_id": np.arange(1, len(DEPARTMENTS) + 1),
+        "department": DEPARTMENTS,
+    })
+
+    aisle_dept = np.concatenate([
+        np.arange(len(DEPARTMENTS)),
+        rng.integers(0, len(DEPARTMENTS), max(0, n_aisles - len(DEPARTMENTS))),
+    ])[:n_aisles]
+    aisles = pd.DataFrame({
+        "aisle_id": np.arange(1, n_aisles + 1),
+        "aisle": [f"{DEPARTMENTS[d]} aisle {i + 1}" for i, d in enumerate(aisle_dept)],
+    })
+
+    aisle_weights = rng.dirichlet(np.full(n_aisles, 0.8))
+    product_aisle = rng.choice(n_aisles, size=n_products, p=aisle_weights)
+    product_ids = np.arange(1, n_products + 1)
+    products = pd.DataFrame({
+        "product_id": product_ids,
+        "product_name": [
+            f"{ADJECTIVES[a]} {NOUNS[n]} {pid:06d}"
+            for a, n, pid in zip(
+                rng.integers(len(ADJECTIVES), size=n_products),
+                rng.integers(len(NOUNS), size=n_products),
+                product_ids,
+            )
+        ],
+        "aisle_id": product_aisle + 1,
+        "department_id": aisle_dept[product_aisle] + 1,
+    })
+
+    weights = 1.0 / np.arange(1, n_products + 1) ** zipf_alpha
+    pop_cdf = np.cumsum(weights / weights.sum())
+    rank_to_product = rng.permutation(product_ids)
+    return departments, aisles, products, pop_cdf, rank_to_product
+
+
+def plant_patterns(rng, n_patterns: int, rank_range=(20, 400)):
+    """
+    Co-purchase patterns as (antecedent ranks, consequent rank, confidence),
+    drawn from mid-popularity products so they fall inside the top-N
+    vocabulary used by rule mining. No product is used by two patterns.
+    """
+    lo, hi = rank_range
+    needed = n_patterns * 3
+    pool = rng.choice(np.arange(lo, hi), size=min(needed, hi - lo), replace=False)
+    patterns = []
+    pos = 0
+    for _ in range(n_patterns):
+        k = 1 if rng.random() < 0.6 else 2
+        if pos + k + 1 > len(pool):
+            break
+        antecedents = tuple(int(x) for x in pool[pos:pos + k])
+        consequent = int(pool[pos + k])
+        pos += k + 1
+        patterns.append((antecedents, consequent, round(float(rng.uniform(0.5, 0.9)), 2)))
+    return patterns
+
+
+def _mark(n_orders, line_order, items, rank):
+    present = np.zeros(n_orders, dtype=bool)
+    present[line_order[items == rank]] = True
+    return present
+
+
+def generate_chunk(rng, n_users, first_user_id, first_order_id, pop_cdf, patterns,
+                   n_products, pattern_rate=0.02, repeat_rate=0.6, repertoire_size=20):
+    """
+    Orders and order lines for one chunk of users (all arrays are chunk-sized).
+    Returns (orders DataFrame, lines DataFrame with product ranks).
+    """
+    n_orders = np.clip(3 + rng.geometric(1 / 14, n_users), 4, 100)
+    total = int(n_orders.sum())
+    order_user = np.repeat(np.arange(n_users), n_orders)
+    order_number = np.arange(total) - np.repeat(np.cumsum(n_orders) - n_orders, n_orders) + 1
+
+    # Per-user cadence: mean gap, preferred weekday and hour.
+    gap_mean = rng.uniform(4, 30, n_users)
+    days = np.minimum(rng.poisson(gap_mean[order_user]), 30).astype("float64")
+    days[order_number == 1] = np.nan
+    pref_dow = rng.integers(0, 7, n_users)
+    dow = np.where(rng.random(total) < 0.6, pref_dow[order_user], rng.integers(0, 7, total))
+    pref_hour = np.clip(rng.normal(13.5, 3.0, n_users), 6, 22)
+    hour = np.clip(np.rint(rng.normal(pref_hour[order_user], 2.5)), 0, 23).astype("int64")
+    is_last = order_number == n_orders[order_user]
+
+    orders = pd.DataFrame({
+        "order_id": first_order_id + np.arange(total),
+        "user_id": first_user_id + order_user,
+        "eval_set": np.where(is_last, "train", "prior"),
+        "order_number": order_number,
+        "order_dow": dow,
+        "order_hour_of_day": hour,
+        "days_since_prior_order": days,
+    })
+
+    # Basket items: a share from each user's repertoire (reorders), the rest
+    # from global popularity.
+    sizes = np.minimum(rng.negative_binomial(2, 2 / 11, total) + 1, 80)
+    line_order = np.repeat(np.arange(total), sizes)
+    n_lines = line_order.size
+
+    def draw(shape):
+        return np.minimum(np.searchsorted(pop_cdf, rng.random(shape)), n_products - 1)
+
+    repertoire = draw((n_users, repertoire_size))
+    items = np.where(
+        rng.random(n_lines) < repeat_rate,
+        repertoire[order_user[line_order], rng.integers(0, repertoire_size, n_lines)],
+        draw(n_lines),
+    )
+
+    # Planted patterns: antecedents are injected into some baskets; baskets
+    # holding all antecedents get the consequent with the pattern's confidence.
+    extra_orders, extra_items = [line_order], [items]
+    for antecedents, _, _ in patterns:
+        chosen = np.flatnonzero(rng.random(total) < pattern_rate)
+        for rank in antecedents:
+            extra_orders.append(chosen)
+            extra_items.append(np.full(chosen.size, rank))
+    line_order = np.concatenate(extra_orders)
+    items = np.concatenate(extra_items)
+
+    extra_orders, extra_items = [line_order], [items]
+    for antecedents, consequent, confidence in patterns:
+        has_all = np.ones(total, dtype=bool)
+        for rank in antecedents:
+            has_all &= _mark(total, line_order, items, rank)
+        chosen = np.flatnonzero(has_all & (rng.random(total) < confidence))
+        extra_orders.append(chosen)
+        extra_items.append(np.full(chosen.size, consequent))
+
+    # One line per (order, product); add_to_cart_order is a random position.
+    keys = np.unique(
+        np.concatenate(extra_orders).astype("int64") * n_products + np.concatenate(extra_items)
+    )
+    line_order, items = np.divmod(keys, n_products)
+    perm = np.lexsort((rng.random(keys.size), line_order))
+    line_order, items = line_order[perm], items[perm]
+    starts = np.flatnonzero(np.r_[True, line_order[1:] != line_order[:-1]])
+    counts = np.diff(np.r_[starts, line_order.size])
+    add_to_cart = np.arange(line_order.size) - np.repeat(starts, counts) + 1
+
+    # reordered = the user bought this product in an earlier order.
+    user = order_user[line_order]
+    by_user_item = np.lexsort((order_number[line_order], items, user))
+    same = np.r_[False, (user[by_user_item][1:] == user[by_user_item][:-1])
+                 & (items[by_user_item][1:] == items[by_user_item][:-1])]
+    reordered = np.empty(line_order.size, dtype="int64")
+    reordered[by_user_item] = same
+
+    lines = pd.DataFrame({
+        "order_id": first_order_id + line_order,
+        "product_rank": items,
+        "add_to_cart_order": add_to_cart,
+        "reordered": reordered,
+        "is_train": is_last[line_order],
+    })
+    return orders, lines
+
+
+def generate_synthetic_instacart(
+    n_users: int = REAL_USERS,
+    n_products: int = REAL_PRODUCTS,
+    n_aisles: int = REAL_AISLES,
+    n_patterns: int = 20,
+    pattern_rate: float = 0.02,
+    zipf_alpha: float = 1.0,
+    chunk_users: int = 20000,
+    seed: int = 42,
+    out_dir: str = DATA_RAW,
+    overwrite: bool = False,
+):
+    """
+    Write an Instacart-shaped dataset:
+      departments.csv, aisles.csv, products.csv, orders.csv,
+      order_products__prior.csv, order_products__train.csv
+    plus planted_patterns.csv (the co-purchase rules hidden in the data).
+
+    Users are generated and appended chunk by chunk (chunk_users at a time),
+    so memory stays bounded at any scale. The same seed and chunk size give
+    identical files.
+    """
+    orders_path = os.path.join(out_dir, "orders.csv")
+    if os.path.exists(orders_path) and not overwrite:
+        raise FileExistsError(
+            f"{orders_path} already exists. Use --out-dir or --overwrite."
+        )
+    os.makedirs(out_dir, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    departments, aisles, products, pop_cdf, rank_to_product = build_catalog(
+        rng, n_products, n_aisles, zipf_alpha
+    )
+    patterns = plant_patterns(rng, n_patterns)
+
+    departments.to_csv(os.path.join(out_dir, "departments.csv"), index=False)
+    aisles.to_csv(os.path.join(out_dir, "aisles.csv"), index=False)
+    products.to_csv(os.path.join(out_dir, "products.csv"), index=False)
+
+    names = products.set_index("product_id")["product_name"]
+    planted = pd.DataFrame({
+        "antecedents": [
+            "|".join(names[rank_to_product[r]] for r in ants) for ants, _, _ in patterns
+        ],
+        "consequent": [names[rank_to_product[c]] for _, c, _ in patterns],
+        "confidence": [conf for _, _, conf in patterns],
+        "pattern_rate": pattern_rate,
+    })
+    planted.to_csv(os.path.join(out_dir, PLANTED_PATTERNS_FILE), index=False)
+
+    paths = {
+        "orders": orders_path,
+        "prior": os.path.join(out_dir, "order_products__prior.csv"),
+        "train": os.path.join(out_dir, "order_products__train.csv"),
+    }
+    start = time.perf_counter()
+    next_order_id = 1
+    n_orders = n_prior = 0
+    for chunk_index, first in enumerate(range(0, n_users, chunk_users)):
+        chunk_rng = np.random.default_rng([seed, chunk_index])
+        size = min(chunk_users, n_users - first)
+        orders, lines = generate_chunk(
+            chunk_rng, size, first + 1, next_order_id, pop_cdf, patterns,
+            n_products, pattern_rate=pattern_rate,
+        )
+        next_order_id += orders.shape[0]
+        lines["product_id"] = rank_to_product[lines["product_rank"].to_numpy()]
+        columns = ["order_id", "product_id", "add_to_cart_order", "reordered"]
+
+        header = chunk_index == 0
+        mode = "w" if header else "a"
+        orders.to_csv(paths["orders"], index=False, header=header, mode=mode)
+        train = lines["is_train"].to_numpy()
+        lines.loc[~train, columns].to_csv(paths["prior"], index=False, header=header, mode=mode)
+        lines.loc[train, columns].to_csv(paths["train"], index=False, header=header, mode=mode)
+
+        n_orders += orders.shape[0]
+        n_prior += int((~train).sum())
+        print(
+            f"[synthetic] Users {first + size}/{n_users}: {n_orders} orders, "
+            f"{n_prior} prior lines ({time.perf_counter() - start:.1f}s)"
+        )
+
+    print(f"[synthetic] Dataset written → {out_dir}")
+    print(f"[synthetic] Planted patterns → {os.path.join(out_dir, PLANTED_PATTERNS_FILE)}")
+    return planted
+
+
+def check_planted_rules(out_dir: str = DATA_RAW, rules_path: str = None):
+    """
+    Report which planted patterns were recovered as rules in
+    association_rules_fp_all.csv (same antecedent set and consequent).
+    """
+    from itemset_trie import parse_itemset
+
+    rules_path = rules_path or os.path.join(DATA_PROCESSED, "association_rules_fp_all.csv")
+    if not os.path.exists(rules_path):
+        raise FileNotFoundError(
+            f"{rules_path} not found. Run scripts/run_association_rules.py first."
+        )
+    planted = pd.read_csv(os.path.join(out_dir, PLANTED_PATTERNS_FILE))
+    rules = pd.read_csv(rules_path, usecols=["antecedents", "consequents", "confidence", "lift"])
+    mined = {
+        (frozenset(parse_itemset(a)), frozenset(parse_itemset(c))): (conf, lift)
+        for a, c, conf, lift in zip(
+            rules["antecedents"], rules["consequents"], rules["confidence"], rules["lift"]
+        )
+    }
+
+    found = []
+    for ants, cons in zip(planted["antecedents"], planted["consequent"]):
+        found.append(mined.get((frozenset(ants.split("|")), frozenset([cons]))))
+    planted["recovered"] = [f is not None for f in found]
+    planted["mined_confidence"] = [f[0] if f else np.nan for f in found]
+    planted["mined_lift"] = [f[1] if f else np.nan for f in found]
+
+    print(planted.to_string(index=False))
+    recovered = int(planted["recovered"].sum())
+    print(f"[synthetic] Recovered {recovered}/{planted.shape[0]} planted patterns")
+    return planted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate an Instacart-shaped synthetic dataset.")
+    parser.add_argument("--scale", type=float, default=None,
+                        help="Number of users as a multiple of the real dataset (e.g. 10).")
+    parser.add_argument("--users", type=int, default=REAL_USERS)
+    parser.add_argument("--products", type=int, default=REAL_PRODUCTS)
+    parser.add_argument("--patterns", type=int, default=20)
+    parser.add_argument("--pattern-rate", type=float, default=0.02)
+    parser.add_argument("--chunk-users", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out-dir", default=DATA_RAW)
+    parser.add_argument("--overwrite", action="store_true")
+    parser.add_argument("--check", action="store_true",
+                        help="Only compare planted patterns with the mined rules.")
+    args = parser.parse_args()
+
+    if args.check:
+        check_planted_rules(args.out_dir)
+    else:
+        n_users = int(REAL_USERS * args.scale) if args.scale else args.users
+        generate_synthetic_instacart(
+            n_users=n_users,
+            n_products=args.products,
+            n_patterns=args.patterns,
+            pattern_rate=args.pattern_rate,
+            chunk_users=args.chunk_users,
+            seed=args.seed,
+            out_dir=args.out_dir,
+            overwrite=args.overwrite,
+        )
@@ -34,12 +34,14 @@ def load_products_with_dept():
 def estimate_popularity():
     """
     Estimate product popularity (how often each product appears in orders)
-    from order_products__prior.csv.
+    from order_products__prior.csv, in one chunked pass over product_id only.
     """
     op_path = os.path.join(DATA_RAW, "order_products__prior.csv")
-    op = pd.read_csv(op_path)
+    freq = pd.Series(dtype="int64")
+    for chunk in pd.read_csv(op_path, usecols=["product_id"], chunksize=2_000_000):
+        freq = freq.add(chunk["product_id"].value_counts(), fill_value=0)
 
-    freq = op["product_id"].value_counts()
+    freq = freq.astype("int64").sort_values(ascending=False)
     freq.name = "frequency"
     return freq
 
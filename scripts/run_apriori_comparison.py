@@ -8,8 +8,11 @@ if SRC_PATH not in sys.path:
     sys.path.insert(0, SRC_PATH)
 
 from apriori_comparison import run_apriori_comparison
+from profiling import write_profile_report
+
 
 if __name__ == "__main__":
     print("[run_apriori_comparison] Starting...")
     freq_ap, rules_ap, t_ap = run_apriori_comparison(min_support=0.01, min_conf=0.2)
-    print("[run_apriori_comparison] Done.")
\ No newline at end of file
+    write_profile_report("apriori_comparison")
+    print("[run_apriori_comparison] Done.")
@@ -12,6 +12,7 @@ print("[run_association_rules] SRC_PATH:", SRC_PATH)
 print("[run_association_rules] sys.path head:", sys.path[:3])
 
 from association_rules import mine_fp_growth_with_utility
+from profiling import write_profile_report
 
 
 if __name__ == "__main__":
@@ -24,4 +25,5 @@ if __name__ == "__main__":
     )
     print("[run_association_rules] Total rules:", rules.shape)
     print("[run_association_rules] Business rules:", business_rules.shape)
-    print("[run_association_rules] Done.")
\ No newline at end of file
+    write_profile_report("association_rules")
+    print("[run_association_rules] Done.")
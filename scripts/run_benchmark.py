@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+print("[run_benchmark] PROJECT_ROOT:", PROJECT_ROOT)
+print("[run_benchmark] SRC_PATH:", SRC_PATH)
+
+from benchmark import compare_benchmarks, run_benchmark
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency / throughput benchmark of recommend_items.")
+    parser.add_argument("--carts", type=int, default=5000)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--misspell-rate", type=float, default=0.1)
+    parser.add_argument("--unknown-rate", type=float, default=0.02)
+    parser.add_argument("--long-tail-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"),
+        help="Compare two saved benchmark reports instead of running one.",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_benchmarks(*args.compare)
+    else:
+        print("[run_benchmark] Benchmarking recommend_items...")
+        run_benchmark(
+            n_carts=args.carts,
+            top_k=args.top_k,
+            concurrency=tuple(args.concurrency),
+            seed=args.seed,
+            misspell_rate=args.misspell_rate,
+            unknown_rate=args.unknown_rate,
+            long_tail_rate=args.long_tail_rate,
+        )
+    print("[run_benchmark] Done.")
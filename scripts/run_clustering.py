@@ -11,6 +11,7 @@ print("[run_clustering] PROJECT_ROOT:", PROJECT_ROOT)
 print("[run_clustering] SRC_PATH:", SRC_PATH)
 
 from clustering import cluster_customers
+from profiling import write_profile_report
 
 
 if __name__ == "__main__":
@@ -20,4 +21,5 @@ if __name__ == "__main__":
         use_price=True,
     )
     print("[run_clustering] Result shape:", segments.shape)
-    print("[run_clustering] Done.")
\ No newline at end of file
+    write_profile_report("clustering")
+    print("[run_clustering] Done.")
@@ -0,0 +1,21 @@
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+print("[run_dashboard_aggregates] PROJECT_ROOT:", PROJECT_ROOT)
+print("[run_dashboard_aggregates] SRC_PATH:", SRC_PATH)
+
+from dashboard_aggregates import build_dashboard_aggregates
+
+
+if __name__ == "__main__":
+    print("[run_dashboard_aggregates] Building dashboard aggregates...")
+    kpis = build_dashboard_aggregates()
+    print("[run_dashboard_aggregates] Customers:", kpis["customers"])
+    print("[run_dashboard_aggregates] Rules:", kpis["rules"])
+    print("[run_dashboard_aggregates] Done.")
@@ -13,6 +13,8 @@ print("[run_eclat_demo] SRC_PATH:", SRC_PATH)
 print("[run_eclat_demo] sys.path head:", sys.path[:3])
 
 from eclat_demo import run_eclat_demo
+from profiling import write_profile_report
+
 
 if __name__ == "__main__":
     print("[run_eclat_demo] Starting Eclat demo...")
@@ -22,4 +24,5 @@ if __name__ == "__main__":
         sample_size=10000,
     )
     print("[run_eclat_demo] Result shape:", df_itemsets.shape)
-    print("[run_eclat_demo] Done.")
\ No newline at end of file
+    write_profile_report("eclat_demo")
+    print("[run_eclat_demo] Done.")
@@ -12,12 +12,17 @@ print("[run_enrichment] SRC_PATH:", SRC_PATH)
 
 from data_loading import build_full_order_products
 from pricing import attach_prices
+from product_meta import build_product_meta
+from profiling import write_profile_report
 
 
 if __name__ == "__main__":
     print("[run_enrichment] Starting enrichment (merge + synthetic prices)...")
     full = build_full_order_products()
     full_price = attach_prices()
+    product_meta = build_product_meta(full_price)
     print("[run_enrichment] order_products_full shape:", full.shape)
     print("[run_enrichment] order_products_full_with_price shape:", full_price.shape)
-    print("[run_enrichment] Done.")
\ No newline at end of file
+    print("[run_enrichment] product_meta shape:", product_meta.shape)
+    write_profile_report("enrichment")
+    print("[run_enrichment] Done.")
@@ -0,0 +1,40 @@
+import argparse
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+print("[run_evaluation] PROJECT_ROOT:", PROJECT_ROOT)
+print("[run_evaluation] SRC_PATH:", SRC_PATH)
+
+from evaluation import evaluate_recommender
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline evaluation of the recommender.")
+    parser.add_argument("--source", default="train", choices=["train", "last_prior"])
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--max-carts", type=int, default=200000)
+    parser.add_argument("--hidden", type=int, default=1, help="Items hidden per cart.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=5000)
+    parser.add_argument("--segments", action="store_true", help="Use per-user segment rules.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("[run_evaluation] Evaluating recommend_items on held-out carts...")
+    evaluate_recommender(
+        source=args.source,
+        top_k=args.top_k,
+        max_carts=args.max_carts,
+        n_hidden=args.hidden,
+        n_workers=args.workers,
+        shard_size=args.shard_size,
+        use_segments=args.segments,
+        seed=args.seed,
+    )
+    print("[run_evaluation] Done.")
@@ -0,0 +1,39 @@
+import argparse
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+print("[run_hierarchical_rules] PROJECT_ROOT:", PROJECT_ROOT)
+print("[run_hierarchical_rules] SRC_PATH:", SRC_PATH)
+
+from hierarchical_rules import mine_hierarchical_rules
+from profiling import write_profile_report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Department / aisle / product multi-level rule mining.")
+    parser.add_argument("--department-support", type=float, default=0.02)
+    parser.add_argument("--aisle-support", type=float, default=0.01)
+    parser.add_argument("--product-support", type=float, default=0.0005)
+    parser.add_argument("--min-conf", type=float, default=0.1)
+    parser.add_argument("--min-lift", type=float, default=1.0)
+    parser.add_argument("--max-len", type=int, default=3, help="Largest department / aisle itemset")
+    args = parser.parse_args()
+
+    print("[run_hierarchical_rules] Mining hierarchical rules...")
+    summary = mine_hierarchical_rules(
+        min_department_support=args.department_support,
+        min_aisle_support=args.aisle_support,
+        min_product_support=args.product_support,
+        min_conf=args.min_conf,
+        min_lift=args.min_lift,
+        max_len=args.max_len,
+    )
+    print("[run_hierarchical_rules] Summary:", summary)
+    write_profile_report("hierarchical_rules")
+    print("[run_hierarchical_rules] Done.")
@@ -0,0 +1,28 @@
+import argparse
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+print("[run_model_bundle] PROJECT_ROOT:", PROJECT_ROOT)
+print("[run_model_bundle] SRC_PATH:", SRC_PATH)
+
+from model_bundle import MODEL_BUNDLE_FILE, POPULARITY_GLOBAL_TOP_N, POPULARITY_TOP_N, build_model_bundle
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack the serving artifacts into one memory-mappable bundle.")
+    parser.add_argument("--out", default=MODEL_BUNDLE_FILE)
+    parser.add_argument("--top-n", type=int, default=POPULARITY_TOP_N,
+                        help="Popular products kept per department / aisle")
+    parser.add_argument("--global-top-n", type=int, default=POPULARITY_GLOBAL_TOP_N)
+    args = parser.parse_args()
+
+    print("[run_model_bundle] Building model bundle...")
+    meta = build_model_bundle(out_path=args.out, top_n=args.top_n, global_top_n=args.global_top_n)
+    print("[run_model_bundle] Source version:", meta["source_version"])
+    print("[run_model_bundle] Done.")
@@ -0,0 +1,36 @@
+import argparse
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+print("[run_pipeline] PROJECT_ROOT:", PROJECT_ROOT)
+print("[run_pipeline] SRC_PATH:", SRC_PATH)
+
+from pipeline import STAGES, run_pipeline
+
+
+if __name__ == "__main__":
+    names = [s.name for s in STAGES]
+    parser = argparse.ArgumentParser(description="Run the ML pipeline as a cached DAG.")
+    parser.add_argument("targets", nargs="*",
+                        help="Stages to build (with their upstream stages). Default: all.")
+    parser.add_argument("--force", nargs="+", default=[], choices=names,
+                        help="Rerun these stages even if up to date.")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="Stages run in parallel (each may load the full order table).")
+    parser.add_argument("--dry-run", action="store_true", help="Only print what would run.")
+    args = parser.parse_args()
+
+    print("[run_pipeline] Stages:", names)
+    run_pipeline(
+        targets=args.targets or None,
+        force=args.force,
+        max_workers=args.workers,
+        dry_run=args.dry_run,
+    )
+    print("[run_pipeline] Done.")
@@ -0,0 +1,17 @@
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from product_meta import build_product_meta
+
+
+if __name__ == "__main__":
+    print("[run_product_meta] Building product metadata artifact...")
+    meta = build_product_meta()
+    print("[run_product_meta] Result shape:", meta.shape)
+    print("[run_product_meta] Done.")
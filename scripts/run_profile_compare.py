@@ -0,0 +1,24 @@
+import argparse
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+print("[run_profile_compare] PROJECT_ROOT:", PROJECT_ROOT)
+print("[run_profile_compare] SRC_PATH:", SRC_PATH)
+
+from profiling import compare_profiles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two pipeline profile reports.")
+    parser.add_argument("baseline", help="profile_<name>_<timestamp>.json of the earlier run")
+    parser.add_argument("candidate", help="profile_<name>_<timestamp>.json of the later run")
+    args = parser.parse_args()
+
+    compare_profiles(args.baseline, args.candidate)
+    print("[run_profile_compare] Done.")
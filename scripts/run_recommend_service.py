@@ -0,0 +1,33 @@
+import argparse
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from recommend_service import run_service
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recommend_items over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--window-ms", type=float, default=3.0,
+                        help="How long to wait to group concurrent requests into one batch.")
+    parser.add_argument("--max-batch", type=int, default=256,
+                        help="Maximum carts per batch.")
+    parser.add_argument("--watch-interval", type=float, default=5.0,
+                        help="Seconds between checks for newly published rules (0 = off).")
+    args = parser.parse_args()
+
+    print("[run_recommend_service] Starting recommendation service...")
+    run_service(
+        host=args.host,
+        port=args.port,
+        window_ms=args.window_ms,
+        max_batch=args.max_batch,
+        watch_interval=args.watch_interval,
+    )
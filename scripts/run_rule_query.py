@@ -0,0 +1,71 @@
+import argparse
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+print("[run_rule_query] PROJECT_ROOT:", PROJECT_ROOT)
+print("[run_rule_query] SRC_PATH:", SRC_PATH)
+
+import pandas as pd
+from config import DATA_PROCESSED
+from product_meta import PRODUCT_META_FILE, read_product_meta
+from rule_query import KEY_INDEXES, RANGE_COLUMNS, build_rule_query_engine
+
+RULE_FILES = {
+    "business": "business_ready_rules.csv",
+    "all": "association_rules_fp_all.csv",
+}
+SHOW_COLUMNS = ["antecedents_str", "consequents_str"] + RANGE_COLUMNS
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Browse association rules with indexed filters.")
+    parser.add_argument("--rules", default="business",
+                        help="'business', 'all' (k->1 rules too) or a rules CSV path")
+    for key in KEY_INDEXES:
+        parser.add_argument(f"--{key.replace('_', '-')}", nargs="+", default=None, metavar="NAME")
+    for column in RANGE_COLUMNS:
+        parser.add_argument(f"--min-{column.replace('_', '-')}", type=float, default=None)
+        parser.add_argument(f"--max-{column.replace('_', '-')}", type=float, default=None)
+    parser.add_argument("--order-by", default="expected_revenue", choices=RANGE_COLUMNS)
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    path = RULE_FILES.get(args.rules, args.rules)
+    if not os.path.isabs(path) and not os.path.exists(path):
+        path = os.path.join(DATA_PROCESSED, path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found. Run scripts/run_association_rules.py first.")
+
+    print(f"[run_rule_query] Loading {path}")
+    rules = pd.read_csv(path)
+    meta = None
+    if os.path.exists(os.path.join(DATA_PROCESSED, PRODUCT_META_FILE)):
+        meta = read_product_meta()
+    engine = build_rule_query_engine(rules, meta)
+
+    filters = {key: getattr(args, key) for key in KEY_INDEXES}
+    for column in RANGE_COLUMNS:
+        filters[f"min_{column}"] = getattr(args, f"min_{column}")
+        filters[f"max_{column}"] = getattr(args, f"max_{column}")
+
+    total = engine.count(**filters)
+    pages = max(1, -(-total // args.page_size))
+    page = engine.query(
+        order_by=args.order_by,
+        ascending=args.ascending,
+        offset=(args.page - 1) * args.page_size,
+        limit=args.page_size,
+        **filters,
+    )
+    print(f"[run_rule_query] {total} matching rules, page {args.page}/{pages}")
+    with pd.option_context("display.max_colwidth", 60, "display.width", 200):
+        print(page[SHOW_COLUMNS].to_string())
+    print("[run_rule_query] Done.")
@@ -0,0 +1,43 @@
+import argparse
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+print("[run_scenarios] PROJECT_ROOT:", PROJECT_ROOT)
+print("[run_scenarios] SRC_PATH:", SRC_PATH)
+
+from scenarios import (
+    DEFAULT_ADOPTION_RATES,
+    DEFAULT_DISCOUNTS,
+    DEFAULT_MONTHLY_ORDERS,
+    DEFAULT_TARGETED_CUSTOMERS,
+    build_scenario_rankings,
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank rule / promotion scenarios over a grid.")
+    parser.add_argument("--orders", type=int, nargs="+", default=list(DEFAULT_MONTHLY_ORDERS))
+    parser.add_argument("--adoption", type=float, nargs="+", default=list(DEFAULT_ADOPTION_RATES))
+    parser.add_argument("--discounts", type=float, nargs="+", default=list(DEFAULT_DISCOUNTS))
+    parser.add_argument("--targeted", type=int, nargs="+", default=list(DEFAULT_TARGETED_CUSTOMERS))
+    parser.add_argument("--elasticity", type=float, default=2.0)
+    parser.add_argument("--top-n", type=int, default=200)
+    args = parser.parse_args()
+
+    print("[run_scenarios] Ranking scenarios...")
+    table = build_scenario_rankings(
+        discount_elasticity=args.elasticity,
+        top_n=args.top_n,
+        monthly_orders=args.orders,
+        adoption_rates=args.adoption,
+        discounts=args.discounts,
+        targeted_customers=args.targeted,
+    )
+    print(table.head(10))
+    print("[run_scenarios] Done.")
@@ -0,0 +1,29 @@
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+print("[run_segment_rules] PROJECT_ROOT:", PROJECT_ROOT)
+print("[run_segment_rules] SRC_PATH:", SRC_PATH)
+
+from profiling import write_profile_report
+from segment_rules import mine_segment_rules
+
+
+if __name__ == "__main__":
+    print("[run_segment_rules] Mining per-segment rules (one worker process per segment)...")
+    manifest = mine_segment_rules(
+        top_n_products=500,
+        min_support=0.002,
+        min_conf=0.1,
+        min_lift=1.0,
+    )
+    for entry in manifest["segments"]:
+        print("[run_segment_rules] Segment:", entry)
+    print("[run_segment_rules] Wall time (s):", manifest["wall_seconds"])
+    write_profile_report("segment_rules")
+    print("[run_segment_rules] Done.")
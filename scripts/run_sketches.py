@@ -0,0 +1,42 @@
+import argparse
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+print("[run_sketches] PROJECT_ROOT:", PROJECT_ROOT)
+print("[run_sketches] SRC_PATH:", SRC_PATH)
+
+from sketches import STREAM_STATS_FILE, build_stream_stats, merge_stream_stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming product / customer sketches.")
+    parser.add_argument("--input", default=None,
+                        help="Order lines CSV (default: order_products_full_with_price.csv)")
+    parser.add_argument("--out", default=STREAM_STATS_FILE)
+    parser.add_argument("--chunksize", type=int, default=1_000_000)
+    parser.add_argument("--heavy-hitters", type=int, default=2000,
+                        help="Products tracked by Space-Saving (keep well above the top-N used)")
+    parser.add_argument("--hll-precision", type=int, default=12)
+    parser.add_argument("--merge", nargs="+", metavar="SKETCH",
+                        help="Merge sketches built on separate shards instead of reading a CSV.")
+    args = parser.parse_args()
+
+    if args.merge:
+        stats = merge_stream_stats(args.merge, out_path=args.out)
+    else:
+        print("[run_sketches] Building sketches...")
+        stats = build_stream_stats(
+            input_path=args.input,
+            out_path=args.out,
+            chunksize=args.chunksize,
+            heavy_hitters=args.heavy_hitters,
+            hll_precision=args.hll_precision,
+        )
+    print("[run_sketches] Summary:", stats.summary())
+    print("[run_sketches] Done.")
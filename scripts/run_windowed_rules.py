@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+print("[run_windowed_rules] PROJECT_ROOT:", PROJECT_ROOT)
+print("[run_windowed_rules] SRC_PATH:", SRC_PATH)
+
+from windowed_rules import mine_windowed_rules
+from profiling import write_profile_report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rules of the most recent time window, with recency decay.")
+    parser.add_argument("--top-n", type=int, default=500, help="Product vocabulary size")
+    parser.add_argument("--bucket-days", type=int, default=30)
+    parser.add_argument("--window", type=int, default=6, help="Buckets per window")
+    parser.add_argument("--half-life", type=float, default=2.0, help="Decay half-life in buckets (0 = no decay)")
+    parser.add_argument("--slice", choices=["dow", "hour"], default=None,
+                        help="Also mine per day of week or hour band")
+    parser.add_argument("--min-support", type=float, default=0.002)
+    parser.add_argument("--min-conf", type=float, default=0.1)
+    parser.add_argument("--min-lift", type=float, default=1.0)
+    parser.add_argument("--history", action="store_true",
+                        help="Also save the top rules of every window position")
+    args = parser.parse_args()
+
+    print("[run_windowed_rules] Mining time-windowed rules...")
+    rules = mine_windowed_rules(
+        top_n_products=args.top_n,
+        bucket_days=args.bucket_days,
+        window_buckets=args.window,
+        half_life_buckets=args.half_life,
+        slice_by=args.slice,
+        min_support=args.min_support,
+        min_conf=args.min_conf,
+        min_lift=args.min_lift,
+        history=args.history,
+    )
+    print("[run_windowed_rules] Result shape:", rules.shape)
+    write_profile_report("windowed_rules")
+    print("[run_windowed_rules] Done.")
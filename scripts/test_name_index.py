@@ -0,0 +1,66 @@
+import os
+import random
+import subprocess
+import sys
+from difflib import get_close_matches
+
+# Make src importable
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+SRC_PATH = os.path.join(PROJECT_ROOT, "src")
+if SRC_PATH not in sys.path:
+    sys.path.insert(0, SRC_PATH)
+
+from name_index import NameIndex
+
+# "sweet tea 000436" scores 0.727 against both Sweet names: a tie.
+TIED_NAMES = ["Sweet Eggs 000319", "Sweet Tofu 002446", "Organic Milk 000100"]
+TIED_QUERY = "Sweet Tea 000436"
+
+
+def _difflib_resolve(names, query, cutoff=0.6):
+    lowered = [n.lower() for n in names]
+    match = get_close_matches(query.strip().lower(), lowered, n=1, cutoff=cutoff)
+    return names[lowered.index(match[0])] if match else None
+
+
+def test_tied_scores_match_difflib():
+    index = NameIndex(TIED_NAMES)
+    assert index.resolve(TIED_QUERY) == _difflib_resolve(TIED_NAMES, TIED_QUERY)
+    assert index.resolve(TIED_QUERY) == "Sweet Tofu 002446"
+    # insertion order must not matter either
+    assert NameIndex(reversed(TIED_NAMES)).resolve(TIED_QUERY) == "Sweet Tofu 002446"
+
+
+def test_random_queries_match_difflib():
+    # catalogs smaller than the shortlist: every candidate is scored
+    rng = random.Random(7)
+    words = ["sweet", "tea", "tofu", "eggs", "milk", "organic", "bread", "beans"]
+    for _ in range(200):
+        names = list(dict.fromkeys(
+            f"{rng.choice(words).title()} {rng.choice(words).title()} {rng.randrange(1000):06d}"
+            for _ in range(20)
+        ))
+        query = f"{rng.choice(words)} {rng.choice(words)} {rng.randrange(1000):06d}"
+        assert NameIndex(names).resolve(query) == _difflib_resolve(names, query), query
+
+
+def test_independent_of_hash_seed():
+    code = (
+        f"import sys; sys.path.insert(0, {SRC_PATH!r}); from name_index import NameIndex; "
+        f"print(NameIndex({TIED_NAMES!r}).resolve({TIED_QUERY!r}))"
+    )
+    results = set()
+    for seed in range(1, 7):
+        env = dict(os.environ, PYTHONHASHSEED=str(seed))
+        out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+        results.add(out.stdout.strip())
+    assert results == {"Sweet Tofu 002446"}, results
+
+
+if __name__ == "__main__":
+    print("[test_name_index] Testing NameIndex against difflib...")
+    for test in (test_tied_scores_match_difflib, test_random_queries_match_difflib,
+                 test_independent_of_hash_seed):
+        test()
+        print(f"[test_name_index] {test.__name__}: OK")
@@ -3,25 +3,28 @@ import time
 from mlxtend.frequent_patterns import apriori, association_rules
 from config import DATA_PROCESSED
 from transactions import build_transactions, encode_transactions
+from profiling import profile_stage
 
 def run_apriori_comparison(min_support=0.01, min_conf=0.2):
     """
     Run Apriori on a sampled basket to compare with FP-Growth.
     """
     # Build baskets
-    transactions, _ = build_transactions(top_n_products=200, use_price=True)
+    transactions, _ = build_transactions(top_n_products=200)
     basket = encode_transactions(transactions)
 
     # Optionally sample rows to keep Apriori fast
     basket_sample = basket.sample(n=min(5000, basket.shape[0]), random_state=42)
 
     start = time.time()
-    freq_ap = apriori(
-        basket_sample,
-        min_support=min_support,
-        use_colnames=True,
-        low_memory=True
-    )
+    with profile_stage("apriori", rows_in=basket_sample.shape[0]) as prof:
+        freq_ap = apriori(
+            basket_sample,
+            min_support=min_support,
+            use_colnames=True,
+            low_memory=True
+        )
+        prof.rows_out = freq_ap.shape[0]
     apriori_time = time.time() - start
 
     rules_ap = association_rules(freq_ap, metric="confidence", min_threshold=min_conf)
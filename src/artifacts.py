@@ -0,0 +1,46 @@
+import json
+import os
+import pandas as pd
+from config import DATA_PROCESSED
+from profiling import profile_stage
+
+SEGMENTS_DIR = os.path.join(DATA_PROCESSED, "segments")
+SEGMENTS_MANIFEST = os.path.join(SEGMENTS_DIR, "manifest.json")
+
+
+def publish_csv(df: pd.DataFrame, path: str, index: bool = False):
+    """
+    Write a CSV next to its final path, then atomically rename it into place,
+    so serving processes never read a half-written file.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with profile_stage(f"write_csv:{os.path.basename(path)}", rows_in=len(df)):
+        df.to_csv(tmp_path, index=index)
+        os.replace(tmp_path, path)
+
+
+def publish_json(obj, path: str):
+    """
+    Atomically write a JSON file (temp file + rename).
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def segment_dir(segment) -> str:
+    """
+    Output folder of one customer segment's rules.
+    """
+    return os.path.join(SEGMENTS_DIR, f"segment_{segment}")
+
+
+def read_segments_manifest():
+    """
+    Load segments/manifest.json, or None if segment rules were never mined.
+    """
+    if not os.path.exists(SEGMENTS_MANIFEST):
+        return None
+    with open(SEGMENTS_MANIFEST, encoding="utf-8") as f:
+        return json.load(f)
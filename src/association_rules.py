@@ -2,6 +2,8 @@ import os
 import pandas as pd
 from mlxtend.frequent_patterns import fpgrowth, association_rules
 from config import DATA_PROCESSED
+from artifacts import publish_csv
+from profiling import profile_stage
 from transactions import build_transactions, encode_transactions
 
 
@@ -15,52 +17,94 @@ def is_similar_name(a: str, b: str) -> bool:
     return (a_low in b_low) or (b_low in a_low)
 
 
+def build_price_map(full: pd.DataFrame) -> pd.Series:
+    """
+    product_name -> price map from the synthetic prices.
+    """
+    return (
+        full[["product_name", "price"]]
+        .dropna()
+        .drop_duplicates(subset="product_name")
+        .set_index("product_name")["price"]
+    )
+
+
 def mine_fp_growth_with_utility(
     top_n_products: int = 500,
     min_support: float = 0.002,
     min_conf: float = 0.1,
     min_lift: float = 1.0,
+    use_sketch: bool = False,
 ):
     """
     Run FP-Growth on the basket and compute utility using synthetic prices.
 
+    use_sketch: take the top products from the streaming sketches and
+    stream only their order lines (see transactions.build_transactions).
+
     Outputs:
       - association_rules_fp_all.csv
       - business_ready_rules.csv
       - top_rules_per_item.csv
     """
     print(f"[rules] Building transactions (top_n_products={top_n_products})...")
-    transactions, full = build_transactions(top_n_products=top_n_products)
-    basket = encode_transactions(transactions)
-    print(f"[rules] Basket shape: {basket.shape}")
+    transactions, full = build_transactions(
+        top_n_products=top_n_products, use_sketch=use_sketch
+    )
 
     # Build product_name -> price map from synthetic prices
-    price_map = (
-        full[["product_name", "price"]]
-        .dropna()
-        .drop_duplicates()
-        .set_index("product_name")["price"]
+    price_map = build_price_map(full)
+
+    return mine_rules_from_transactions(
+        transactions,
+        price_map,
+        min_support=min_support,
+        min_conf=min_conf,
+        min_lift=min_lift,
     )
 
+
+def mine_rules_from_transactions(
+    transactions,
+    price_map,
+    min_support: float = 0.002,
+    min_conf: float = 0.1,
+    min_lift: float = 1.0,
+    out_dir: str = DATA_PROCESSED,
+    tag: str = "rules",
+):
+    """
+    FP-Growth + utility on already-built transactions.
+
+    Writes association_rules_fp_all.csv, business_ready_rules.csv and
+    top_rules_per_item.csv into `out_dir`; `tag` prefixes the log lines.
+    """
+    basket = encode_transactions(transactions)
+    print(f"[{tag}] Basket shape: {basket.shape}")
+
     def itemset_utility(items):
         return sum(price_map.get(item, 0.0) for item in items)
 
-    print(f"[rules] Running FP-Growth (min_support={min_support})...")
-    freq = fpgrowth(basket, min_support=min_support, use_colnames=True)
-    print(f"[rules] Frequent itemsets found: {freq.shape[0]}")
+    print(f"[{tag}] Running FP-Growth (min_support={min_support})...")
+    with profile_stage("fpgrowth", rows_in=basket.shape[0]) as prof:
+        freq = fpgrowth(basket, min_support=min_support, use_colnames=True)
+        prof.rows_out = freq.shape[0]
+    print(f"[{tag}] Frequent itemsets found: {freq.shape[0]}")
 
     freq["itemset_utility"] = freq["itemsets"].apply(lambda s: itemset_utility(list(s)))
     freq["expected_revenue"] = freq["support"] * freq["itemset_utility"]
 
-    print("[rules] Generating association rules...")
-    rules = association_rules(freq, metric="lift", min_threshold=1.0)
-    print(f"[rules] Raw rules: {rules.shape[0]}")
+    print(f"[{tag}] Generating association rules...")
+    with profile_stage("association_rules", rows_in=freq.shape[0]) as prof:
+        rules = association_rules(freq, metric="lift", min_threshold=1.0)
+        prof.rows_out = rules.shape[0]
+    print(f"[{tag}] Raw rules: {rules.shape[0]}")
 
     rules = rules[
         (rules["confidence"] >= min_conf) &
         (rules["lift"] >= min_lift)
     ].copy()
-    print(f"[rules] After filtering by conf/lift: {rules.shape[0]}")
+    print(f"[{tag}] After filtering by conf/lift: {rules.shape[0]}")
 
     rules["antecedents_str"] = rules["antecedents"].apply(
         lambda x: ", ".join(sorted(list(x)))
@@ -75,12 +119,13 @@ def mine_fp_growth_with_utility(
         items = set(row["antecedents"]) | set(row["consequents"])
         return itemset_utility(items)
 
-    rules["rule_utility"] = rules.apply(union_utility, axis=1)
-    rules["expected_revenue"] = rules["support"] * rules["rule_utility"]
+    with profile_stage("rule_utility", rows_in=rules.shape[0]):
+        rules["rule_utility"] = rules.apply(union_utility, axis=1)
+        rules["expected_revenue"] = rules["support"] * rules["rule_utility"]
 
-    all_path = os.path.join(DATA_PROCESSED, "association_rules_fp_all.csv")
-    rules.to_csv(all_path, index=False)
-    print(f"[rules] All FP-Growth rules saved → {all_path}")
+    all_path = os.path.join(out_dir, "association_rules_fp_all.csv")
+    publish_csv(rules, all_path)
+    print(f"[{tag}] All FP-Growth rules saved → {all_path}")
 
     # Business-ready 1->1 rules
     business_rules = rules[
@@ -89,24 +134,25 @@ def mine_fp_growth_with_utility(
     ].copy()
 
     before_sim = business_rules.shape[0]
-    business_rules = business_rules[
-        ~business_rules.apply(
-            lambda row: is_similar_name(row["antecedents_str"], row["consequents_str"]),
-            axis=1,
-        )
-    ]
+    if before_sim:
+        business_rules = business_rules[
+            ~business_rules.apply(
+                lambda row: is_similar_name(row["antecedents_str"], row["consequents_str"]),
+                axis=1,
+            )
+        ]
     after_sim = business_rules.shape[0]
-    print(f"[rules] 1->1 rules before similar-name filter: {before_sim}")
-    print(f"[rules] 1->1 rules after similar-name filter:  {after_sim}")
+    print(f"[{tag}] 1->1 rules before similar-name filter: {before_sim}")
+    print(f"[{tag}] 1->1 rules after similar-name filter:  {after_sim}")
 
     business_rules = business_rules.sort_values(
         by=["expected_revenue", "lift", "confidence"],
         ascending=False
     )
 
-    business_path = os.path.join(DATA_PROCESSED, "business_ready_rules.csv")
-    business_rules.to_csv(business_path, index=False)
-    print(f"[rules] business_ready_rules saved → {business_path}")
+    business_path = os.path.join(out_dir, "business_ready_rules.csv")
+    publish_csv(business_rules, business_path)
+    print(f"[{tag}] business_ready_rules saved → {business_path}")
 
     top_rules_per_item = (
         business_rules
@@ -114,8 +160,8 @@ def mine_fp_growth_with_utility(
         .head(3)
         .reset_index(drop=True)
     )
-    top_path = os.path.join(DATA_PROCESSED, "top_rules_per_item.csv")
-    top_rules_per_item.to_csv(top_path, index=False)
-    print(f"[rules] top_rules_per_item saved → {top_path}")
+    top_path = os.path.join(out_dir, "top_rules_per_item.csv")
+    publish_csv(top_rules_per_item, top_path)
+    print(f"[{tag}] top_rules_per_item saved → {top_path}")
 
-    return rules, business_rules, top_rules_per_item
\ No newline at end of file
+    return rules, business_rules, top_rules_per_item
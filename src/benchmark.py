@@ -0,0 +1,246 @@
+import json
+import os
+import platform
+import random
+import string
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from config import DATA_INTERIM, DATA_PROCESSED
+from artifacts import publish_json
+from product_meta import read_product_meta
+
+BENCHMARKS_DIR = os.path.join(DATA_PROCESSED, "benchmarks")
+
+
+def cart_size_distribution(max_rows: int = 2000000) -> np.ndarray:
+    """
+    Observed cart sizes (items per order) from the first `max_rows` order
+    lines of order_products_full_with_price.csv.
+    """
+    full_path = os.path.join(DATA_INTERIM, "order_products_full_with_price.csv")
+    if not os.path.exists(full_path):
+        raise FileNotFoundError(
+            f"{full_path} not found. Run scripts/run_enrichment.py first."
+        )
+    order_ids = pd.read_csv(full_path, usecols=["order_id"], nrows=max_rows)["order_id"]
+    return order_ids.value_counts().to_numpy()
+
+
+def _misspell(name: str, rng: random.Random) -> str:
+    """
+    One random typo (drop / swap / duplicate / replace a character) plus
+    random casing, the kind of input _fuzzy_match_item has to absorb.
+    """
+    if len(name) < 4:
+        return name.upper()
+    i = rng.randrange(1, len(name) - 1)
+    op = rng.randrange(4)
+    if op == 0:
+        name = name[:i] + name[i + 1:]
+    elif op == 1:
+        name = name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    elif op == 2:
+        name = name[:i] + name[i] + name[i:]
+    else:
+        name = name[:i] + rng.choice(string.ascii_lowercase) + name[i + 1:]
+    return name.lower() if rng.random() < 0.5 else name
+
+
+def generate_carts(
+    n_carts: int = 5000,
+    long_tail_rate: float = 0.2,
+    misspell_rate: float = 0.1,
+    unknown_rate: float = 0.02,
+    max_cart_size: int = 30,
+    seed: int = 42,
+    cart_sizes: np.ndarray = None,
+    meta: pd.DataFrame = None,
+):
+    """
+    Generate a reproducible list of realistic carts.
+
+    - cart sizes are drawn from the observed order sizes (capped at max_cart_size)
+    - items are drawn by purchase popularity, except a `long_tail_rate` share
+      drawn uniformly over the catalog
+    - a `misspell_rate` share of items get a typo, and an `unknown_rate` share
+      are made-up names that match nothing
+    """
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    if meta is None:
+        meta = read_product_meta()
+    if cart_sizes is None:
+        cart_sizes = cart_size_distribution()
+
+    names = meta.index.to_numpy()
+    weights = meta["popularity"].to_numpy(dtype="float64") + 1.0
+    weights /= weights.sum()
+    sizes = np.minimum(np_rng.choice(cart_sizes, size=n_carts), max_cart_size)
+
+    carts = []
+    for size in sizes:
+        n_tail = np_rng.binomial(size, long_tail_rate)
+        items = list(np_rng.choice(names, size=size - n_tail, p=weights))
+        items += list(np_rng.choice(names, size=n_tail))
+        cart = []
+        for item in items:
+            roll = rng.random()
+            if roll < unknown_rate:
+                cart.append("".join(rng.choices(string.ascii_lowercase + " ", k=12)))
+            elif roll < unknown_rate + misspell_rate:
+                cart.append(_misspell(str(item), rng))
+            else:
+                cart.append(str(item))
+        carts.append(cart)
+    return carts
+
+
+def _latency_stats(samples, wall: float) -> dict:
+    arr = np.asarray(samples, dtype="float64") * 1e3
+    return {
+        "requests": int(arr.size),
+        "wall_seconds": round(wall, 4),
+        "throughput_rps": arr.size / wall if wall else 0.0,
+        "mean_ms": float(arr.mean()) if arr.size else 0.0,
+        "p50_ms": float(np.percentile(arr, 50)) if arr.size else 0.0,
+        "p95_ms": float(np.percentile(arr, 95)) if arr.size else 0.0,
+        "p99_ms": float(np.percentile(arr, 99)) if arr.size else 0.0,
+        "max_ms": float(arr.max()) if arr.size else 0.0,
+    }
+
+
+def _run_pass(carts, top_k: int, concurrency: int) -> dict:
+    """
+    Call recommend_items once per cart; concurrency > 1 uses a thread pool.
+    """
+    from recommender import recommend_items
+
+    def timed(cart):
+        start = time.perf_counter()
+        recommend_items(cart, top_k=top_k)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if concurrency <= 1:
+        samples = [timed(cart) for cart in carts]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(timed, carts))
+    return _latency_stats(samples, time.perf_counter() - start)
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=10,
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(
+    n_carts: int = 5000,
+    top_k: int = 5,
+    concurrency=(1, 8),
+    seed: int = 42,
+    **cart_options,
+):
+    """
+    Benchmark recommend_items on generated carts.
+
+    For every concurrency level, the same carts are sent twice:
+      - cold: fresh snapshot (empty fuzzy-match cache) and empty result cache
+      - warm: the same carts again, served from warm caches
+
+    The snapshot load time and per-stage latency histograms are included.
+    The report carries the git commit, seed and parameters, so files from
+    different commits can be compared with compare_benchmarks().
+
+    Output:
+      data/processed/benchmarks/benchmark_<commit>_<timestamp>.json
+    """
+    import latency
+    from recommender import clear_recommendation_cache, reload_snapshot
+
+    carts = generate_carts(n_carts=n_carts, seed=seed, **cart_options)
+    sizes = [len(c) for c in carts]
+    print(f"[benchmark] {len(carts)} carts, mean size {np.mean(sizes):.1f}, max {max(sizes)}")
+
+    start = time.perf_counter()
+    reload_snapshot(force=True)
+    load_seconds = time.perf_counter() - start
+
+    phases = {}
+    for level in concurrency:
+        reload_snapshot(force=True)
+        clear_recommendation_cache()
+        latency.reset_latency()
+        for cache_state in ("cold", "warm"):
+            name = f"{cache_state}_c{level}"
+            phases[name] = _run_pass(carts, top_k, level)
+            s = phases[name]
+            print(
+                f"[benchmark] {name:<10} {s['throughput_rps']:>10.1f} req/s  "
+                f"p50 {s['p50_ms']:.3f} ms  p95 {s['p95_ms']:.3f} ms  "
+                f"p99 {s['p99_ms']:.3f} ms"
+            )
+        phases[f"stages_c{level}"] = latency.latency_summary()
+
+    report = {
+        "commit": _git_commit(),
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "params": {
+            "n_carts": n_carts,
+            "top_k": top_k,
+            "concurrency": list(concurrency),
+            "seed": seed,
+            **cart_options,
+        },
+        "snapshot_load_seconds": round(load_seconds, 4),
+        "phases": phases,
+    }
+
+    os.makedirs(BENCHMARKS_DIR, exist_ok=True)
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    out_path = os.path.join(BENCHMARKS_DIR, f"benchmark_{report['commit'] or 'nogit'}_{stamp}.json")
+    publish_json(report, out_path)
+    print(f"[benchmark] Report saved → {out_path}")
+    return report
+
+
+def compare_benchmarks(baseline_path: str, candidate_path: str):
+    """
+    Print throughput and tail-latency changes between two benchmark reports.
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(candidate_path, encoding="utf-8") as f:
+        cand = json.load(f)
+
+    if base["params"] != cand["params"]:
+        print("[benchmark] Warning: reports were run with different parameters.")
+
+    print(f"[benchmark] {base.get('commit')} -> {cand.get('commit')}")
+    rows = {}
+    for phase, b in base["phases"].items():
+        c = cand["phases"].get(phase)
+        if c is None or "throughput_rps" not in b:
+            continue
+        rows[phase] = {}
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            change = (c[key] - b[key]) / b[key] * 100 if b[key] else 0.0
+            rows[phase][key] = change
+        print(
+            f"[benchmark] {phase:<10} "
+            + "  ".join(f"{k} {v:+.1f}%" for k, v in rows[phase].items())
+        )
+    return rows
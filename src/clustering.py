@@ -3,6 +3,7 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import MiniBatchKMeans
 from config import DATA_PROCESSED
 from customer_features import build_customer_features
+from profiling import profile_stage
 
 RANDOM_STATE = 42
 
@@ -27,13 +28,16 @@ def cluster_customers(n_clusters: int = 4, use_price: bool = True):
         batch_size=2048,
         random_state=RANDOM_STATE
     )
-    labels = model.fit_predict(X_scaled)
+    with profile_stage("minibatch_kmeans", rows_in=X_scaled.shape[0]) as prof:
+        labels = model.fit_predict(X_scaled)
+        prof.rows_out = len(labels)
 
     features_clustered = features.copy()
     features_clustered["cluster"] = labels
 
     out_path = os.path.join(DATA_PROCESSED, "customer_segments.csv")
-    features_clustered.to_csv(out_path, index=True)  # index=user_id
+    with profile_stage("write_csv:customer_segments.csv", rows_in=len(features_clustered)):
+        features_clustered.to_csv(out_path, index=True)  # index=user_id
     print(f"[clustering] customer_segments saved → {out_path}")
     print("[clustering] Shape:", features_clustered.shape)
 
@@ -1,6 +1,7 @@
 import os
 import pandas as pd
 from config import DATA_INTERIM
+from profiling import profile_stage
 
 
 def build_customer_features(use_price: bool = True):
@@ -22,8 +23,18 @@ def build_customer_features(use_price: bool = True):
         )
 
     print(f"[customer_features] Loading {full_path}")
-    full = pd.read_csv(full_path)
+    with profile_stage("read_csv:order_products_full_with_price.csv") as prof:
+        full = pd.read_csv(full_path)
+        prof.rows_out = len(full)
 
+    with profile_stage("customer_features", rows_in=len(full)) as prof:
+        features = _aggregate_features(full, use_price)
+        prof.rows_out = len(features)
+    print("[customer_features] Features shape:", features.shape)
+    return features
+
+
+def _aggregate_features(full: pd.DataFrame, use_price: bool) -> pd.DataFrame:
     total_orders = full.groupby("user_id")["order_id"].nunique()
     total_products = full.groupby("user_id")["product_id"].count()
     avg_basket_size = total_products / total_orders
@@ -49,6 +60,4 @@ def build_customer_features(use_price: bool = True):
         total_spent = full.groupby("user_id")["price"].sum()
         data["total_spent"] = total_spent
 
-    features = pd.DataFrame(data)
-    print("[customer_features] Features shape:", features.shape)
-    return features
\ No newline at end of file
+    return pd.DataFrame(data)
\ No newline at end of file
@@ -0,0 +1,288 @@
+import json
+import os
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+from config import DATA_PROCESSED
+from artifacts import publish_csv, publish_json
+from sketches import STREAM_STATS_FILE, StreamStats
+
+DASHBOARD_DIR = os.path.join(DATA_PROCESSED, "dashboard")
+FREQUENT_BUYER_MIN_ORDERS = 50
+TOP_BUNDLES = 20
+RULE_SCATTER_POINTS = 500
+SEGMENT_SAMPLE_POINTS = 5000
+DENSITY_BINS = 40
+RULE_STRATA = 10
+
+BUNDLE_COLUMNS = [
+    "antecedents_str",
+    "consequents_str",
+    "support",
+    "confidence",
+    "lift",
+    "expected_revenue",
+]
+RULE_OPTION_COLUMNS = ["antecedents_str", "consequents_str", "expected_revenue", "rule_utility"]
+
+
+def _read_processed(name: str, script: str, **kwargs) -> pd.DataFrame:
+    path = os.path.join(DATA_PROCESSED, name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found. Run scripts/{script} first.")
+    return pd.read_csv(path, **kwargs)
+
+
+def stratified_sample(df: pd.DataFrame, strata, n: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Up to n rows with the same quota per stratum (small strata are kept whole),
+    so rare groups stay visible in a bounded sample.
+    """
+    groups = df.groupby(strata, observed=True, sort=False).ngroups
+    if groups == 0 or df.shape[0] <= n:
+        return df
+    per_stratum = max(1, n // groups)
+    shuffled = df.sample(frac=1.0, random_state=seed)
+    return shuffled.groupby(strata, observed=True, sort=False).head(per_stratum)
+
+
+def _bin_edges(values: pd.Series, bins: int) -> np.ndarray:
+    """
+    Equal-width edges from the minimum to the 99.5th percentile; the long
+    tail above it falls into the last bin.
+    """
+    lo = float(values.min())
+    hi = float(values.quantile(0.995))
+    if not hi > lo:
+        hi = lo + 1.0
+    return np.linspace(lo, hi, bins + 1)
+
+
+def segment_density(segments: pd.DataFrame, features, bins: int = DENSITY_BINS) -> pd.DataFrame:
+    """
+    2D histograms of every feature pair, per cluster, in long format:
+    x_feature, y_feature, cluster, x, y (bin centres), customers.
+    Only non-empty cells are kept; pairs are stored once (x_feature <= y_feature
+    in `features` order).
+    """
+    cluster_codes, clusters = pd.factorize(segments["cluster"], sort=True)
+    n_clusters = len(clusters)
+
+    codes, centers = {}, {}
+    for feature in features:
+        values = segments[feature].fillna(0.0).to_numpy(dtype="float64")
+        edges = _bin_edges(segments[feature].fillna(0.0), bins)
+        codes[feature] = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, bins - 1)
+        centers[feature] = (edges[:-1] + edges[1:]) / 2
+
+    parts = []
+    for i, fx in enumerate(features):
+        for fy in features[i:]:
+            cell = (cluster_codes * bins + codes[fx]) * bins + codes[fy]
+            counts = np.bincount(cell, minlength=n_clusters * bins * bins)
+            nonzero = np.flatnonzero(counts)
+            c, rest = np.divmod(nonzero, bins * bins)
+            bx, by = np.divmod(rest, bins)
+            parts.append(pd.DataFrame({
+                "x_feature": fx,
+                "y_feature": fy,
+                "cluster": np.asarray(clusters)[c],
+                "x": centers[fx][bx],
+                "y": centers[fy][by],
+                "customers": counts[nonzero],
+            }))
+    return pd.concat(parts, ignore_index=True)
+
+
+def build_dashboard_aggregates(segments: pd.DataFrame = None, rules: pd.DataFrame = None):
+    """
+    Precompute the small views the Streamlit dashboard needs, so the app
+    never loads the full customer / rule tables.
+
+    Outputs (data/processed/dashboard/):
+      - kpis.json             (headline counts and means, feature column names;
+                               approximate order / product counts from the
+                               streaming sketches when they exist)
+      - cluster_counts.csv    (customers per cluster)
+      - buyer_types.csv       (Frequent vs Irregular buyers)
+      - top_bundles.csv       (top rules by expected_revenue)
+      - rule_options.csv      (antecedent -> consequent lookup for the simulators,
+                               sorted by antecedent, best expected_revenue first)
+      - rule_scatter.csv      (rules shown in the rule strength plot: the top
+                               rules by expected_revenue plus a sample
+                               stratified by lift decile)
+      - segment_density.csv   (per-cluster 2D histograms of each feature pair)
+      - segment_sample.csv    (customers sampled with an equal quota per cluster)
+    """
+    if segments is None:
+        segments = _read_processed("customer_segments.csv", "run_clustering.py")
+    if rules is None:
+        rules = _read_processed("business_ready_rules.csv", "run_association_rules.py")
+
+    os.makedirs(DASHBOARD_DIR, exist_ok=True)
+    print(f"[dashboard_aggregates] {segments.shape[0]} customers, {rules.shape[0]} rules")
+
+    features = [str(c) for c in segments.columns if c not in ("user_id", "cluster")]
+    kpis = {
+        "customers": int(segments["user_id"].nunique()),
+        "segments": int(segments["cluster"].nunique()),
+        "rules": int(rules.shape[0]),
+        "avg_basket_size": float(segments["avg_basket_size"].mean()),
+        "avg_orders": float(segments["total_orders"].mean()),
+        "avg_order_gap_std": float(segments["order_gap_std"].mean()),
+        "feature_columns": features,
+    }
+    if os.path.exists(STREAM_STATS_FILE):
+        # orders / distinct products from the sketches (scripts/run_sketches.py)
+        kpis["stream"] = StreamStats.load(STREAM_STATS_FILE).summary()
+    publish_json(kpis, os.path.join(DASHBOARD_DIR, "kpis.json"))
+
+    cluster_counts = (
+        segments["cluster"].value_counts().sort_index()
+        .rename_axis("cluster").reset_index(name="customers")
+    )
+    publish_csv(cluster_counts, os.path.join(DASHBOARD_DIR, "cluster_counts.csv"))
+
+    frequent = segments["total_orders"] >= FREQUENT_BUYER_MIN_ORDERS
+    buyer_types = pd.DataFrame({
+        "buyer_type": ["Frequent Buyer", "Irregular Buyer"],
+        "customers": [int(frequent.sum()), int((~frequent).sum())],
+    })
+    publish_csv(buyer_types, os.path.join(DASHBOARD_DIR, "buyer_types.csv"))
+
+    by_revenue = rules.sort_values("expected_revenue", ascending=False, kind="mergesort")
+    publish_csv(
+        by_revenue[BUNDLE_COLUMNS].head(TOP_BUNDLES),
+        os.path.join(DASHBOARD_DIR, "top_bundles.csv"),
+    )
+
+    rule_options = by_revenue[RULE_OPTION_COLUMNS].sort_values(
+        "antecedents_str", kind="mergesort"
+    )
+    publish_csv(rule_options, os.path.join(DASHBOARD_DIR, "rule_options.csv"))
+
+    top = by_revenue[BUNDLE_COLUMNS].head(RULE_SCATTER_POINTS // 5)
+    rest = by_revenue[BUNDLE_COLUMNS].iloc[top.shape[0]:]
+    if rest.empty:
+        rule_scatter = top
+    else:
+        strata = min(RULE_STRATA, rest.shape[0])
+        lift_bucket = pd.qcut(rest["lift"].rank(method="first"), strata, labels=False)
+        sample = stratified_sample(rest, lift_bucket, RULE_SCATTER_POINTS - top.shape[0])
+        rule_scatter = pd.concat([top, sample], ignore_index=True)
+    publish_csv(rule_scatter, os.path.join(DASHBOARD_DIR, "rule_scatter.csv"))
+
+    density = segment_density(segments, features)
+    publish_csv(density, os.path.join(DASHBOARD_DIR, "segment_density.csv"))
+
+    segment_sample = stratified_sample(
+        segments[features + ["cluster"]], "cluster", SEGMENT_SAMPLE_POINTS
+    )
+    publish_csv(segment_sample, os.path.join(DASHBOARD_DIR, "segment_sample.csv"))
+
+    print(f"[dashboard_aggregates] Aggregates saved → {DASHBOARD_DIR}")
+    return kpis
+
+
+class DashboardAggregates:
+    """
+    In-memory view of data/processed/dashboard/, ready for the widgets:
+    antecedent options are already sorted and each antecedent's rules are
+    pre-split, so a selectbox change is a dict lookup.
+
+    Only kpis.json is read up front; every other view is read on first
+    access, so a page only pays for the files it uses.
+    """
+
+    def __init__(self, folder: str = DASHBOARD_DIR):
+        self.folder = folder
+        kpis_path = os.path.join(folder, "kpis.json")
+        if not os.path.exists(kpis_path):
+            raise FileNotFoundError(
+                f"{kpis_path} not found. Run scripts/run_dashboard_aggregates.py first."
+            )
+        with open(kpis_path, encoding="utf-8") as f:
+            self.kpis = json.load(f)
+
+    def _read(self, name: str) -> pd.DataFrame:
+        return pd.read_csv(os.path.join(self.folder, name))
+
+    @cached_property
+    def cluster_counts(self) -> pd.DataFrame:
+        return self._read("cluster_counts.csv")
+
+    @cached_property
+    def buyer_types(self) -> pd.DataFrame:
+        return self._read("buyer_types.csv")
+
+    @cached_property
+    def top_bundles(self) -> pd.DataFrame:
+        return self._read("top_bundles.csv")
+
+    @cached_property
+    def rule_scatter(self) -> pd.DataFrame:
+        return self._read("rule_scatter.csv")
+
+    @cached_property
+    def segment_sample(self) -> pd.DataFrame:
+        return self._read("segment_sample.csv")
+
+    @cached_property
+    def rule_options(self) -> pd.DataFrame:
+        return self._read("rule_options.csv")
+
+    @cached_property
+    def rules_by_antecedent(self) -> dict:
+        return {
+            antecedent: part.reset_index(drop=True)
+            for antecedent, part in self.rule_options.groupby("antecedents_str", sort=False)
+        }
+
+    @cached_property
+    def antecedents(self) -> list:
+        return list(self.rules_by_antecedent)
+
+    @cached_property
+    def rule_queries(self):
+        """
+        RuleQueryEngine over business_ready_rules.csv (+ product_meta.csv for
+        the department / aisle filters), as scripts/run_rule_query.py builds it.
+        """
+        from product_meta import PRODUCT_META_FILE, read_product_meta
+        from rule_query import build_rule_query_engine
+
+        rules = _read_processed("business_ready_rules.csv", "run_association_rules.py")
+        meta = None
+        if os.path.exists(os.path.join(DATA_PROCESSED, PRODUCT_META_FILE)):
+            meta = read_product_meta()
+        return build_rule_query_engine(rules, meta)
+
+    @cached_property
+    def _density(self) -> dict:
+        density = self._read("segment_density.csv")
+        return {
+            pair: part[["cluster", "x", "y", "customers"]].reset_index(drop=True)
+            for pair, part in density.groupby(["x_feature", "y_feature"], sort=False)
+        }
+
+    def density(self, x_feature: str, y_feature: str) -> pd.DataFrame:
+        """
+        Binned customers (cluster, x, y, customers) for one feature pair.
+        """
+        part = self._density.get((x_feature, y_feature))
+        if part is not None:
+            return part
+        part = self._density[(y_feature, x_feature)]
+        return part.rename(columns={"x": "y", "y": "x"})
+
+    def preload(self, names):
+        """
+        Read the given views now (e.g. the ones a dashboard page declares).
+        """
+        for name in names:
+            getattr(self, name)
+
+
+def load_dashboard_aggregates() -> DashboardAggregates:
+    return DashboardAggregates()
@@ -1,6 +1,7 @@
 import os
 import pandas as pd
 from config import DATA_RAW, DATA_INTERIM
+from profiling import profile_stage
 
 
 def load_raw_data():
@@ -13,11 +14,13 @@ def load_raw_data():
       - aisles.csv
       - departments.csv
     """
-    orders = pd.read_csv(os.path.join(DATA_RAW, "orders.csv"))
-    order_products = pd.read_csv(os.path.join(DATA_RAW, "order_products__prior.csv"))
-    products = pd.read_csv(os.path.join(DATA_RAW, "products.csv"))
-    aisles = pd.read_csv(os.path.join(DATA_RAW, "aisles.csv"))
-    departments = pd.read_csv(os.path.join(DATA_RAW, "departments.csv"))
+    with profile_stage("load_raw_data") as prof:
+        orders = pd.read_csv(os.path.join(DATA_RAW, "orders.csv"))
+        order_products = pd.read_csv(os.path.join(DATA_RAW, "order_products__prior.csv"))
+        products = pd.read_csv(os.path.join(DATA_RAW, "products.csv"))
+        aisles = pd.read_csv(os.path.join(DATA_RAW, "aisles.csv"))
+        departments = pd.read_csv(os.path.join(DATA_RAW, "departments.csv"))
+        prof.rows_out = sum(len(df) for df in (orders, order_products, products, aisles, departments))
     return orders, order_products, products, aisles, departments
 
 
@@ -33,16 +36,19 @@ def build_full_order_products():
     orders, order_products, products, aisles, departments = load_raw_data()
 
     print("[data_loading] Merging tables...")
-    full = (
-        order_products
-        .merge(orders, on="order_id", how="left")
-        .merge(products, on="product_id", how="left")
-        .merge(aisles, on="aisle_id", how="left")
-        .merge(departments, on="department_id", how="left")
-    )
+    with profile_stage("merge_tables", rows_in=len(order_products)) as prof:
+        full = (
+            order_products
+            .merge(orders, on="order_id", how="left")
+            .merge(products, on="product_id", how="left")
+            .merge(aisles, on="aisle_id", how="left")
+            .merge(departments, on="department_id", how="left")
+        )
+        prof.rows_out = len(full)
 
     out_path = os.path.join(DATA_INTERIM, "order_products_full.csv")
-    full.to_csv(out_path, index=False)
+    with profile_stage("write_csv:order_products_full.csv", rows_in=len(full)):
+        full.to_csv(out_path, index=False)
     print(f"[data_loading] Saved merged order_products_full → {out_path}")
     print("[data_loading] Shape:", full.shape)
     return full
\ No newline at end of file
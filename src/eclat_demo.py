@@ -3,6 +3,7 @@ import pandas as pd
 from config import DATA_PROCESSED
 from transactions import build_transactions, encode_transactions
 from eclat_simple import eclat_from_basket
+from profiling import profile_stage
 
 
 def run_eclat_demo(
@@ -14,10 +15,7 @@ def run_eclat_demo(
     Run a simple Eclat implementation on a smaller sample of the basket.
     """
     print(f"[eclat_demo] Building transactions with top {top_n_products} products...")
-    transactions, _ = build_transactions(
-        top_n_products=top_n_products,
-        use_price=True
-    )
+    transactions, _ = build_transactions(top_n_products=top_n_products)
     print(f"[eclat_demo] Total transactions (before sampling): {len(transactions)}")
 
     # Sample for speed
@@ -36,7 +34,9 @@ def run_eclat_demo(
 
     # Run Eclat
     print(f"[eclat_demo] Running simple Eclat (min_support={min_support})...")
-    itemsets = eclat_from_basket(basket, min_support=min_support)
+    with profile_stage("eclat", rows_in=basket.shape[0]) as prof:
+        itemsets = eclat_from_basket(basket, min_support=min_support)
+        prof.rows_out = len(itemsets)
     print(f"[eclat_demo] Found {len(itemsets)} frequent itemsets")
 
     # Convert to DataFrame
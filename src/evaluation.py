@@ -0,0 +1,190 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+from config import DATA_RAW, DATA_INTERIM, DATA_PROCESSED
+from artifacts import publish_json
+
+EVALUATION_REPORT_FILE = "evaluation_report.json"
+
+
+def load_eval_orders(source: str = "train", max_orders: int = None, seed: int = 42):
+    """
+    Load held-out orders as a list of (user_id, [product_name, ...]).
+
+    source:
+      - "train": order_products__train.csv (Instacart's held-out last order per
+        user, never seen by rule mining, which uses the prior orders)
+      - "last_prior": the last prior order of every user, from
+        order_products_full_with_price.csv (in-sample, but needs no extra file)
+    """
+    if source == "train":
+        op_path = os.path.join(DATA_RAW, "order_products__train.csv")
+        if not os.path.exists(op_path):
+            raise FileNotFoundError(
+                f"{op_path} not found. Use source='last_prior' or add the Instacart train file."
+            )
+        op = pd.read_csv(op_path, usecols=["order_id", "product_id"])
+        orders = pd.read_csv(os.path.join(DATA_RAW, "orders.csv"), usecols=["order_id", "user_id"])
+        products = pd.read_csv(
+            os.path.join(DATA_RAW, "products.csv"), usecols=["product_id", "product_name"]
+        )
+        lines = op.merge(orders, on="order_id").merge(products, on="product_id")
+    elif source == "last_prior":
+        full_path = os.path.join(DATA_INTERIM, "order_products_full_with_price.csv")
+        if not os.path.exists(full_path):
+            raise FileNotFoundError(
+                f"{full_path} not found. Run scripts/run_enrichment.py first."
+            )
+        full = pd.read_csv(full_path, usecols=["order_id", "user_id", "order_number", "product_name"])
+        last = full.groupby("user_id")["order_number"].transform("max")
+        lines = full[full["order_number"] == last]
+    else:
+        raise ValueError(f"Unknown source {source!r} (use 'train' or 'last_prior').")
+
+    grouped = lines.groupby(["order_id", "user_id"])["product_name"].apply(list)
+    orders_list = [(int(user_id), items) for (_, user_id), items in grouped.items()]
+
+    if max_orders is not None and len(orders_list) > max_orders:
+        orders_list = random.Random(seed).sample(orders_list, max_orders)
+
+    print(f"[evaluation] Loaded {len(orders_list)} held-out orders (source={source}).")
+    return orders_list
+
+
+def build_eval_cases(orders, n_hidden: int = 1, seed: int = 42):
+    """
+    Hide `n_hidden` random items of each order: (user_id, visible cart, hidden items).
+    Orders with fewer than n_hidden + 1 distinct items are skipped.
+    """
+    rng = random.Random(seed)
+    cases = []
+    for user_id, items in orders:
+        items = list(dict.fromkeys(items))
+        if len(items) <= n_hidden:
+            continue
+        hidden = rng.sample(items, n_hidden)
+        cart = [x for x in items if x not in hidden]
+        cases.append((user_id, cart, hidden))
+    return cases
+
+
+def _init_worker():
+    """
+    Worker initializer: load the recommender snapshot once per process and
+    disable the result cache so every cart is really computed.
+    """
+    from recommender import configure_recommendation_cache, current_snapshot
+
+    configure_recommendation_cache(maxsize=0)
+    current_snapshot()
+
+
+def _evaluate_shard(cases, top_k: int, use_segments: bool):
+    """
+    Worker: recommend for one shard of cases and return partial counts.
+    """
+    from recommender import current_snapshot, recommend_items, recommend_items_batch
+
+    start = time.perf_counter()
+    if use_segments:
+        recs_list = [
+            recommend_items(cart, top_k=top_k, user_id=user_id)
+            for user_id, cart, _ in cases
+        ]
+    else:
+        recs_list = recommend_items_batch([cart for _, cart, _ in cases], top_k=top_k)
+    seconds = time.perf_counter() - start
+
+    hit_carts = 0
+    precision_sum = 0.0
+    recall_sum = 0.0
+    recommended = set()
+    for (_, _, hidden), recs in zip(cases, recs_list):
+        hits = len(set(recs) & set(hidden))
+        hit_carts += hits > 0
+        precision_sum += hits / top_k
+        recall_sum += hits / len(hidden)
+        recommended.update(recs)
+
+    return {
+        "carts": len(cases),
+        "hit_carts": hit_carts,
+        "precision_sum": precision_sum,
+        "recall_sum": recall_sum,
+        "recommended": recommended,
+        "catalog_size": int(current_snapshot().meta.shape[0]),
+        "seconds": seconds,
+    }
+
+
+def evaluate_recommender(
+    source: str = "train",
+    top_k: int = 5,
+    max_carts: int = 200000,
+    n_hidden: int = 1,
+    n_workers: int = None,
+    shard_size: int = 5000,
+    use_segments: bool = False,
+    seed: int = 42,
+):
+    """
+    Offline evaluation of recommend_items on held-out orders.
+
+    Each order hides `n_hidden` items; the rest is the cart. Reports
+    hit_rate@k, precision@k, recall@k, catalog coverage and throughput.
+    Cases are sharded across a process pool (one recommender snapshot per
+    worker).
+
+    Output:
+      data/processed/evaluation_report.json
+    """
+    orders = load_eval_orders(source=source, max_orders=max_carts, seed=seed)
+    cases = build_eval_cases(orders, n_hidden=n_hidden, seed=seed)
+    shards = [cases[i:i + shard_size] for i in range(0, len(cases), shard_size)]
+    print(f"[evaluation] {len(cases)} carts in {len(shards)} shards (top_k={top_k})")
+
+    totals = {"carts": 0, "hit_carts": 0, "precision_sum": 0.0, "recall_sum": 0.0, "seconds": 0.0}
+    recommended = set()
+    catalog_size = 0
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_evaluate_shard, shard, top_k, use_segments) for shard in shards]
+        for done, future in enumerate(as_completed(futures), start=1):
+            part = future.result()
+            for key in totals:
+                totals[key] += part[key]
+            recommended |= part["recommended"]
+            catalog_size = max(catalog_size, part["catalog_size"])
+            if done % 10 == 0 or done == len(futures):
+                print(f"[evaluation] {done}/{len(futures)} shards done")
+    wall = time.perf_counter() - start
+
+    n = totals["carts"] or 1
+    report = {
+        "source": source,
+        "top_k": top_k,
+        "n_hidden": n_hidden,
+        "use_segments": use_segments,
+        "carts": totals["carts"],
+        f"hit_rate@{top_k}": totals["hit_carts"] / n,
+        f"precision@{top_k}": totals["precision_sum"] / n,
+        f"recall@{top_k}": totals["recall_sum"] / n,
+        "coverage": len(recommended) / catalog_size if catalog_size else 0.0,
+        "distinct_recommended": len(recommended),
+        "wall_seconds": round(wall, 3),
+        "throughput_carts_per_s": totals["carts"] / wall if wall else 0.0,
+        "worker_carts_per_s": totals["carts"] / totals["seconds"] if totals["seconds"] else 0.0,
+        "workers": n_workers or os.cpu_count(),
+        "created_at": time.time(),
+    }
+
+    out_path = os.path.join(DATA_PROCESSED, EVALUATION_REPORT_FILE)
+    publish_json(report, out_path)
+    for key, value in report.items():
+        print(f"[evaluation] {key}: {value}")
+    print(f"[evaluation] Report saved → {out_path}")
+    return report
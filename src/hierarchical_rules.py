@@ -0,0 +1,292 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from mlxtend.frequent_patterns import fpgrowth, association_rules
+from config import DATA_INTERIM, DATA_PROCESSED
+from artifacts import publish_csv, publish_json
+from association_rules import build_price_map, is_similar_name
+from profiling import profile_stage
+
+HIERARCHY_DIR = os.path.join(DATA_PROCESSED, "hierarchy")
+HIERARCHY_COLUMNS = ["order_id", "product_name", "aisle", "department", "price"]
+RULE_SORT = ["expected_revenue", "lift", "confidence"]
+
+
+def _incidence(order_rows, codes, n_orders: int, n_cols: int) -> sparse.csc_matrix:
+    """
+    orders x columns 0/1 matrix (an aisle or product counts once per order).
+    """
+    m = sparse.csr_matrix(
+        (np.ones(len(codes), dtype=np.float64), (order_rows, codes)), shape=(n_orders, n_cols)
+    )
+    m.data[:] = 1.0
+    return m.tocsc()
+
+
+def mine_level(incidence, names, level: str, min_support: float, min_conf: float,
+               min_lift: float, max_len: int = 3):
+    """
+    FP-Growth + association rules on a category-level basket (aisles or
+    departments). Returns (frequent itemsets, rules).
+    """
+    basket = pd.DataFrame.sparse.from_spmatrix(incidence.astype(bool), columns=list(names))
+    with profile_stage(f"fpgrowth:{level}", rows_in=basket.shape[0]) as prof:
+        freq = fpgrowth(basket, min_support=min_support, use_colnames=True, max_len=max_len)
+        prof.rows_out = freq.shape[0]
+    print(f"[hierarchical_rules] {level}: {freq.shape[0]} frequent itemsets")
+    if freq.empty or freq["itemsets"].map(len).max() < 2:
+        return freq, pd.DataFrame()
+
+    rules = association_rules(freq, metric="lift", min_threshold=min_lift)
+    rules = rules[rules["confidence"] >= min_conf].copy()
+    rules["antecedents_str"] = rules["antecedents"].apply(lambda x: ", ".join(sorted(x)))
+    rules["consequents_str"] = rules["consequents"].apply(lambda x: ", ".join(sorted(x)))
+    rules.insert(0, "level", level)
+    rules = rules.drop(columns=["antecedents", "consequents"])
+    return freq, rules.sort_values(["lift", "confidence"], ascending=False, kind="mergesort")
+
+
+def _candidate_aisle_pairs(aisle_incidence, min_count: float):
+    """
+    (a, b) aisle code pairs, a <= b, co-occurring in at least `min_count`
+    orders (a == b: the aisle's own order count). A product pair's order
+    count never exceeds its aisles' co-occurrence, so every product pair
+    reaching min_count lies inside one of these pairs.
+    """
+    co = sparse.triu(aisle_incidence.T @ aisle_incidence).tocoo()
+    keep = co.data >= min_count
+    return sorted(zip(co.row[keep].tolist(), co.col[keep].tolist()))
+
+
+def _pair_rules(a, c, pair_count, item_count, n_orders, min_conf, min_lift):
+    """
+    Both directions of each counted pair as rule rows (antecedent index,
+    consequent index, support, confidence, lift), filtered by conf/lift.
+    """
+    ant = np.concatenate([a, c])
+    con = np.concatenate([c, a])
+    count = np.concatenate([pair_count, pair_count])
+    confidence = count / item_count[ant]
+    lift = confidence / (item_count[con] / n_orders)
+    keep = (confidence >= min_conf) & (lift >= min_lift)
+    return ant[keep], con[keep], count[keep] / n_orders, confidence[keep], lift[keep]
+
+
+def drill_down_products(
+    product_aisle, product_incidence, aisle_pairs, n_orders,
+    min_support, min_conf, min_lift,
+):
+    """
+    Product pair counts only inside candidate aisle pairs (and single aisles,
+    see _candidate_aisle_pairs), restricted to products that are frequent on
+    their own.
+
+    Returns (rule arrays, product order counts, number of frequent products,
+    candidate pairs examined).
+    """
+    item_count = np.asarray(product_incidence.sum(axis=0)).ravel()
+    frequent = item_count >= min_support * n_orders
+    by_aisle = {}
+    for col in np.flatnonzero(frequent):
+        by_aisle.setdefault(product_aisle[col], []).append(col)
+
+    parts, examined = [], 0
+    for a, b in aisle_pairs:
+        cols_a, cols_b = by_aisle.get(a), by_aisle.get(b)
+        if not cols_a or not cols_b:
+            continue
+        counts = (product_incidence[:, cols_a].T @ product_incidence[:, cols_b]).tocoo()
+        if a == b:
+            examined += len(cols_a) * (len(cols_a) - 1) // 2
+            keep = counts.row < counts.col
+        else:
+            examined += len(cols_a) * len(cols_b)
+            keep = np.ones(counts.nnz, dtype=bool)
+        keep &= counts.data >= min_support * n_orders
+        parts.append((
+            np.asarray(cols_a)[counts.row[keep]],
+            np.asarray(cols_b)[counts.col[keep]],
+            counts.data[keep],
+        ))
+
+    if parts:
+        a_idx, c_idx, pair_count = (np.concatenate(p) for p in zip(*parts))
+    else:
+        a_idx = c_idx = np.empty(0, dtype=np.int64)
+        pair_count = np.empty(0)
+    rules = _pair_rules(a_idx, c_idx, pair_count, item_count, n_orders, min_conf, min_lift)
+    return rules, item_count, int(frequent.sum()), examined
+
+
+def cross_level_rules(
+    products, product_aisle, aisles, product_incidence, aisle_incidence, item_count,
+    n_orders, min_support, min_conf, min_lift,
+) -> pd.DataFrame:
+    """
+    product -> aisle and aisle -> product rules (the product's own aisle excluded),
+    e.g. "Banana -> Yogurt" (aisle) or "fresh fruits -> Greek Yogurt" (product).
+    """
+    frequent = np.flatnonzero(item_count >= min_support * n_orders)
+    aisle_count = np.asarray(aisle_incidence.sum(axis=0)).ravel()
+    counts = (product_incidence[:, frequent].T @ aisle_incidence).toarray()
+    counts[np.arange(len(frequent)), product_aisle[frequent]] = 0
+    p, a = np.nonzero(counts >= min_support * n_orders)
+    count = counts[p, a]
+    p = frequent[p]
+    support = count / n_orders
+
+    parts = []
+    for level, ant_count, con_count, ant_names, con_names in (
+        ("product->aisle", item_count[p], aisle_count[a], products[p], aisles[a]),
+        ("aisle->product", aisle_count[a], item_count[p], aisles[a], products[p]),
+    ):
+        confidence = count / ant_count
+        lift = confidence / (con_count / n_orders)
+        keep = (confidence >= min_conf) & (lift >= min_lift)
+        parts.append(pd.DataFrame({
+            "level": level,
+            "antecedents_str": ant_names[keep],
+            "consequents_str": con_names[keep],
+            "support": support[keep],
+            "confidence": confidence[keep],
+            "lift": lift[keep],
+        }))
+    rules = pd.concat(parts, ignore_index=True)
+    return rules.sort_values(["lift", "confidence"], ascending=False, kind="mergesort")
+
+
+def mine_hierarchical_rules(
+    min_department_support: float = 0.02,
+    min_aisle_support: float = 0.01,
+    min_product_support: float = 0.0005,
+    min_conf: float = 0.1,
+    min_lift: float = 1.0,
+    max_len: int = 3,
+):
+    """
+    Multi-level mining over the department -> aisle -> product taxonomy.
+
+    1. FP-Growth on department and aisle baskets (21 / 134 columns, cheap).
+    2. Product pairs are counted only inside aisle pairs that co-occur in at
+       least min_product_support of the orders (aisle co-occurrence matrix),
+       with a lower support threshold than the flat top-500 mining, so
+       long-tail products are reached without counting every product pair.
+       A product pair's support never exceeds its aisle pair's, so no product
+       pair with support >= min_product_support is missed.
+    3. Cross-level rules between products and aisles.
+
+    Outputs (data/processed/hierarchy/):
+      - department_rules.csv
+      - aisle_rules.csv            (e.g. fresh fruits -> yogurt)
+      - product_rules.csv          (1->1 product rules with their aisles, sorted like
+                                    business_ready_rules.csv)
+      - cross_level_rules.csv      (product -> aisle, aisle -> product)
+      - summary.json               (rule counts, candidate pairs examined vs flat mining)
+    """
+    full_path = os.path.join(DATA_INTERIM, "order_products_full_with_price.csv")
+    if not os.path.exists(full_path):
+        raise FileNotFoundError(f"{full_path} not found. Run run_enrichment.py first.")
+
+    start = time.perf_counter()
+    with profile_stage("read_csv:order_products_full_with_price.csv") as prof:
+        full = pd.read_csv(full_path, usecols=HIERARCHY_COLUMNS)
+        prof.rows_out = len(full)
+    price_map = build_price_map(full)
+
+    order_rows, order_ids = pd.factorize(full["order_id"])
+    product_codes, products = pd.factorize(full["product_name"])
+    aisle_codes, aisles = pd.factorize(full["aisle"])
+    dept_codes, departments = pd.factorize(full["department"])
+    n_orders = len(order_ids)
+    products = np.asarray(products, dtype=object)
+    aisles = np.asarray(aisles, dtype=object)
+    product_aisle = np.zeros(len(products), dtype=np.int64)
+    product_aisle[product_codes] = aisle_codes
+    del full
+
+    with profile_stage("hierarchy:incidence", rows_in=len(order_rows)):
+        dept_incidence = _incidence(order_rows, dept_codes, n_orders, len(departments))
+        aisle_incidence = _incidence(order_rows, aisle_codes, n_orders, len(aisles))
+        product_incidence = _incidence(order_rows, product_codes, n_orders, len(products))
+    print(
+        f"[hierarchical_rules] {n_orders} orders, {len(departments)} departments, "
+        f"{len(aisles)} aisles, {len(products)} products"
+    )
+
+    _, department_rules = mine_level(
+        dept_incidence, departments, "department", min_department_support, min_conf, min_lift, max_len
+    )
+    _, aisle_rules = mine_level(
+        aisle_incidence, aisles, "aisle", min_aisle_support, min_conf, min_lift, max_len
+    )
+    aisle_pairs = _candidate_aisle_pairs(aisle_incidence, min_product_support * n_orders)
+
+    with profile_stage("hierarchy:drill_down", rows_in=len(aisle_pairs)) as prof:
+        (ant, con, support, confidence, lift), item_count, n_frequent, examined = drill_down_products(
+            product_aisle, product_incidence, aisle_pairs, n_orders,
+            min_product_support, min_conf, min_lift,
+        )
+        prices = price_map.reindex(products).fillna(0.0).to_numpy()
+        product_rules = pd.DataFrame({
+            "antecedents_str": products[ant],
+            "consequents_str": products[con],
+            "antecedent_aisle": aisles[product_aisle[ant]],
+            "consequent_aisle": aisles[product_aisle[con]],
+            "antecedent support": item_count[ant] / n_orders,
+            "consequent support": item_count[con] / n_orders,
+            "support": support,
+            "confidence": confidence,
+            "lift": lift,
+            "rule_utility": prices[ant] + prices[con],
+        })
+        product_rules["expected_revenue"] = product_rules["support"] * product_rules["rule_utility"]
+        if not product_rules.empty:
+            similar = [
+                is_similar_name(x, y)
+                for x, y in zip(product_rules["antecedents_str"], product_rules["consequents_str"])
+            ]
+            product_rules = product_rules[~np.asarray(similar, dtype=bool)]
+        product_rules = product_rules.sort_values(RULE_SORT, ascending=False, kind="mergesort")
+        prof.rows_out = len(product_rules)
+
+    with profile_stage("hierarchy:cross_level") as prof:
+        cross_rules = cross_level_rules(
+            products, product_aisle, aisles, product_incidence, aisle_incidence, item_count,
+            n_orders, min_product_support, min_conf, min_lift,
+        )
+        prof.rows_out = len(cross_rules)
+
+    os.makedirs(HIERARCHY_DIR, exist_ok=True)
+    publish_csv(department_rules, os.path.join(HIERARCHY_DIR, "department_rules.csv"))
+    publish_csv(aisle_rules, os.path.join(HIERARCHY_DIR, "aisle_rules.csv"))
+    publish_csv(product_rules, os.path.join(HIERARCHY_DIR, "product_rules.csv"))
+    publish_csv(cross_rules, os.path.join(HIERARCHY_DIR, "cross_level_rules.csv"))
+
+    flat_pairs = n_frequent * (n_frequent - 1) // 2
+    summary = {
+        "orders": n_orders,
+        "min_support": {
+            "department": min_department_support,
+            "aisle": min_aisle_support,
+            "product": min_product_support,
+        },
+        "department_rules": int(department_rules.shape[0]),
+        "aisle_rules": int(aisle_rules.shape[0]),
+        "candidate_aisle_pairs": len(aisle_pairs),
+        "frequent_products": n_frequent,
+        "product_pairs_examined": examined,
+        "product_pairs_flat": flat_pairs,
+        "product_rules": int(product_rules.shape[0]),
+        "cross_level_rules": int(cross_rules.shape[0]),
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+    publish_json(summary, os.path.join(HIERARCHY_DIR, "summary.json"))
+    print(
+        f"[hierarchical_rules] Examined {examined} of {flat_pairs} product pairs "
+        f"({len(aisle_pairs)} candidate aisle pairs)"
+    )
+    print(f"[hierarchical_rules] Rules saved → {HIERARCHY_DIR}")
+    return summary
@@ -0,0 +1,134 @@
+import ast
+from collections import defaultdict
+
+import pandas as pd
+from rule_index import RANK_COLUMNS, normalize_name
+
+TRIE_COLUMNS = [
+    "antecedents",
+    "consequents",
+    "antecedent_len",
+    "consequent_len",
+] + RANK_COLUMNS
+
+
+def parse_itemset(value):
+    """
+    Parse an itemset as written by mlxtend to CSV, e.g.
+    "frozenset({'Banana', 'Organic Avocado'})", into a list of names.
+    """
+    text = str(value).strip()
+    if text.startswith("frozenset(") and text.endswith(")"):
+        text = text[len("frozenset("):-1]
+    if not text:
+        return []
+    return [str(x) for x in ast.literal_eval(text)]
+
+
+class _TrieNode:
+    __slots__ = ("children", "rules")
+
+    def __init__(self):
+        self.children = {}
+        self.rules = []
+
+
+class ItemsetTrie:
+    """
+    Prefix trie over sorted antecedent item ids of k->1 rules (k >= 2).
+
+    Each node whose path spells a full antecedent keeps that antecedent's
+    consequents as pre-sorted (-expected_revenue, -lift, -confidence,
+    consequent) tuples, the same layout as RuleIndex. Finding all rules whose
+    antecedent is a subset of a cart only walks the cart subsets that exist
+    as trie paths.
+    """
+
+    def __init__(self):
+        self.root = _TrieNode()
+        self.item_ids = {}
+        self.n_rules = 0
+
+    def __len__(self):
+        return self.n_rules
+
+    def add(self, antecedent, entry):
+        ids = sorted(
+            self.item_ids.setdefault(normalize_name(x), len(self.item_ids))
+            for x in antecedent
+        )
+        node = self.root
+        for i in ids:
+            node = node.children.setdefault(i, _TrieNode())
+        node.rules.append(entry)
+        self.n_rules += 1
+
+    def match(self, cart_items):
+        """
+        Return the rule lists of every antecedent that is a subset of the cart.
+        """
+        keys = {normalize_name(x) for x in cart_items}
+        ids = sorted(self.item_ids[k] for k in keys if k in self.item_ids)
+        if len(ids) < 2:
+            return []
+
+        found = []
+        stack = [(self.root, 0)]
+        while stack:
+            node, start = stack.pop()
+            for pos in range(start, len(ids)):
+                child = node.children.get(ids[pos])
+                if child is None:
+                    continue
+                if child.rules:
+                    found.append(child.rules)
+                if child.children:
+                    stack.append((child, pos + 1))
+        return found
+
+
+def multi_item_entries(rules: pd.DataFrame) -> dict:
+    """
+    k->1 rules with at least two antecedent items from association_rules_fp_all,
+    grouped as {sorted antecedent tuple: [(-expected_revenue, -lift,
+    -confidence, consequent), ...]}.
+    """
+    multi = rules[(rules["antecedent_len"] >= 2) & (rules["consequent_len"] == 1)]
+
+    by_antecedent = defaultdict(list)
+    for ant, cons, rev, lift, conf in zip(
+        multi["antecedents"],
+        multi["consequents"],
+        multi["expected_revenue"].astype(float),
+        multi["lift"].astype(float),
+        multi["confidence"].astype(float),
+    ):
+        antecedent = tuple(sorted(parse_itemset(ant)))
+        consequent = parse_itemset(cons)[0]
+        by_antecedent[antecedent].append((-rev, -lift, -conf, consequent))
+    return dict(by_antecedent)
+
+
+def build_itemset_trie(rules: pd.DataFrame) -> ItemsetTrie:
+    """
+    Build an ItemsetTrie from association_rules_fp_all rules, keeping
+    k->1 rules with at least two antecedent items.
+    """
+    return itemset_trie_from_entries(multi_item_entries(rules))
+
+
+def itemset_trie_from_entries(by_antecedent) -> ItemsetTrie:
+    """
+    Build an ItemsetTrie from {sorted antecedent tuple: [(-expected_revenue,
+    -lift, -confidence, consequent), ...]}.
+    """
+    trie = ItemsetTrie()
+    for antecedent, entries in by_antecedent.items():
+        for entry in sorted(entries):
+            trie.add(antecedent, entry)
+
+    print(
+        f"[itemset_trie] Indexed {len(trie)} multi-item rules "
+        f"over {len(by_antecedent)} antecedents."
+    )
+    return trie
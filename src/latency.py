@@ -0,0 +1,164 @@
+import bisect
+import os
+import threading
+import time
+
+# Switch with set_latency_enabled() or RECOMMENDER_LATENCY=0 in the environment.
+# When disabled, span() returns a shared no-op object: one flag check per call.
+ENABLED = os.environ.get("RECOMMENDER_LATENCY", "1") != "0"
+
+# Geometric bucket upper bounds from 1 µs to ~100 s (about 8 buckets per decade).
+_BOUNDS = []
+_b = 1e-6
+while _b < 100.0:
+    _BOUNDS.append(_b)
+    _b *= 1.333
+_BOUNDS.append(float("inf"))
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram (seconds). Recording is O(log buckets);
+    quantiles are read from bucket upper bounds.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * len(_BOUNDS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(_BOUNDS, self.counts):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+_histograms = {}
+_lock = threading.Lock()
+
+
+def record(stage: str, seconds: float):
+    """
+    Add one observation for `stage` (no-op when disabled).
+    """
+    if not ENABLED:
+        return
+    with _lock:
+        hist = _histograms.get(stage)
+        if hist is None:
+            hist = _histograms[stage] = LatencyHistogram()
+        hist.observe(seconds)
+
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(stage: str):
+    """
+    Context manager timing one stage:
+
+        with span("recommend.fuzzy_match"):
+            ...
+    """
+    return _Span(stage) if ENABLED else _NOOP
+
+
+def set_latency_enabled(enabled: bool = True):
+    global ENABLED
+    ENABLED = bool(enabled)
+
+
+def reset_latency():
+    with _lock:
+        _histograms.clear()
+
+
+def latency_summary() -> dict:
+    """
+    {stage: {count, mean, p50, p95, p99, max}} in seconds.
+    """
+    with _lock:
+        items = list(_histograms.items())
+        return {
+            stage: {
+                "count": h.count,
+                "mean": h.total / h.count if h.count else 0.0,
+                "p50": h.quantile(0.5),
+                "p95": h.quantile(0.95),
+                "p99": h.quantile(0.99),
+                "max": h.max,
+            }
+            for stage, h in sorted(items)
+        }
+
+
+def latency_prometheus(metric: str = "recommender_stage_latency_seconds") -> str:
+    """
+    Prometheus-style text (summary with p50/p95/p99, _sum and _count per stage).
+    """
+    lines = [f"# TYPE {metric} summary"]
+    with _lock:
+        for stage, h in sorted(_histograms.items()):
+            for q in QUANTILES:
+                lines.append(f'{metric}{{stage="{stage}",quantile="{q}"}} {h.quantile(q):.9f}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {h.total:.9f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {h.count}')
+    return "\n".join(lines) + "\n"
+
+
+def dump_latency():
+    """
+    Print a per-stage latency table (milliseconds).
+    """
+    summary = latency_summary()
+    print(f"[latency] {'stage':<36} {'count':>8} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for stage, s in summary.items():
+        print(
+            f"[latency] {stage:<36} {s['count']:>8} "
+            f"{s['mean'] * 1e3:>9.3f} {s['p50'] * 1e3:>9.3f} "
+            f"{s['p95'] * 1e3:>9.3f} {s['p99'] * 1e3:>9.3f}"
+        )
+    return summary
@@ -0,0 +1,782 @@
+import bisect
+import json
+import os
+import struct
+import time
+import zlib
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from config import DATA_PROCESSED
+from artifacts import read_segments_manifest, segment_dir
+from itemset_trie import TRIE_COLUMNS, multi_item_entries
+from name_index import NameIndex, gram_code
+from popularity import PopularityRankings
+from product_meta import read_product_meta
+from rule_index import RANK_COLUMNS, RuleIndex, normalize_name
+from rule_matrix import RuleMatrix, similar_matrix
+
+MODEL_BUNDLE_FILE = os.path.join(DATA_PROCESSED, "model_bundle.bin")
+BUNDLE_MAGIC = b"RECBNDL\0"
+BUNDLE_FORMAT = 2
+ALIGN = 64
+RULE_COLUMNS = ["antecedents_str", "consequents_str", "support", "confidence", "lift", "expected_revenue"]
+RULE_METRICS = ["support", "confidence", "lift", "expected_revenue"]
+POPULARITY_TOP_N = 100
+POPULARITY_GLOBAL_TOP_N = 1000
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def encode_strings(values):
+    """
+    String table: (offsets int64[n + 1], utf-8 bytes uint8[]).
+    """
+    encoded = [str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def write_bundle(path: str, arrays: dict, meta: dict):
+    """
+    Write arrays into one file that can be memory-mapped:
+
+      8 bytes   magic (RECBNDL\\0)
+      8 bytes   header length (little-endian uint64)
+      header    JSON {"format", "meta", "arrays": {name: {dtype, shape, offset}}}
+      arrays    raw C-order data, each starting at a multiple of 64 bytes
+
+    Written to a temp file and renamed into place, like publish_csv.
+    """
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+
+    data_start = 0
+    while True:  # the header size depends on the offsets it lists
+        entries, offset = {}, data_start
+        for name, a in arrays.items():
+            entries[name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+            offset = _align(offset + a.nbytes)
+        header = json.dumps({"format": BUNDLE_FORMAT, "meta": meta, "arrays": entries}).encode("utf-8")
+        start = _align(16 + len(header))
+        if start == data_start:
+            break
+        data_start = start
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, a in arrays.items():
+            f.write(b"\0" * (entries[name]["offset"] - f.tell()))
+            f.write(a.tobytes())
+        f.write(b"\0" * (_align(f.tell()) - f.tell()))
+    os.replace(tmp_path, path)
+
+
+class SortedIntMap:
+    """
+    Read-only int -> int lookup over a sorted key array (binary search), so a
+    large map can stay in the memory-mapped bundle instead of a dict.
+    """
+
+    def __init__(self, keys: np.ndarray, values: np.ndarray):
+        self.keys = keys
+        self.values = values
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, key, default=None):
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and self.keys[i] == key:
+            return int(self.values[i])
+        return default
+
+
+class StringTable:
+    """
+    Read-only list of strings stored as (offsets, utf-8 bytes) arrays; an
+    item is decoded only when it is accessed.
+    """
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self._offsets = memoryview(offsets)
+        self._data = memoryview(data)
+        self._n = len(offsets) - 1
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, i) -> str:
+        return str(self._data[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self[i]
+
+
+def string_hash(text: str) -> int:
+    """
+    Stable 32-bit hash of a string (the same in every process, unlike hash()).
+    """
+    return zlib.crc32(text.encode("utf-8"))
+
+
+class HashedLookup(Mapping):
+    """
+    Read-only mapping over a StringTable, answered from mapped arrays instead
+    of a dict: the ids sorted by string_hash, so a lookup is one integer
+    binary search plus decoding the candidates to compare them.
+    string -> value(id) of the first id holding it (value=None: the id).
+
+    key: transform applied to the table's strings (e.g. normalize_name); the
+    looked-up strings must already be transformed.
+    """
+
+    def __init__(self, table: StringTable, hashes: np.ndarray, ids: np.ndarray,
+                 value=None, key=None):
+        self.table = table
+        self.hashes = memoryview(hashes)
+        self.ids = memoryview(ids)
+        self.value = value
+        self._string = table.__getitem__ if key is None else (lambda i: key(table[i]))
+
+    def find(self, name: str):
+        """
+        Id of the first string equal to `name`, or None.
+        """
+        h = string_hash(name)
+        pos = bisect.bisect_left(self.hashes, h)
+        while pos < len(self.hashes) and self.hashes[pos] == h:
+            if self._string(self.ids[pos]) == name:
+                return self.ids[pos]
+            pos += 1
+        return None
+
+    def __contains__(self, name) -> bool:
+        return self.find(name) is not None
+
+    def __getitem__(self, name):
+        i = self.find(name)
+        if i is None:
+            raise KeyError(name)
+        return i if self.value is None else self.value(i)
+
+    def get(self, name, default=None):
+        i = self.find(name)
+        if i is None:
+            return default
+        return i if self.value is None else self.value(i)
+
+    def __iter__(self):
+        for i in sorted(self.ids):
+            yield self._string(i)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _slices(offsets: np.ndarray, values: np.ndarray):
+    """
+    CSR row getter: i -> values[offsets[i]:offsets[i + 1]].
+    """
+    offsets = memoryview(offsets)
+    return lambda i: values[offsets[i]:offsets[i + 1]]
+
+
+class _GramPostings:
+    """
+    NameIndex postings (gram -> sorted name ids) over mapped arrays: sorted
+    gram codes (see name_index.gram_code) and the postings as CSR.
+    """
+
+    def __init__(self, codes: np.ndarray, offsets: np.ndarray, ids: np.ndarray):
+        self.codes = memoryview(codes)
+        self.rows = _slices(offsets, ids)
+
+    def get(self, gram: str, default=None):
+        code = gram_code(gram)
+        pos = bisect.bisect_left(self.codes, code)
+        if pos < len(self.codes) and self.codes[pos] == code:
+            return self.rows(pos)
+        return default
+
+
+class _RuleList:
+    """
+    Rules of a mapped rule set as sorted (-expected_revenue, -lift,
+    -confidence, consequent) tuples, the RuleIndex / ItemsetTrie layout,
+    decoded while iterating.
+    """
+
+    __slots__ = ("columns", "ids")
+
+    def __init__(self, columns, ids: np.ndarray):
+        self.columns = columns
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        rev, lift, conf, consequent, names = self.columns
+        ids = self.ids
+        for r, l, c, p in zip(
+            (-rev[ids]).tolist(), (-lift[ids]).tolist(), (-conf[ids]).tolist(),
+            consequent[ids].tolist(),
+        ):
+            yield r, l, c, names[p]
+
+
+class MappedItemsetTrie:
+    """
+    k->1 rules (k >= 2) of a mapped rule set, matched like ItemsetTrie.match:
+    an inverted index normalized item -> antecedent groups holding it, and a
+    group matches when every one of its items is in the cart.
+    """
+
+    def __init__(self, bundle, rule_set: str):
+        prefix = f"{rule_set}/multi"
+        self.group_offsets = bundle.array(f"{prefix}/group_offsets")
+        self.item_offsets = bundle.array(f"{prefix}/item_offsets")
+        self.columns = (
+            bundle.array(f"{prefix}/expected_revenue"),
+            bundle.array(f"{prefix}/lift"),
+            bundle.array(f"{prefix}/confidence"),
+            bundle.array(f"{prefix}/consequent"),
+            bundle.products,
+        )
+        self.item_groups = bundle.lookup(
+            f"{prefix}/item_keys/lookup",
+            bundle.string_table(f"{prefix}/item_keys"),
+            value=_slices(bundle.array(f"{prefix}/item_key_offsets"),
+                          bundle.array(f"{prefix}/item_groups")),
+        )
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def match(self, cart_items):
+        """
+        Return the rule lists of every antecedent that is a subset of the cart.
+        """
+        keys = {normalize_name(x) for x in cart_items}
+        lists = [self.item_groups.get(k) for k in keys]
+        lists = [groups for groups in lists if groups is not None]
+        if len(lists) < 2:
+            return []
+        groups, hits = np.unique(np.concatenate(lists), return_counts=True)
+        sizes = self.item_offsets[groups + 1] - self.item_offsets[groups]
+        return [
+            _RuleList(self.columns, np.arange(self.group_offsets[g], self.group_offsets[g + 1]))
+            for g in groups[hits == sizes].tolist()
+        ]
+
+
+class ModelBundle:
+    """
+    Read-only, memory-mapped view of model_bundle.bin. array() returns views
+    on the mapped file; nothing is parsed up front. The serving indexes
+    (rule_index, itemset_trie, rule_matrix, popularity maps, user_segments)
+    look everything up in the mapped arrays (hashed lookups instead of
+    dicts, see HashedLookup), so worker processes mapping the same
+    file share those pages. Only the top-N popularity lists are copied into
+    each process; rules_frame() / meta_frame() build pandas frames on demand.
+
+    Layout (rule sets are "global" and "segment_<k>"):
+      products/{offsets,bytes}          product dictionary; the first
+                                        meta["meta_products"] are product_meta
+                                        products in popularity order
+      departments/..., aisles/...       category dictionaries
+      meta/{department,aisle}           category codes per meta product
+      meta/{price,popularity}
+      meta/{name_lookup,normalized_lookup}/...
+                                        meta products by name / normalized name
+      popularity/global                 top product ids
+      popularity/{department,aisle}_{offsets,products}
+                                        top product ids per category (CSR)
+      <set>/rules/{antecedent,consequent}
+                                        1->1 rules as product ids, in rank order
+                                        (expected_revenue > lift > confidence,
+                                        then consequent, antecedent)
+      <set>/rules/{support,confidence,lift,expected_revenue}
+      <set>/keys/...                    normalized antecedents (name index)
+      <set>/keys/{rule_offsets,rules}   antecedent index: rule ids per key (CSR)
+      <set>/products/...                product names of the rule set, sorted
+                                        (name index)
+      <set>/multi/{group_offsets,item_offsets,items}
+                                        k->1 rules (k >= 2) grouped by antecedent
+      <set>/multi/{consequent,confidence,lift,expected_revenue}
+      <set>/multi/item_keys/{offsets,bytes,lookup}, <set>/multi/{item_key_offsets,item_groups}
+                                        normalized item -> antecedent groups (CSR)
+      global/matrix/consequent          rule consequents as global/products ids
+      global/matrix/similar_{indptr,indices}
+                                        "too similar" product matrix (CSR)
+      ones                              float64 ones backing the 0/1 matrices
+      users/{user_id,segment}           sorted user_id -> customer segment
+      centroids                         mean customer features per segment
+
+    A name index <p> is <p>/{offsets,bytes} (names) with its lookup
+    <p>/lookup/{hash,ids}, <p>/lowered/... (when the names are not lowercase
+    already), <p>/rank and the trigram postings: sorted gram codes <p>/grams
+    with <p>/postings/{offsets,ids} (see NameIndex.tables). A lookup holds the ids sorted
+    by string_hash (see HashedLookup).
+    """
+
+    def __init__(self, path: str = MODEL_BUNDLE_FILE):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found. Run scripts/run_model_bundle.py first.")
+        self.path = path
+        self._mm = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._mm[:8]) != BUNDLE_MAGIC:
+            raise ValueError(f"{path} is not a model bundle.")
+        (header_len,) = struct.unpack("<Q", bytes(self._mm[8:16]))
+        header = json.loads(bytes(self._mm[16:16 + header_len]).decode("utf-8"))
+        if header["format"] != BUNDLE_FORMAT:
+            raise ValueError(
+                f"{path} has bundle format {header['format']}, expected {BUNDLE_FORMAT}. "
+                f"Rebuild it with scripts/run_model_bundle.py."
+            )
+        self.meta = header["meta"]
+        self._arrays = header["arrays"]
+        self.products = self.string_table("products")
+        self._product_names = None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._arrays
+
+    def array(self, name: str) -> np.ndarray:
+        entry = self._arrays[name]
+        return np.ndarray(
+            tuple(entry["shape"]), dtype=np.dtype(entry["dtype"]),
+            buffer=self._mm, offset=entry["offset"],
+        )
+
+    def string_table(self, name: str) -> StringTable:
+        return StringTable(self.array(f"{name}/offsets"), self.array(f"{name}/bytes"))
+
+    def lookup(self, name: str, table: StringTable, value=None, key=None) -> HashedLookup:
+        """
+        HashedLookup over `table` stored as {name}/hash, {name}/ids.
+        """
+        return HashedLookup(
+            table, self.array(f"{name}/hash"), self.array(f"{name}/ids"), value=value, key=key
+        )
+
+    def strings(self, name: str) -> list:
+        return list(self.string_table(name))
+
+    @property
+    def product_names(self) -> np.ndarray:
+        if self._product_names is None:
+            self._product_names = np.asarray(self.strings("products"), dtype=object)
+        return self._product_names
+
+    def meta_frame(self) -> pd.DataFrame:
+        """
+        product_meta.csv equivalent (index=product_name, popularity order).
+        """
+        n = self.meta["meta_products"]
+        return pd.DataFrame(
+            {
+                "department": pd.Categorical.from_codes(
+                    self.array("meta/department"), categories=self.strings("departments")
+                ),
+                "aisle": pd.Categorical.from_codes(
+                    self.array("meta/aisle"), categories=self.strings("aisles")
+                ),
+                "price": self.array("meta/price"),
+                "popularity": self.array("meta/popularity"),
+                "popularity_rank": np.arange(n, dtype="int64"),
+            },
+            index=pd.Index(self.product_names[:n], name="product_name"),
+        )
+
+    def rules_frame(self, rule_set: str = "global") -> pd.DataFrame:
+        """
+        1->1 rules of a rule set, in rank order, with the business_ready_rules
+        columns the recommender uses.
+        """
+        prefix = f"{rule_set}/rules"
+        names = self.product_names
+        frame = pd.DataFrame({
+            "antecedents_str": names[self.array(f"{prefix}/antecedent")],
+            "consequents_str": names[self.array(f"{prefix}/consequent")],
+        })
+        for column in RULE_METRICS:
+            frame[column] = self.array(f"{prefix}/{column}")
+        return frame
+
+    def name_index(self, prefix: str) -> NameIndex:
+        """
+        NameIndex served from the mapped tables of name index `prefix`.
+        """
+        names = self.string_table(prefix)
+        if f"{prefix}/lowered/offsets" in self:
+            lowered = self.string_table(f"{prefix}/lowered")
+            exact = self.lookup(f"{prefix}/lowered/lookup", lowered)
+        else:
+            lowered, exact = names, self.lookup(f"{prefix}/lookup", names)
+        return NameIndex.from_tables(
+            names,
+            lowered,
+            exact=exact,
+            postings=_GramPostings(
+                self.array(f"{prefix}/grams"),
+                self.array(f"{prefix}/postings/offsets"),
+                self.array(f"{prefix}/postings/ids"),
+            ),
+            rank=self.array(f"{prefix}/rank"),
+        )
+
+    def rule_index(self, rule_set: str = "global") -> RuleIndex:
+        """
+        RuleIndex answered from the mapped antecedent index (1->1 rules).
+        """
+        columns = (
+            self.array(f"{rule_set}/rules/expected_revenue"),
+            self.array(f"{rule_set}/rules/lift"),
+            self.array(f"{rule_set}/rules/confidence"),
+            self.array(f"{rule_set}/rules/consequent"),
+            self.products,
+        )
+        rules_of = _slices(self.array(f"{rule_set}/keys/rule_offsets"),
+                           self.array(f"{rule_set}/keys/rules"))
+        antecedents = self.array(f"{rule_set}/rules/antecedent")
+        keys = self.string_table(f"{rule_set}/keys")
+        return RuleIndex(
+            self.lookup(f"{rule_set}/keys/lookup", keys,
+                        value=lambda k: _RuleList(columns, rules_of(k))),
+            self.lookup(f"{rule_set}/keys/lookup", keys,
+                        value=lambda k: self.products[antecedents[rules_of(k)[0]]]),
+            self.string_table(f"{rule_set}/products"),
+            product_index=self.name_index(f"{rule_set}/products"),
+            antecedent_index=self.name_index(f"{rule_set}/keys"),
+        )
+
+    def itemset_trie(self, rule_set: str = "global") -> MappedItemsetTrie:
+        return MappedItemsetTrie(self, rule_set)
+
+    def rule_matrix(self, rule_set: str = "global") -> RuleMatrix:
+        """
+        RuleMatrix whose sparse matrices point at the mapped arrays.
+        """
+        keys = self.string_table(f"{rule_set}/keys")
+        products = self.string_table(f"{rule_set}/products")
+        consequent = self.array(f"{rule_set}/matrix/consequent")
+        ones = self.array("ones")
+        return RuleMatrix.from_arrays(
+            keys,
+            self.lookup(f"{rule_set}/keys/lookup", keys),
+            products,
+            self.lookup(f"{rule_set}/products/lookup", products),
+            _mapped_csr(
+                self.array(f"{rule_set}/keys/rule_offsets"), self.array(f"{rule_set}/keys/rules"),
+                ones, (len(keys), len(consequent)),
+            ),
+            consequent,
+            self.array(f"{rule_set}/rules/lift"),
+            self.array(f"{rule_set}/rules/confidence"),
+            _mapped_csr(
+                self.array(f"{rule_set}/matrix/similar_indptr"),
+                self.array(f"{rule_set}/matrix/similar_indices"),
+                ones, (len(products), len(products)),
+            ),
+        )
+
+    def popularity(self) -> PopularityRankings:
+        """
+        PopularityRankings with the top-N lists copied out and the
+        product -> department / aisle / catalog maps served from the bundle.
+        """
+        names = self.products
+        pop = self.array("meta/popularity")
+
+        def ranked(ids):
+            return [(-p, names[i]) for p, i in zip(pop[ids].astype(float).tolist(), ids.tolist())]
+
+        def by_category(kind):
+            labels = self.strings(f"{kind}s")
+            products_of = _slices(self.array(f"popularity/{kind}_offsets"),
+                                  self.array(f"popularity/{kind}_products"))
+            return {
+                label: ranked(products_of(k))
+                for k, label in enumerate(labels)
+                if len(products_of(k))
+            }
+
+        def category_of(kind):
+            labels, codes = self.strings(f"{kind}s"), self.array(f"meta/{kind}")
+            return self.lookup("meta/name_lookup", names, value=lambda i: labels[codes[i]])
+
+        return PopularityRankings(
+            ranked(self.array("popularity/global")),
+            by_category("department"),
+            by_category("aisle"),
+            category_of("department"),
+            category_of("aisle"),
+            catalog=self.lookup("meta/normalized_lookup", names,
+                                value=names.__getitem__, key=normalize_name),
+        )
+
+    def user_segments(self) -> SortedIntMap:
+        if "users/user_id" not in self:
+            return SortedIntMap(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32))
+        return SortedIntMap(self.array("users/user_id"), self.array("users/segment"))
+
+    def segment_centroids(self):
+        """
+        Mean customer features per segment (rows: segments), or None.
+        """
+        if "centroids" not in self:
+            return None
+        return pd.DataFrame(
+            self.array("centroids"),
+            index=pd.Index(self.meta["centroid_segments"], name="cluster"),
+            columns=self.meta["centroid_features"],
+        )
+
+
+def _mapped_csr(indptr, indices, ones, shape):
+    """
+    0/1 CSR matrix over mapped (indptr, indices). csr_matrix() would copy
+    views into a larger buffer, so the arrays are attached afterwards.
+    """
+    matrix = sparse.csr_matrix(shape, dtype=np.float64)
+    matrix.indptr, matrix.indices, matrix.data = indptr, indices, ones[:len(indices)]
+    return matrix
+
+
+class _ProductIds:
+    """
+    Product dictionary under construction: name -> id, product_meta
+    products first.
+    """
+
+    def __init__(self, names):
+        self.names = [str(n) for n in names]
+        self.ids = {n: i for i, n in enumerate(self.names)}
+
+    def encode(self, values) -> np.ndarray:
+        out = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            value = str(value)
+            j = self.ids.get(value)
+            if j is None:
+                j = self.ids[value] = len(self.names)
+                self.names.append(value)
+            out[i] = j
+        return out
+
+
+def _category_lists(codes, order, n_categories, top_n):
+    """
+    CSR (offsets, product ids) of the top_n products per category.
+    """
+    ranked_codes = codes[order]
+    parts = [order[ranked_codes == k][:top_n] for k in range(n_categories)]
+    offsets = np.zeros(n_categories + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in parts])
+    products = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+    return offsets, products.astype(np.int32)
+
+
+def _lookup_arrays(name: str, strings, arrays: dict, ids=None):
+    """
+    Store a HashedLookup over `strings` (only the positions `ids`, default
+    all) as {name}/hash, {name}/ids.
+    """
+    ids = np.arange(len(strings)) if ids is None else np.asarray(ids)
+    hashes = np.fromiter((string_hash(strings[i]) for i in ids), dtype=np.uint32, count=len(ids))
+    order = np.lexsort((ids, hashes))
+    arrays[f"{name}/hash"] = hashes[order]
+    arrays[f"{name}/ids"] = ids[order].astype(np.int32)
+
+
+def _name_index_arrays(prefix: str, names, arrays: dict) -> NameIndex:
+    """
+    Store the tables of a NameIndex over `names` under `prefix` (layout: see
+    ModelBundle) and return the index.
+    """
+    index = NameIndex(names)
+    tables = index.tables()
+    arrays[f"{prefix}/offsets"], arrays[f"{prefix}/bytes"] = encode_strings(index.names)
+    _lookup_arrays(f"{prefix}/lookup", index.names, arrays)
+    if index.lowered != index.names:
+        arrays[f"{prefix}/lowered/offsets"], arrays[f"{prefix}/lowered/bytes"] = encode_strings(index.lowered)
+        _lookup_arrays(f"{prefix}/lowered/lookup", index.lowered, arrays)
+    arrays[f"{prefix}/rank"] = tables["rank"]
+    arrays[f"{prefix}/grams"] = tables["gram_codes"]
+    arrays[f"{prefix}/postings/offsets"] = tables["posting_offsets"]
+    arrays[f"{prefix}/postings/ids"] = tables["posting_ids"].astype(np.int32)
+    return index
+
+
+def _csr(codes: np.ndarray, n_rows: int, dtype=np.int64):
+    """
+    (offsets, ids) grouping ids 0..len(codes)-1 by row code, ids ascending.
+    """
+    ids = np.argsort(codes, kind="stable")
+    offsets = np.zeros(n_rows + 1, dtype=dtype)
+    offsets[1:] = np.cumsum(np.bincount(codes, minlength=n_rows))
+    return offsets, ids.astype(np.int32)
+
+
+def _rule_set_arrays(name, folder, products: _ProductIds, arrays: dict, with_matrix: bool = False) -> int:
+    """
+    Store one rule set; returns the number of ones its 0/1 matrices need.
+    """
+    from snapshot import ALL_RULES_FILE, BUSINESS_RULES_FILE
+
+    rules = pd.read_csv(os.path.join(folder, BUSINESS_RULES_FILE), usecols=RULE_COLUMNS)
+    rules["antecedents_str"] = rules["antecedents_str"].astype(str)
+    rules["consequents_str"] = rules["consequents_str"].astype(str)
+    rules["key"] = rules["antecedents_str"].map(normalize_name)
+    # the order RuleIndex entries and RuleMatrix rules sort in:
+    # (-expected_revenue, -lift, -confidence, consequent), then antecedent key
+    rules = rules.sort_values(
+        by=RANK_COLUMNS + ["consequents_str", "key"],
+        ascending=[False] * len(RANK_COLUMNS) + [True, True],
+        kind="mergesort",
+    )
+    prefix = f"{name}/rules"
+    arrays[f"{prefix}/antecedent"] = products.encode(rules["antecedents_str"].tolist())
+    arrays[f"{prefix}/consequent"] = products.encode(rules["consequents_str"].tolist())
+    for column in RULE_METRICS:
+        arrays[f"{prefix}/{column}"] = rules[column].to_numpy(dtype=np.float64)
+
+    key_codes, keys = pd.factorize(rules["key"], sort=True)
+    _name_index_arrays(f"{name}/keys", list(keys), arrays)
+    # int32 offsets like the rule ids: both back the RuleMatrix CSR as they are
+    arrays[f"{name}/keys/rule_offsets"], arrays[f"{name}/keys/rules"] = _csr(
+        key_codes, len(keys), dtype=np.int32
+    )
+
+    rule_products = sorted(set(rules["antecedents_str"]) | set(rules["consequents_str"]))
+    product_index = _name_index_arrays(f"{name}/products", rule_products, arrays)
+    ones = rules.shape[0]
+    if with_matrix:
+        product_ids = {p: i for i, p in enumerate(rule_products)}
+        similar = similar_matrix(rule_products, product_ids, product_index)
+        arrays[f"{name}/matrix/consequent"] = np.asarray(
+            [product_ids[c] for c in rules["consequents_str"]], dtype=np.int32
+        )
+        arrays[f"{name}/matrix/similar_indptr"] = similar.indptr.astype(np.int32)
+        arrays[f"{name}/matrix/similar_indices"] = similar.indices.astype(np.int32)
+        ones = max(ones, similar.nnz)
+
+    all_rules_path = os.path.join(folder, ALL_RULES_FILE)
+    entries = {}
+    if os.path.exists(all_rules_path):
+        entries = multi_item_entries(pd.read_csv(all_rules_path, usecols=TRIE_COLUMNS))
+    group_offsets, item_offsets, items, flat = [0], [0], [], []
+    item_keys, item_groups = [], []
+    for group, (antecedent, group_entries) in enumerate(entries.items()):
+        flat.extend(sorted(group_entries))
+        group_offsets.append(len(flat))
+        items.extend(antecedent)
+        item_offsets.append(len(items))
+        for key in dict.fromkeys(normalize_name(x) for x in antecedent):
+            item_keys.append(key)
+            item_groups.append(group)
+    prefix = f"{name}/multi"
+    arrays[f"{prefix}/group_offsets"] = np.asarray(group_offsets, dtype=np.int64)
+    arrays[f"{prefix}/item_offsets"] = np.asarray(item_offsets, dtype=np.int64)
+    arrays[f"{prefix}/items"] = products.encode(items)
+    arrays[f"{prefix}/consequent"] = products.encode([e[3] for e in flat])
+    arrays[f"{prefix}/expected_revenue"] = np.asarray([-e[0] for e in flat], dtype=np.float64)
+    arrays[f"{prefix}/lift"] = np.asarray([-e[1] for e in flat], dtype=np.float64)
+    arrays[f"{prefix}/confidence"] = np.asarray([-e[2] for e in flat], dtype=np.float64)
+    key_codes, distinct_keys = pd.factorize(pd.Series(item_keys, dtype=object), sort=True)
+    arrays[f"{prefix}/item_keys/offsets"], arrays[f"{prefix}/item_keys/bytes"] = encode_strings(distinct_keys)
+    _lookup_arrays(f"{prefix}/item_keys/lookup", list(distinct_keys), arrays)
+    offsets, order = _csr(key_codes, len(distinct_keys))
+    arrays[f"{prefix}/item_key_offsets"] = offsets
+    arrays[f"{prefix}/item_groups"] = np.asarray(item_groups, dtype=np.int32)[order]
+    print(f"[model_bundle] {name}: {rules.shape[0]} 1->1 rules, {len(flat)} multi-item rules")
+    return ones
+
+
+def build_model_bundle(
+    out_path: str = MODEL_BUNDLE_FILE,
+    top_n: int = POPULARITY_TOP_N,
+    global_top_n: int = POPULARITY_GLOBAL_TOP_N,
+):
+    """
+    Pack everything the recommender serves into one versioned binary file
+    (layout: see ModelBundle): product dictionary and meta, global and
+    per-segment rules with their antecedent and name indexes, multi-item
+    rules with their item index, the batch scoring matrices, popularity
+    rankings, user -> segment map and segment centroids.
+
+    Inputs: business_ready_rules.csv, association_rules_fp_all.csv (optional),
+    product_meta.csv, segments/ (optional), customer_segments.csv (optional).
+
+    Output:
+      data/processed/model_bundle.bin
+    """
+    from snapshot import CUSTOMER_SEGMENTS_FILE, published_csv_version
+
+    start = time.perf_counter()
+    source_version = published_csv_version()
+    meta = read_product_meta()
+    products = _ProductIds(meta.index)
+    n_meta = len(products.names)
+    arrays = {}
+
+    manifest = read_segments_manifest()
+    segments = [int(e["segment"]) for e in manifest["segments"]] if manifest else []
+    ones = _rule_set_arrays("global", DATA_PROCESSED, products, arrays, with_matrix=True)
+    for segment in segments:
+        ones = max(ones, _rule_set_arrays(f"segment_{segment}", segment_dir(segment), products, arrays))
+    arrays["ones"] = np.ones(ones, dtype=np.float64)
+
+    dept_codes, departments = pd.factorize(meta["department"].astype(str))
+    aisle_codes, aisles = pd.factorize(meta["aisle"].astype(str))
+    popularity = meta["popularity"].to_numpy(dtype=np.int64)
+    order = np.argsort(-popularity, kind="stable")
+    arrays["meta/department"] = dept_codes.astype(np.int16)
+    arrays["meta/aisle"] = aisle_codes.astype(np.int16)
+    arrays["meta/price"] = meta["price"].to_numpy(dtype=np.float64)
+    arrays["meta/popularity"] = popularity
+    _lookup_arrays("meta/name_lookup", products.names[:n_meta], arrays)
+    _lookup_arrays("meta/normalized_lookup", [normalize_name(n) for n in products.names[:n_meta]], arrays)
+    arrays["popularity/global"] = order[:global_top_n].astype(np.int32)
+    (arrays["popularity/department_offsets"],
+     arrays["popularity/department_products"]) = _category_lists(dept_codes, order, len(departments), top_n)
+    (arrays["popularity/aisle_offsets"],
+     arrays["popularity/aisle_products"]) = _category_lists(aisle_codes, order, len(aisles), top_n)
+
+    for name, values in (("products", products.names), ("departments", departments), ("aisles", aisles)):
+        arrays[f"{name}/offsets"], arrays[f"{name}/bytes"] = encode_strings(values)
+
+    bundle_meta = {
+        "source_version": source_version,
+        "created_at": time.time(),
+        "meta_products": n_meta,
+        "segments": segments,
+        "popularity_top_n": top_n,
+    }
+    seg_path = os.path.join(DATA_PROCESSED, CUSTOMER_SEGMENTS_FILE)
+    if os.path.exists(seg_path):
+        seg_df = pd.read_csv(seg_path).sort_values("user_id")
+        arrays["users/user_id"] = seg_df["user_id"].to_numpy(dtype=np.int64)
+        arrays["users/segment"] = seg_df["cluster"].to_numpy(dtype=np.int32)
+        centroids = seg_df.drop(columns=["user_id"]).groupby("cluster").mean()
+        arrays["centroids"] = centroids.to_numpy(dtype=np.float64)
+        bundle_meta["centroid_segments"] = [int(c) for c in centroids.index]
+        bundle_meta["centroid_features"] = [str(c) for c in centroids.columns]
+
+    write_bundle(out_path, arrays, bundle_meta)
+    size_mb = os.path.getsize(out_path) / (1024 * 1024)
+    print(
+        f"[model_bundle] {len(arrays)} arrays, {size_mb:.1f} MB, "
+        f"built in {time.perf_counter() - start:.1f}s → {out_path}"
+    )
+    return bundle_meta
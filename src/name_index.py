@@ -0,0 +1,163 @@
+from collections import defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+import numpy as np
+
+
+def _trigrams(text: str):
+    """
+    Character trigrams of a lowercased name, padded so that short names
+    and word boundaries still produce grams.
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def gram_code(gram: str) -> int:
+    """
+    A trigram packed into one integer (21 bits per code point), used to
+    look grams up in prebuilt postings without comparing strings.
+    """
+    return (ord(gram[0]) << 42) | (ord(gram[1]) << 21) | ord(gram[2])
+
+
+class NameIndex:
+    """
+    Prebuilt product-name index used for name resolution.
+
+    - Trigram inverted index: gram -> sorted ids of names containing it.
+      Fuzzy lookups only score the few names sharing the most grams with
+      the query instead of running difflib over the whole catalog.
+    - The same postings answer substring queries: a name can only contain
+      the query if it contains all of the query's inner trigrams, so we
+      intersect those postings and verify the survivors.
+    - Resolved user strings are kept in an LRU cache.
+
+    The lookup tables can also be prebuilt arrays (see from_tables), e.g.
+    memory-mapped from the model bundle.
+    """
+
+    def __init__(self, names, shortlist: int = 25, cache_size: int = 4096):
+        names = list(dict.fromkeys(str(n) for n in names))
+        lowered = [n.lower() for n in names]
+
+        exact = {}
+        for i, low in enumerate(lowered):
+            exact.setdefault(low, i)
+
+        postings = defaultdict(list)
+        for i, low in enumerate(lowered):
+            for gram in _trigrams(low):
+                postings[gram].append(i)
+        postings = {g: np.asarray(ids, dtype=np.int32) for g, ids in postings.items()}
+
+        order = sorted(range(len(names)), key=lowered.__getitem__)
+        rank = np.empty(len(names), dtype=np.int32)
+        rank[order] = np.arange(len(names), dtype=np.int32)
+        self._set_up(names, lowered, exact, postings, rank, shortlist, cache_size)
+
+    @classmethod
+    def from_tables(cls, names, lowered, exact, postings, rank,
+                    shortlist: int = 25, cache_size: int = 4096):
+        """
+        NameIndex over prebuilt tables:
+          names, lowered: sequences of the (distinct) names and their lowercase
+          exact:          lowercase name -> id of its first name (.get)
+          postings:       trigram -> sorted array of name ids (.get)
+          rank:           position of each name in lowercase-name order
+        """
+        index = cls.__new__(cls)
+        index._set_up(names, lowered, exact, postings, rank, shortlist, cache_size)
+        return index
+
+    def _set_up(self, names, lowered, exact, postings, rank, shortlist, cache_size):
+        self.names = names
+        self.lowered = lowered
+        self.shortlist = shortlist
+        self._exact = exact
+        self._postings = postings
+        self._rank = rank
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def __len__(self):
+        return len(self.names)
+
+    def tables(self) -> dict:
+        """
+        The lookup tables as flat arrays (for the model bundle): gram_codes
+        (sorted gram_code of every gram) with their postings as CSR
+        (posting_offsets, posting_ids) and rank.
+        """
+        grams = sorted(self._postings, key=gram_code)
+        lists = [self._postings[g] for g in grams]
+        offsets = np.zeros(len(grams) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(ids) for ids in lists])
+        return {
+            "gram_codes": np.asarray([gram_code(g) for g in grams], dtype=np.int64),
+            "posting_offsets": offsets,
+            "posting_ids": np.concatenate(lists) if lists else np.empty(0, dtype=np.int32),
+            "rank": np.asarray(self._rank, dtype=np.int32),
+        }
+
+    def _resolve(self, query: str, cutoff: float = 0.6):
+        """
+        Return the closest name (case-insensitive), or None if nothing
+        scores at least `cutoff` (same ratio as difflib.get_close_matches).
+
+        Ties are broken on the lowercased name, never on hash order: the
+        shortlist takes the names sharing the most trigrams (then by name),
+        and the winner is the highest (score, name), like
+        get_close_matches(query, names, n=1).
+        """
+        q = str(query).strip().lower()
+        if not q:
+            return None
+        i = self._exact.get(q)
+        if i is not None:
+            return self.names[i]
+
+        lists = [self._postings.get(gram) for gram in _trigrams(q)]
+        lists = [ids for ids in lists if ids is not None]
+        if not lists:
+            return None
+        ids, overlap = np.unique(np.concatenate(lists), return_counts=True)
+        shortlist = ids[np.lexsort((self._rank[ids], -overlap))[:self.shortlist]]
+
+        matcher = SequenceMatcher()
+        matcher.set_seq2(q)
+        best, best_key = None, (cutoff, "")
+        for i in shortlist.tolist():
+            matcher.set_seq1(self.lowered[i])
+            if (
+                matcher.real_quick_ratio() >= best_key[0] and
+                matcher.quick_ratio() >= best_key[0]
+            ):
+                key = (matcher.ratio(), self.lowered[i])
+                if key[0] >= cutoff and (best is None or key > best_key):
+                    best, best_key = i, key
+        return self.names[best] if best is not None else None
+
+    def containing(self, query: str):
+        """
+        All names containing `query` as a (case-insensitive) substring.
+        """
+        q = str(query).strip().lower()
+        if not q:
+            return []
+        inner = {q[i:i + 3] for i in range(len(q) - 2)}
+        if not inner:
+            # 1-2 character queries: nothing to intersect, scan.
+            return [self.names[i] for i, low in enumerate(self.lowered) if q in low]
+
+        # intersect postings only until few candidates are left: checking
+        # those directly is cheaper than looking up the remaining grams
+        ids = None
+        for gram in inner:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return []
+            ids = posting if ids is None else np.intersect1d(ids, posting, assume_unique=True)
+            if len(ids) <= 32:
+                break
+        return [self.names[i] for i in ids.tolist() if q in self.lowered[i]]
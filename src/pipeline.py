@@ -0,0 +1,331 @@
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from config import DATA_RAW, DATA_INTERIM, DATA_PROCESSED
+from artifacts import SEGMENTS_MANIFEST, publish_json
+from profiling import profile_records, profile_stage, reset_profile, write_profile_report
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(os.path.dirname(SRC_DIR), "scripts")
+PIPELINE_STATE = os.path.join(DATA_PROCESSED, "pipeline_state.json")
+
+
+def _raw(name):
+    return os.path.join(DATA_RAW, name)
+
+
+def _interim(name):
+    return os.path.join(DATA_INTERIM, name)
+
+
+def _processed(name):
+    return os.path.join(DATA_PROCESSED, name)
+
+
+class Stage:
+    """
+    One pipeline step: `target` is "module:function" (a module in src/, or a
+    .py path for scripts such as generate_synthetic_prices.py), called with
+    `params`. It reads `inputs` and writes `outputs` (file paths).
+
+    A stage depends on every stage that produces one of its inputs.
+    """
+
+    def __init__(self, name, target, inputs, outputs, params=None):
+        self.name = name
+        self.target = target
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = dict(params or {})
+
+
+FULL = _interim("order_products_full.csv")
+FULL_PRICE = _interim("order_products_full_with_price.csv")
+PRICES = _raw("products_with_prices_synthetic.csv")
+BUSINESS_RULES = _processed("business_ready_rules.csv")
+SEGMENTS = _processed("customer_segments.csv")
+STREAM_STATS = os.path.join(DATA_PROCESSED, "sketches", "stream_stats.npz")
+MODEL_BUNDLE = _processed("model_bundle.bin")
+
+STAGES = [
+    Stage(
+        "prices",
+        os.path.join(SCRIPTS_DIR, "generate_synthetic_prices.py") + ":generate_synthetic_prices",
+        [_raw("products.csv"), _raw("aisles.csv"), _raw("departments.csv"),
+         _raw("order_products__prior.csv")],
+        [PRICES],
+    ),
+    Stage(
+        "merge",
+        "data_loading:build_full_order_products",
+        [_raw("orders.csv"), _raw("order_products__prior.csv"), _raw("products.csv"),
+         _raw("aisles.csv"), _raw("departments.csv")],
+        [FULL],
+    ),
+    Stage("attach_prices", "pricing:attach_prices", [FULL, PRICES], [FULL_PRICE]),
+    Stage("product_meta", "product_meta:build_product_meta", [FULL_PRICE],
+          [_processed("product_meta.csv")]),
+    Stage(
+        "association_rules",
+        "association_rules:mine_fp_growth_with_utility",
+        [FULL_PRICE, STREAM_STATS],
+        [_processed("association_rules_fp_all.csv"), BUSINESS_RULES,
+         _processed("top_rules_per_item.csv")],
+        {"top_n_products": 500, "min_support": 0.002, "min_conf": 0.1, "min_lift": 1.0,
+         "use_sketch": True},
+    ),
+    Stage(
+        "windowed_rules",
+        "windowed_rules:mine_windowed_rules",
+        [FULL_PRICE],
+        [_processed("windowed_rules.csv")],
+        {"top_n_products": 500, "bucket_days": 30, "window_buckets": 6, "half_life_buckets": 2.0,
+         "min_support": 0.002, "min_conf": 0.1, "min_lift": 1.0},
+    ),
+    Stage(
+        "hierarchical_rules",
+        "hierarchical_rules:mine_hierarchical_rules",
+        [FULL_PRICE],
+        [os.path.join(DATA_PROCESSED, "hierarchy", "summary.json")],
+        {"min_department_support": 0.02, "min_aisle_support": 0.01,
+         "min_product_support": 0.0005, "min_conf": 0.1, "min_lift": 1.0},
+    ),
+    Stage("clustering", "clustering:cluster_customers", [FULL_PRICE], [SEGMENTS],
+          {"n_clusters": 4, "use_price": True}),
+    Stage(
+        "segment_rules",
+        "segment_rules:mine_segment_rules",
+        [SEGMENTS, FULL_PRICE],
+        [SEGMENTS_MANIFEST],
+        {"top_n_products": 500, "min_support": 0.002, "min_conf": 0.1, "min_lift": 1.0},
+    ),
+    Stage(
+        "model_bundle",
+        "model_bundle:build_model_bundle",
+        [BUSINESS_RULES, _processed("association_rules_fp_all.csv"), _processed("product_meta.csv"),
+         SEGMENTS_MANIFEST, SEGMENTS],
+        [MODEL_BUNDLE],
+    ),
+    Stage("sketches", "sketches:build_stream_stats", [FULL_PRICE, SEGMENTS], [STREAM_STATS]),
+    Stage(
+        "dashboard_aggregates",
+        "dashboard_aggregates:build_dashboard_aggregates",
+        [SEGMENTS, BUSINESS_RULES, STREAM_STATS],
+        [os.path.join(DATA_PROCESSED, "dashboard", "kpis.json")],
+    ),
+    Stage("scenarios", "scenarios:build_scenario_rankings", [BUSINESS_RULES],
+          [_processed("scenario_rankings.csv")]),
+    Stage("apriori_comparison", "apriori_comparison:run_apriori_comparison", [FULL_PRICE],
+          [_processed("apriori_rules_sample.csv")], {"min_support": 0.01, "min_conf": 0.2}),
+    Stage("eclat_demo", "eclat_demo:run_eclat_demo", [FULL_PRICE],
+          [_processed("eclat_itemsets_demo.csv")],
+          {"top_n_products": 100, "min_support": 0.01, "sample_size": 10000}),
+]
+
+
+def _resolve(target: str):
+    module_name, func_name = target.rsplit(":", 1)
+    if module_name.endswith(".py"):
+        spec = importlib.util.spec_from_file_location(
+            os.path.splitext(os.path.basename(module_name))[0], module_name
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(module_name)
+    return getattr(module, func_name)
+
+
+def _run_stage(name: str, target: str, params: dict):
+    """
+    Worker: run one stage in its own process. The stage's return value
+    (often large DataFrames) stays in the worker; only the runtime and the
+    stage's profile records are sent back.
+    """
+    reset_profile()
+    start = time.perf_counter()
+    with profile_stage(name):
+        _resolve(target)(**params)
+    return time.perf_counter() - start, profile_records()
+
+
+def file_hash(path: str, hash_cache: dict) -> str:
+    """
+    sha256 of a file's content. Hashes are cached by (size, mtime), so an
+    unchanged multi-GB CSV is only read once.
+    """
+    stat = os.stat(path)
+    signature = [stat.st_size, stat.st_mtime_ns]
+    cached = hash_cache.get(path)
+    if cached and cached["signature"] == signature:
+        return cached["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    hash_cache[path] = {"signature": signature, "sha256": digest.hexdigest()}
+    return hash_cache[path]["sha256"]
+
+
+def stage_fingerprint(stage: Stage, hash_cache: dict) -> str:
+    """
+    Hash of the stage definition (target + params) and its inputs' content.
+    """
+    payload = {
+        "target": os.path.basename(stage.target),
+        "params": stage.params,
+        "inputs": {os.path.basename(p): file_hash(p, hash_cache) for p in stage.inputs},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _dependencies(stages):
+    producers = {out: s.name for s in stages for out in s.outputs}
+    return {
+        s.name: {producers[p] for p in s.inputs if p in producers and producers[p] != s.name}
+        for s in stages
+    }
+
+
+def _with_upstream(names, deps):
+    selected, stack = set(), list(names)
+    while stack:
+        name = stack.pop()
+        if name not in selected:
+            selected.add(name)
+            stack.extend(deps[name])
+    return selected
+
+
+def _load_state():
+    if not os.path.exists(PIPELINE_STATE):
+        return {"stages": {}, "hashes": {}}
+    with open(PIPELINE_STATE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_pipeline(targets=None, force=(), max_workers: int = 2, dry_run: bool = False, stages=None):
+    """
+    Run the pipeline as a DAG.
+
+    - dependencies come from inputs/outputs (a stage waits for the stages
+      producing its inputs)
+    - a stage is skipped when its fingerprint (target, params, input file
+      hashes) matches the last successful run and its outputs exist
+    - independent stages run concurrently in worker processes (max_workers;
+      each stage may load the full order table, so keep it small on laptops)
+    - `targets` limits the run to those stages and their upstream stages;
+      `force` reruns the named stages regardless of the cache
+    - if a stage fails, its downstream stages are not run
+
+    State (fingerprints, cached file hashes):
+      data/processed/pipeline_state.json
+    Profile of the stages that ran (wall/CPU time, peak RSS, rows per step):
+      data/processed/profiles/profile_pipeline_<timestamp>.{json,html}
+    """
+    stages = {s.name: s for s in (stages or STAGES)}
+    force = set(force)
+    unknown = (set(targets or ()) | force) - set(stages)
+    if unknown:
+        raise ValueError(f"Unknown stages: {sorted(unknown)}. Known: {list(stages)}")
+    deps = _dependencies(stages.values())
+    selected = _with_upstream(targets, deps) if targets else set(stages)
+
+    state = _load_state()
+    hash_cache = state["hashes"]
+    pending = [name for name in stages if name in selected]
+    status = {}
+    fingerprints = {}
+    running = {}
+    profile = []
+    start = time.perf_counter()
+
+    def save_state():
+        if not dry_run:
+            publish_json(state, PIPELINE_STATE)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            progressed = False
+            for name in list(pending):
+                stage_deps = deps[name] & selected
+                if any(status.get(d) in ("failed", "blocked") for d in stage_deps):
+                    status[name] = "blocked"
+                    pending.remove(name)
+                    print(f"[pipeline] {name}: blocked (upstream failed)")
+                    progressed = True
+                    continue
+                if not all(status.get(d) in ("done", "skipped", "would_run") for d in stage_deps):
+                    continue
+
+                stage = stages[name]
+                pending.remove(name)
+                progressed = True
+                missing = [p for p in stage.inputs if not os.path.exists(p)]
+                if missing and not dry_run:
+                    status[name] = "failed"
+                    print(f"[pipeline] {name}: missing inputs {missing}")
+                    continue
+
+                upstream_ran = any(status.get(d) in ("done", "would_run") for d in stage_deps)
+                if dry_run and (missing or upstream_ran):
+                    status[name] = "would_run"
+                    print(f"[pipeline] {name}: would run")
+                    continue
+
+                fingerprints[name] = stage_fingerprint(stage, hash_cache)
+                last = state["stages"].get(name, {})
+                up_to_date = (
+                    name not in force
+                    and last.get("fingerprint") == fingerprints[name]
+                    and all(os.path.exists(p) for p in stage.outputs)
+                )
+                if up_to_date:
+                    status[name] = "skipped"
+                    print(f"[pipeline] {name}: up to date, skipped")
+                elif dry_run:
+                    status[name] = "would_run"
+                    print(f"[pipeline] {name}: would run")
+                else:
+                    print(f"[pipeline] {name}: started")
+                    running[pool.submit(_run_stage, name, stage.target, stage.params)] = name
+
+            if not running:
+                if not progressed and pending:
+                    raise RuntimeError(f"Pipeline cannot progress: {pending}")
+                continue
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    seconds, records = future.result()
+                except Exception as exc:
+                    status[name] = "failed"
+                    print(f"[pipeline] {name}: FAILED ({type(exc).__name__}: {exc})")
+                    continue
+                status[name] = "done"
+                profile.extend(records)
+                state["stages"][name] = {
+                    "fingerprint": fingerprints[name],
+                    "seconds": round(seconds, 2),
+                    "finished_at": time.time(),
+                }
+                save_state()
+                print(f"[pipeline] {name}: done in {seconds:.1f}s")
+
+    save_state()
+    if profile:
+        write_profile_report("pipeline", records=profile)
+    wall = time.perf_counter() - start
+    print(f"[pipeline] Finished in {wall:.1f}s: {status}")
+    failed = [n for n, s in status.items() if s in ("failed", "blocked")]
+    if failed:
+        raise RuntimeError(f"Pipeline stages failed or blocked: {failed}")
+    return status
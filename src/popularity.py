@@ -0,0 +1,99 @@
+import heapq
+from collections import defaultdict
+
+import pandas as pd
+from rule_index import normalize_name
+
+
+class PopularityRankings:
+    """
+    Popularity lists precomputed once from product meta, for the
+    recommender's fallbacks.
+
+    - global_top:    the top products overall
+    - by_department: department -> its top products
+    - by_aisle:      aisle -> its top products
+    - product_department / product_aisle: product_name -> department / aisle
+    - catalog: normalized name -> product_name, for exact lookups over the
+      whole catalog (not only products that appear in rules)
+
+    Every list holds (-popularity, product_name) tuples, already sorted, so
+    several of them can be combined with a k-way merge.
+    """
+
+    def __init__(self, global_top, by_department, by_aisle, product_department, product_aisle,
+                 catalog=None):
+        self.global_top = global_top
+        self.by_department = by_department
+        self.by_aisle = by_aisle
+        self.product_department = product_department
+        self.product_aisle = product_aisle
+        if catalog is None:
+            catalog = {}
+            for p in product_department:
+                catalog.setdefault(normalize_name(p), p)
+        self.catalog = catalog
+
+    def exact(self, name):
+        """
+        The catalog product named `name` (case/whitespace-insensitive), or None.
+        """
+        return self.catalog.get(normalize_name(name))
+
+    def iter_global(self):
+        for _, p in self.global_top:
+            yield p
+
+    def iter_departments(self, departments):
+        """
+        Popular products from any of `departments`, most popular first.
+        """
+        lists = [self.by_department[d] for d in departments if d in self.by_department]
+        for _, p in heapq.merge(*lists):
+            yield p
+
+    def iter_aisles(self, aisles):
+        """
+        Popular products from any of `aisles`, most popular first.
+        """
+        lists = [self.by_aisle[a] for a in aisles if a in self.by_aisle]
+        for _, p in heapq.merge(*lists):
+            yield p
+
+
+def build_popularity_rankings(meta: pd.DataFrame, top_n: int = 100, global_top_n: int = 1000):
+    """
+    Build PopularityRankings from product meta (index=product_name, with
+    department, aisle and popularity columns).
+
+    top_n: products kept per department / aisle.
+    global_top_n: products kept in the global list.
+    """
+    ordered = meta.sort_values("popularity", ascending=False, kind="mergesort")
+
+    names = ordered.index.astype(str).tolist()
+    pops = ordered["popularity"].astype(float).tolist()
+    depts = ordered["department"].astype(str).tolist()
+    aisles = ordered["aisle"].astype(str).tolist()
+
+    global_top = [(-pop, p) for p, pop in zip(names[:global_top_n], pops[:global_top_n])]
+
+    by_department = defaultdict(list)
+    by_aisle = defaultdict(list)
+    for p, pop, d, a in zip(names, pops, depts, aisles):
+        if len(by_department[d]) < top_n:
+            by_department[d].append((-pop, p))
+        if len(by_aisle[a]) < top_n:
+            by_aisle[a].append((-pop, p))
+
+    print(
+        f"[popularity] Rankings: {len(global_top)} global, "
+        f"{len(by_department)} departments, {len(by_aisle)} aisles (top {top_n})."
+    )
+    return PopularityRankings(
+        global_top,
+        dict(by_department),
+        dict(by_aisle),
+        dict(zip(names, depts)),
+        dict(zip(names, aisles)),
+    )
@@ -1,6 +1,7 @@
 import os
 import pandas as pd
 from config import DATA_RAW, DATA_INTERIM
+from profiling import profile_stage
 
 
 def attach_prices():
@@ -24,16 +25,21 @@ def attach_prices():
         )
 
     print("[pricing] Loading merged orders...")
-    full = pd.read_csv(full_path)
+    with profile_stage("read_csv:order_products_full.csv") as prof:
+        full = pd.read_csv(full_path)
+        prof.rows_out = len(full)
 
     print("[pricing] Loading synthetic prices...")
     prod_price = pd.read_csv(products_price_path)[["product_id", "price"]]
 
     print("[pricing] Merging prices into full table...")
-    full_price = full.merge(prod_price, on="product_id", how="left")
+    with profile_stage("attach_prices", rows_in=len(full)) as prof:
+        full_price = full.merge(prod_price, on="product_id", how="left")
+        prof.rows_out = len(full_price)
 
     out_path = os.path.join(DATA_INTERIM, "order_products_full_with_price.csv")
-    full_price.to_csv(out_path, index=False)
+    with profile_stage("write_csv:order_products_full_with_price.csv", rows_in=len(full_price)):
+        full_price.to_csv(out_path, index=False)
     print(f"[pricing] Saved order_products_full_with_price → {out_path}")
     print("[pricing] Shape:", full_price.shape)
     return full_price
\ No newline at end of file
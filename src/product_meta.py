@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pandas as pd
+from config import DATA_INTERIM, DATA_PROCESSED
+from artifacts import publish_csv
+
+PRODUCT_META_FILE = "product_meta.csv"
+META_COLUMNS = ["product_name", "department", "aisle", "price"]
+
+
+def build_product_meta(full: pd.DataFrame = None):
+    """
+    Build the compact product metadata artifact used by the recommender:
+      one row per product_name with department, aisle, price, popularity
+      (how often it is bought) and popularity_rank (0 = most popular).
+
+    Rows are written already sorted by popularity, so the file order is the
+    global popularity ranking.
+
+    `full` is the enriched order lines table; if None, only the needed columns
+    of order_products_full_with_price.csv are read.
+
+    Output:
+      data/processed/product_meta.csv
+    """
+    if full is None:
+        full_path = os.path.join(DATA_INTERIM, "order_products_full_with_price.csv")
+        if not os.path.exists(full_path):
+            raise FileNotFoundError(
+                f"{full_path} not found. Run scripts/run_enrichment.py first."
+            )
+        print(f"[product_meta] Loading {full_path} (columns: {META_COLUMNS})")
+        full = pd.read_csv(full_path, usecols=META_COLUMNS)
+
+    pop = full["product_name"].value_counts()
+
+    meta = (
+        full[META_COLUMNS]
+        .drop_duplicates(subset="product_name")
+        .set_index("product_name")
+    )
+    meta["popularity"] = pop.reindex(meta.index).fillna(0).astype("int64")
+    meta = meta.sort_values("popularity", ascending=False, kind="mergesort")
+    meta["popularity_rank"] = np.arange(meta.shape[0], dtype="int64")
+
+    out_path = os.path.join(DATA_PROCESSED, PRODUCT_META_FILE)
+    publish_csv(meta, out_path, index=True)
+    print(f"[product_meta] product_meta saved → {out_path}")
+    print("[product_meta] Shape:", meta.shape)
+    return meta
+
+
+def read_product_meta():
+    """
+    Load data/processed/product_meta.csv (indexed by product_name,
+    pre-sorted by popularity).
+    """
+    path = os.path.join(DATA_PROCESSED, PRODUCT_META_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"{path} not found. Run scripts/run_enrichment.py "
+            f"(or scripts/run_product_meta.py) first."
+        )
+
+    return pd.read_csv(
+        path,
+        index_col="product_name",
+        dtype={"department": "category", "aisle": "category"},
+    )
@@ -0,0 +1,325 @@
+import html
+import json
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from config import DATA_PROCESSED
+
+try:
+    import psutil
+    _PROCESS = psutil.Process()
+except ImportError:
+    _PROCESS = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Switch with set_profiling_enabled() or PIPELINE_PROFILE=0 in the environment.
+ENABLED = os.environ.get("PIPELINE_PROFILE", "1") != "0"
+PROFILES_DIR = os.path.join(DATA_PROCESSED, "profiles")
+SAMPLE_INTERVAL = 0.05
+
+_records = []
+_records_lock = threading.Lock()
+_local = threading.local()
+
+
+def current_rss() -> int:
+    """
+    Resident set size of this process in bytes (psutil, else /proc; 0 if unknown).
+    """
+    if _PROCESS is not None:
+        return _PROCESS.memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _children_cpu() -> float:
+    t = os.times()
+    return t.children_user + t.children_system
+
+
+class _PeakSampler(threading.Thread):
+    """
+    Daemon thread sampling RSS every SAMPLE_INTERVAL seconds and raising
+    the peak of every stage currently running.
+    """
+
+    def __init__(self):
+        super().__init__(name="profiling-rss-sampler", daemon=True)
+        self.active = set()
+        self.lock = threading.Lock()
+
+    def run(self):
+        while True:
+            rss = current_rss()
+            with self.lock:
+                for prof in self.active:
+                    if rss > prof.peak_rss:
+                        prof.peak_rss = rss
+            time.sleep(SAMPLE_INTERVAL)
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def _get_sampler():
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = _PeakSampler()
+            _sampler.start()
+    return _sampler
+
+
+class StageProfile:
+    """
+    Measurements of one stage. Set `rows_out` (and `rows_in` if not known
+    up front) inside the `with profile_stage(...)` block.
+    """
+
+    def __init__(self, stage: str, parent: str = None, rows_in=None):
+        self.stage = stage
+        self.parent = parent
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.peak_rss = 0
+        self.error = None
+
+    def to_dict(self) -> dict:
+        mb = 1024 * 1024
+        return {
+            "stage": self.stage,
+            "parent": self.parent,
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "rss_start_mb": round(self.rss_start / mb, 1),
+            "rss_end_mb": round(self.rss_end / mb, 1),
+            "peak_rss_mb": round(self.peak_rss / mb, 1),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "error": self.error,
+        }
+
+
+@contextmanager
+def profile_stage(stage: str, rows_in=None):
+    """
+    Record wall time, CPU time (this process and finished children), RSS at
+    start/end, peak RSS and rows in/out of a block:
+
+        with profile_stage("fpgrowth", rows_in=basket.shape[0]) as prof:
+            freq = fpgrowth(...)
+            prof.rows_out = freq.shape[0]
+
+    Stages nest: the enclosing stage is recorded as `parent`.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    prof = StageProfile(stage, stack[-1].stage if stack else None, rows_in)
+    if not ENABLED:
+        yield prof
+        return
+
+    sampler = _get_sampler()
+    prof.started_at = time.time()
+    prof.rss_start = prof.peak_rss = current_rss()
+    cpu_start = time.process_time() + _children_cpu()
+    wall_start = time.perf_counter()
+    stack.append(prof)
+    with sampler.lock:
+        sampler.active.add(prof)
+    try:
+        yield prof
+    except BaseException as exc:
+        prof.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        prof.wall_seconds = time.perf_counter() - wall_start
+        prof.cpu_seconds = time.process_time() + _children_cpu() - cpu_start
+        prof.rss_end = current_rss()
+        with sampler.lock:
+            sampler.active.discard(prof)
+        prof.peak_rss = max(prof.peak_rss, prof.rss_end)
+        stack.pop()
+        with _records_lock:
+            _records.append(prof.to_dict())
+
+
+def count_rows(obj):
+    """
+    Row count of a DataFrame / array / list result (first element of a tuple).
+    """
+    if isinstance(obj, tuple) and obj:
+        obj = obj[0]
+    shape = getattr(obj, "shape", None)
+    if shape:
+        return int(shape[0])
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+
+def profiled(stage: str = None):
+    """
+    Decorator form of profile_stage; rows_out is taken from the result.
+    """
+    def decorator(func):
+        name = stage or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_stage(name) as prof:
+                result = func(*args, **kwargs)
+                prof.rows_out = count_rows(result)
+            return result
+        return wrapper
+    return decorator
+
+
+def set_profiling_enabled(enabled: bool = True):
+    global ENABLED
+    ENABLED = bool(enabled)
+
+
+def profiling_enabled() -> bool:
+    return ENABLED
+
+
+def profile_records() -> list:
+    with _records_lock:
+        return list(_records)
+
+
+def reset_profile():
+    with _records_lock:
+        _records.clear()
+
+
+def current_stage():
+    """
+    Name of the innermost stage running in this thread, or None.
+    """
+    stack = getattr(_local, "stack", None)
+    return stack[-1].stage if stack else None
+
+
+def add_profile_records(records, parent: str = None):
+    """
+    Merge records profiled in another process (e.g. a pool worker) into this
+    one. Records without a parent are attached to `parent`.
+    """
+    with _records_lock:
+        for record in records:
+            if record.get("parent") is None and parent is not None:
+                record = dict(record, parent=parent)
+            _records.append(record)
+
+
+def _process_peak_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux, bytes on macOS.
+    return round(peak / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def _html_report(report: dict) -> str:
+    stages = report["stages"]
+    longest = max((s["wall_seconds"] for s in stages), default=0) or 1
+    rows = []
+    for s in stages:
+        width = int(300 * s["wall_seconds"] / longest)
+        rows.append(
+            "<tr>"
+            f"<td>{html.escape(s['stage'])}</td><td>{html.escape(str(s['parent'] or ''))}</td>"
+            f"<td>{s['wall_seconds']:.2f}</td>"
+            f"<td><div style='background:#43A047;height:10px;width:{width}px'></div></td>"
+            f"<td>{s['cpu_seconds']:.2f}</td><td>{s['peak_rss_mb']:.0f}</td>"
+            f"<td>{s['rss_end_mb'] - s['rss_start_mb']:+.0f}</td>"
+            f"<td>{s['rows_in'] if s['rows_in'] is not None else ''}</td>"
+            f"<td>{s['rows_out'] if s['rows_out'] is not None else ''}</td>"
+            f"<td>{html.escape(s['error'] or '')}</td>"
+            "</tr>"
+        )
+    return (
+        "<html><head><meta charset='utf-8'><title>Pipeline profile</title>"
+        "<style>body{font-family:sans-serif}td,th{padding:2px 8px;text-align:right}"
+        "td:first-child,td:nth-child(2){text-align:left}</style></head><body>"
+        f"<h2>Pipeline profile: {html.escape(report['name'])}</h2>"
+        f"<p>{time.ctime(report['created_at'])} | Python {report['python']} | "
+        f"process peak RSS: {report['process_peak_rss_mb']} MB</p>"
+        "<table><tr><th>stage</th><th>parent</th><th>wall s</th><th></th><th>cpu s</th>"
+        "<th>peak RSS MB</th><th>RSS delta MB</th><th>rows in</th><th>rows out</th>"
+        "<th>error</th></tr>"
+        + "".join(rows)
+        + "</table></body></html>"
+    )
+
+
+def write_profile_report(name: str = "run", records=None, out_dir: str = PROFILES_DIR):
+    """
+    Write the recorded stages to profile_<name>_<timestamp>.json and .html.
+
+    Output:
+      data/processed/profiles/profile_<name>_<timestamp>.{json,html}
+    """
+    report = {
+        "name": name,
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "process_peak_rss_mb": _process_peak_mb(),
+        "stages": records if records is not None else profile_records(),
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.join(out_dir, f"profile_{name}_{time.strftime('%Y%m%d_%H%M%S')}")
+    with open(stem + ".json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    with open(stem + ".html", "w", encoding="utf-8") as f:
+        f.write(_html_report(report))
+    print(f"[profiling] Profile saved → {stem}.json / .html")
+    return stem + ".json"
+
+
+def compare_profiles(baseline_path: str, candidate_path: str):
+    """
+    Print wall time and peak RSS changes per stage between two profile reports
+    (stages matched by name; repeated stages are summed / maxed).
+    """
+    def load(path):
+        with open(path, encoding="utf-8") as f:
+            stages = json.load(f)["stages"]
+        out = {}
+        for s in stages:
+            agg = out.setdefault(s["stage"], {"wall": 0.0, "peak": 0.0})
+            agg["wall"] += s["wall_seconds"]
+            agg["peak"] = max(agg["peak"], s["peak_rss_mb"])
+        return out
+
+    base, cand = load(baseline_path), load(candidate_path)
+    rows = {}
+    print(f"[profiling] {'stage':<40} {'wall s':>18} {'peak RSS MB':>22}")
+    for stage in list(base) + [s for s in cand if s not in base]:
+        b, c = base.get(stage), cand.get(stage)
+        rows[stage] = {"baseline": b, "candidate": c}
+        fmt = lambda x, key: f"{x[key]:.1f}" if x else "-"
+        print(
+            f"[profiling] {stage:<40} {fmt(b, 'wall'):>8} -> {fmt(c, 'wall'):<8}"
+            f" {fmt(b, 'peak'):>10} -> {fmt(c, 'peak'):<10}"
+        )
+    return rows
@@ -0,0 +1,383 @@
+import asyncio
+import json
+import math
+import time
+from collections import defaultdict
+
+from latency import latency_prometheus
+from recommender import (
+    current_snapshot,
+    recommend_items_batch,
+    recommendation_cache_stats,
+    start_rules_watcher,
+    stop_rules_watcher,
+)
+
+MAX_BODY_BYTES = 1 << 20
+
+_STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class ServiceMetrics:
+    """
+    In-process counters for the recommendation service.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_carts = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    def observe_request(self, seconds: float, ok: bool = True):
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self.latency_sum += seconds
+        self.latency_max = max(self.latency_max, seconds)
+
+    def observe_batch(self, size: int):
+        self.batches += 1
+        self.batched_carts += size
+
+    def to_text(self) -> str:
+        """
+        Prometheus-style text exposition (service counters + result cache).
+        """
+        cache = recommendation_cache_stats()
+        lines = [
+            f"recommend_uptime_seconds {time.time() - self.started_at:.3f}",
+            f"recommend_requests_total {self.requests}",
+            f"recommend_errors_total {self.errors}",
+            f"recommend_batches_total {self.batches}",
+            f"recommend_batched_carts_total {self.batched_carts}",
+            f"recommend_request_latency_seconds_sum {self.latency_sum:.6f}",
+            f"recommend_request_latency_seconds_max {self.latency_max:.6f}",
+            f"recommend_cache_hits_total {cache['hits']}",
+            f"recommend_cache_misses_total {cache['misses']}",
+            f"recommend_cache_invalidations_total {cache['invalidations']}",
+            f"recommend_cache_size {cache['size']}",
+        ]
+        return "\n".join(lines) + "\n" + latency_prometheus()
+
+
+class MicroBatcher:
+    """
+    Collect concurrent recommendation requests for up to `window_ms`
+    (or until `max_batch` carts are waiting) and answer them with one
+    recommend_items_batch call per parameter group, run in a worker thread
+    so the event loop keeps accepting connections.
+    """
+
+    def __init__(self, metrics: ServiceMetrics, window_ms: float = 3.0, max_batch: int = 256):
+        self.metrics = metrics
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, cart, top_k: int, min_lift: float, min_conf: float,
+                     avoid_similar: bool, segment=None):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((top_k, min_lift, min_conf, avoid_similar, segment), cart, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(pending) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            groups = defaultdict(list)
+            for params, cart, future in pending:
+                groups[params].append((cart, future))
+
+            for (top_k, min_lift, min_conf, avoid_similar, segment), items in groups.items():
+                carts = [cart for cart, _ in items]
+                try:
+                    results = await loop.run_in_executor(
+                        None,
+                        lambda: recommend_items_batch(
+                            carts,
+                            top_k=top_k,
+                            min_lift=min_lift,
+                            min_conf=min_conf,
+                            avoid_similar=avoid_similar,
+                            segment=segment,
+                        ),
+                    )
+                except Exception as exc:
+                    for _, future in items:
+                        if not future.done():
+                            future.set_exception(exc)
+                    continue
+
+                self.metrics.observe_batch(len(carts))
+                for (_, future), recs in zip(items, results):
+                    if not future.done():
+                        future.set_result(recs)
+
+
+def _int_field(payload: dict, name: str, default=None):
+    """
+    An integer field of the payload; bools, floats and strings are rejected
+    rather than truncated or coerced.
+    """
+    value = payload.get(name, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"'{name}' must be an integer.")
+    return value
+
+
+def _float_field(payload: dict, name: str, default: float) -> float:
+    """
+    A finite number field of the payload (NaN / inf are rejected).
+    """
+    value = payload.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"'{name}' must be a number.")
+    try:
+        value = float(value)
+    except OverflowError:
+        raise ValueError(f"'{name}' must be a finite number.") from None
+    if not math.isfinite(value):
+        raise ValueError(f"'{name}' must be a finite number.")
+    return value
+
+
+def _parse_recommend_payload(body: bytes):
+    """
+    Validate a /recommend JSON body:
+      {"cart": [...], "top_k": 5, "min_lift": 1.0, "min_conf": 0.1, "avoid_similar": true,
+       "user_id": 123 or "segment": 2 (optional)}
+    """
+    payload = json.loads(body.decode("utf-8") or "{}")
+    if not isinstance(payload, dict):
+        raise ValueError("JSON body must be an object.")
+
+    cart = payload.get("cart", payload.get("cart_items"))
+    if not isinstance(cart, list) or not all(isinstance(x, str) for x in cart):
+        raise ValueError("'cart' must be a list of product names.")
+
+    top_k = _int_field(payload, "top_k", 5)
+    if top_k is None or not 1 <= top_k <= 100:
+        raise ValueError("'top_k' must be between 1 and 100.")
+
+    avoid_similar = payload.get("avoid_similar", True)
+    if not isinstance(avoid_similar, bool):
+        raise ValueError("'avoid_similar' must be true or false.")
+
+    return (
+        [x.strip() for x in cart if x.strip()],
+        top_k,
+        _float_field(payload, "min_lift", 1.0),
+        _float_field(payload, "min_conf", 0.1),
+        avoid_similar,
+        _int_field(payload, "user_id"),
+        _int_field(payload, "segment"),
+    )
+
+
+class RecommendService:
+    """
+    Minimal asyncio HTTP/1.1 server around the recommender.
+
+    Endpoints:
+      POST /recommend  -> {"recommendations": [...]}
+      GET  /health     -> {"status": "ok", ...}
+      GET  /metrics    -> Prometheus-style counters
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8000,
+                 window_ms: float = 3.0, max_batch: int = 256):
+        self.host = host
+        self.port = port
+        self.metrics = ServiceMetrics()
+        self.batcher = MicroBatcher(self.metrics, window_ms=window_ms, max_batch=max_batch)
+        self._server = None
+
+    def warm_up(self):
+        """
+        Load rules, indexes and popularity lists once, before serving.
+        """
+        print("[recommend_service] Loading rules and metadata...")
+        current_snapshot()
+
+    async def start(self):
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"[recommend_service] Listening on http://{self.host}:{self.port}")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request line."}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (
+                    headers.get("connection", "").lower() != "close"
+                    if version == "HTTP/1.1"
+                    else headers.get("connection", "").lower() == "keep-alive"
+                )
+
+                try:
+                    length = int(headers.get("content-length", "0") or 0)
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    # the body cannot be delimited: answer and close
+                    self.metrics.observe_request(0.0, ok=False)
+                    await self._respond(writer, 400, {"error": "Invalid Content-Length."}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    self.metrics.observe_request(0.0, ok=False)
+                    await self._respond(writer, 413, {"error": "Body too large."}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self._dispatch(method, path.split("?", 1)[0], body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        except Exception as exc:
+            # never drop a connection without an answer
+            self.metrics.observe_request(0.0, ok=False)
+            try:
+                await self._respond(writer, 500, {"error": str(exc)}, False)
+            except (ConnectionError, RuntimeError):
+                pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes):
+        if path == "/health":
+            snap = current_snapshot()
+            return 200, {
+                "status": "ok",
+                "uptime_seconds": round(time.time() - self.metrics.started_at, 3),
+                "rules_version": snap.version,
+                "rules_loaded_at": snap.loaded_at,
+            }
+        if path == "/metrics":
+            return 200, self.metrics.to_text()
+        if path != "/recommend":
+            return 404, {"error": f"Unknown path {path}."}
+        if method != "POST":
+            return 405, {"error": "Use POST /recommend."}
+
+        start = time.perf_counter()
+        try:
+            (
+                cart, top_k, min_lift, min_conf, avoid_similar, user_id, segment,
+            ) = _parse_recommend_payload(body)
+        except (ValueError, TypeError) as exc:
+            self.metrics.observe_request(time.perf_counter() - start, ok=False)
+            return 400, {"error": str(exc)}
+
+        try:
+            segment = current_snapshot().resolve_segment(user_id=user_id, segment=segment)
+            recs = await self.batcher.submit(
+                cart, top_k, min_lift, min_conf, avoid_similar, segment
+            )
+        except Exception as exc:
+            self.metrics.observe_request(time.perf_counter() - start, ok=False)
+            return 500, {"error": str(exc)}
+
+        self.metrics.observe_request(time.perf_counter() - start)
+        return 200, {"cart": cart, "segment": segment, "recommendations": recs}
+
+    async def _respond(self, writer, status: int, payload, keep_alive: bool):
+        if isinstance(payload, str):
+            data = payload.encode("utf-8")
+            content_type = "text/plain; version=0.0.4"
+        else:
+            data = json.dumps(payload).encode("utf-8")
+            content_type = "application/json"
+
+        head = (
+            f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+
+def run_service(host: str = "127.0.0.1", port: int = 8000,
+                window_ms: float = 3.0, max_batch: int = 256,
+                watch_interval: float = 5.0):
+    """
+    Load the recommender once and serve it until interrupted.
+    With watch_interval > 0, newly published rules are hot-reloaded
+    in the background and swapped in without a restart.
+    """
+    service = RecommendService(host=host, port=port, window_ms=window_ms, max_batch=max_batch)
+    service.warm_up()
+    if watch_interval > 0:
+        start_rules_watcher(interval=watch_interval)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        print("[recommend_service] Stopped.")
+    finally:
+        stop_rules_watcher()
@@ -1,104 +1,284 @@
-
-import os
-import pandas as pd
-from config import DATA_INTERIM, DATA_PROCESSED
-from difflib import get_close_matches
-from config import DATA_PROCESSED
-
-_business_rules_cache = None
-_product_meta_cache = None
+import itertools
+import threading
+import time
+import numpy as np
+import latency
+from latency import record, span
+from result_cache import ResultCache
+from rule_index import normalize_name
+from snapshot import SnapshotWatcher, build_snapshot, published_version
+
+# Current RecommenderSnapshot (rules + indexes + popularity for one version).
+# Replaced atomically by reload_snapshot(); never mutated in place.
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_snapshot_generation = itertools.count(1)
+_watcher = None
+
+# Recommendation results, keyed on normalized cart + parameters.
+# Shared by recommend_items, recommend_items_batch and the HTTP service.
+_result_cache = ResultCache(maxsize=20000, ttl_seconds=3600)
 
 
 # -------------------------------------------------------------
-# LOAD RULES (cached)
+# LOAD RULES (versioned snapshots)
 # -------------------------------------------------------------
-def load_business_rules():
+def current_snapshot():
     """
-    Load 1->1 cleaned rules (business_ready_rules.csv).
+    Return the current snapshot, loading it on first use.
     """
-    global _business_rules_cache
-    if _business_rules_cache is not None:
-        return _business_rules_cache
+    global _snapshot
+    snap = _snapshot
+    if snap is not None:
+        return snap
 
-    global _rules_cache
-    if _rules_cache is not None:
-        return _rules_cache
+    with _snapshot_lock:
+        if _snapshot is None:
+            _snapshot = build_snapshot(next(_snapshot_generation))
+        return _snapshot
 
-    path = os.path.join(DATA_PROCESSED, "business_ready_rules.csv")
-    if not os.path.exists(path):
-        raise FileNotFoundError(
-            f"{path} not found. Run scripts/run_association_rules.py first."
-        )
 
-    rules = pd.read_csv(path)
-    _business_rules_cache = rules
-    return rules
+def reload_snapshot(force: bool = False) -> bool:
+    """
+    Rebuild the snapshot if the published rules / product meta changed
+    (or if force=True), then swap it in atomically.
+
+    Requests already running keep the snapshot they started with.
+    Returns True if a new snapshot was published.
+    """
+    global _snapshot
+    with _snapshot_lock:
+        if not force and _snapshot is not None and _snapshot.version == published_version():
+            return False
+        new_snapshot = build_snapshot(next(_snapshot_generation))
+        old_version = _snapshot.version if _snapshot is not None else None
+        _snapshot = new_snapshot
 
+    print(f"[recommender] Rules snapshot swapped: {old_version} -> {new_snapshot.version}")
+    return True
 
-def load_product_meta():
+
+def start_rules_watcher(interval: float = 5.0):
     """
-    Build product -> {department, aisle, popularity} mapping
-    from order_products_full_with_price.csv.
+    Start (once) a background thread that hot-reloads new rules
+    published by scripts/run_association_rules.py.
     """
-    global _product_meta_cache
-    if _product_meta_cache is not None:
-        return _product_meta_cache
+    global _watcher
+    if _watcher is None or not _watcher.is_alive():
+        _watcher = SnapshotWatcher(reload_snapshot, interval=interval)
+        _watcher.start()
+    return _watcher
 
-    full_path = os.path.join(DATA_INTERIM, "order_products_full_with_price.csv")
-    if not os.path.exists(full_path):
-        raise FileNotFoundError(
-            f"{full_path} not found. Run scripts/run_enrichment.py first."
-        )
 
-    df = pd.read_csv(full_path)
+def stop_rules_watcher():
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
 
-    # popularity (how often each product is bought)
-    pop = df["product_name"].value_counts()
-    pop.name = "popularity"
 
-    meta = (
-        df[["product_name", "department", "aisle"]]
-        .drop_duplicates()
-        .set_index("product_name")
-    )
-    meta = meta.join(pop, how="left").fillna({"popularity": 0})
+def load_business_rules():
+    """
+    1->1 cleaned rules (business_ready_rules.csv) of the current snapshot.
+    """
+    return current_snapshot().rules
 
-    _product_meta_cache = meta
-    return meta
 
+def rules_version():
+    """
+    Version tag of the loaded rules and product meta.
+    """
+    return current_snapshot().version
 
-def _too_similar(a: str, b: str) -> bool:
+
+def load_rule_index():
     """
-    Simple heuristic: treat names as similar if one contains the other.
-    E.g. 'Banana' vs 'Bag of Organic Bananas'.
+    Antecedent -> ranked consequents index of the current snapshot.
+    """
+    return current_snapshot().index
+
+
+def load_rule_query_engine():
+    """
+    Indexed rule queries (filters, top-N, pagination) over the current
+    snapshot's 1->1 rules.
+    """
+    return current_snapshot().rule_queries()
+
+
+def load_rule_matrix():
+    """
+    Sparse antecedent -> rule -> consequent matrices used by
+    recommend_items_batch, from the current snapshot.
+    """
+    return current_snapshot().matrix
+
+
+def load_product_meta():
     """
+    Product -> {department, aisle, price, popularity} mapping
+    (product_meta.csv, pre-sorted by popularity) of the current snapshot.
+    """
+    return current_snapshot().meta
+
+
+def load_popularity():
+    """
+    Global / per-department / per-aisle popularity lists used by the
+    fallbacks, from the current snapshot.
+    """
+    return current_snapshot().popularity
+
+
 # -------------------------------------------------------------
 # UTILITY: fuzzy match item name
 # -------------------------------------------------------------
-def _fuzzy_match_item(user_item: str, all_items):
+def _fuzzy_match_item(user_item: str, name_index):
     """
     Return the closest matching product name (case-insensitive),
     or None if nothing close enough.
+
+    Uses the prebuilt trigram NameIndex; resolved strings are LRU-cached.
     """
-    lowered = [x.lower() for x in all_items]
-    matches = get_close_matches(user_item.lower(), lowered, n=1, cutoff=0.6)
-    if matches:
-        idx = lowered.index(matches[0])
-        return all_items[idx]
-    return None
+    return name_index.resolve(str(user_item))
 
 
 # -------------------------------------------------------------
 # UTILITY: simple similarity filter
 # -------------------------------------------------------------
 def _too_similar(a: str, b: str) -> bool:
+    """
+    Simple heuristic: treat names as similar if one contains the other.
+    E.g. 'Banana' vs 'Bag of Organic Bananas'.
+    """
     a_low = str(a).lower()
     b_low = str(b).lower()
     return (a_low in b_low) or (b_low in a_low)
 
 
 # -------------------------------------------------------------
-# MAIN RECOMMENDER (IMPROVED)
+# SHARED STEPS (single-cart and batch paths)
+# -------------------------------------------------------------
+def _normalize_cart(cart_items, index, popularity):
+    """
+    Map each cart item to a product name: an exact (case-insensitive) hit
+    in the full product catalog is kept as is; anything else is
+    fuzzy-matched to a product name from the rules, keeping the raw string
+    when nothing is close enough.
+    """
+    with span("recommend.fuzzy_match"):
+        normalized_cart = []
+        for it in cart_items:
+            fm = popularity.exact(it) or _fuzzy_match_item(it, index.product_index)
+            normalized_cart.append(fm if fm else it)
+    return normalized_cart
+
+
+def _make_acceptor(normalized_cart, avoid_similar: bool):
+    """
+    Return (recs, accept): accept(p) appends p to recs unless it is
+    in the cart, already recommended, or too similar to a cart item.
+
+    Time spent in the similar-name check is summed in accept.similar_seconds[0]
+    (only while latency instrumentation is enabled).
+    """
+    cart_set = set(normalized_cart)
+    recs = []
+    seen = set()
+    similar_seconds = [0.0]
+
+    def accept(p) -> bool:
+        if p in cart_set or p in seen:
+            return False
+        if avoid_similar:
+            if latency.ENABLED:
+                start = time.perf_counter()
+                similar = any(_too_similar(p, ci) for ci in normalized_cart)
+                similar_seconds[0] += time.perf_counter() - start
+            else:
+                similar = any(_too_similar(p, ci) for ci in normalized_cart)
+            if similar:
+                return False
+        seen.add(p)
+        recs.append(p)
+        return True
+
+    accept.similar_seconds = similar_seconds
+    return recs, accept
+
+
+def _fill_with_popularity(recs, accept, popularity, normalized_cart, top_k: int, found_any_rule: bool):
+    """
+    Popularity fallbacks:
+      - if rules matched, pad with globally popular products;
+      - otherwise, popular products from the cart's aisle(s) first, then
+        from its department(s), then globally popular products.
+    """
+    if len(recs) >= top_k:
+        return recs[:top_k]
+
+    with span("recommend.popularity_fallback"):
+        sources = []
+        if not found_any_rule:
+            aisles = {
+                popularity.product_aisle[ci]
+                for ci in normalized_cart if ci in popularity.product_aisle
+            }
+            depts = {
+                popularity.product_department[ci]
+                for ci in normalized_cart if ci in popularity.product_department
+            }
+            sources.append(popularity.iter_aisles(aisles))
+            sources.append(popularity.iter_departments(depts))
+        sources.append(popularity.iter_global())
+
+        for source in sources:
+            for p in source:
+                accept(p)
+                if len(recs) >= top_k:
+                    return recs[:top_k]
+
+    return recs[:top_k]
+
+
+# -------------------------------------------------------------
+# RESULT CACHE
+# -------------------------------------------------------------
+def _cache_key(cart_items, top_k, min_lift, min_conf, avoid_similar, segment=None):
+    """
+    Cache key: normalized, de-duplicated, sorted cart + parameters + the
+    resolved rule segment (None = global rules).
+    Ranking does not depend on cart order, so ["A", "B"] and ["b", "a"] share it.
+    """
+    cart = tuple(sorted({normalize_name(x) for x in cart_items}))
+    return cart, int(top_k), float(min_lift), float(min_conf), bool(avoid_similar), segment
+
+
+def recommendation_cache_stats() -> dict:
+    """
+    Hit/miss counters and size of the recommendation result cache.
+    """
+    return _result_cache.stats()
+
+
+def clear_recommendation_cache():
+    _result_cache.clear()
+
+
+def configure_recommendation_cache(maxsize: int = None, ttl_seconds: float = None):
+    """
+    Resize the result cache or change its TTL (maxsize=0 disables caching,
+    e.g. for benchmarks and offline evaluation).
+    """
+    if maxsize is not None:
+        _result_cache.maxsize = int(maxsize)
+    if ttl_seconds is not None:
+        _result_cache.ttl = ttl_seconds
+    _result_cache.clear()
+
+
+# -------------------------------------------------------------
+# MAIN RECOMMENDER
 # -------------------------------------------------------------
 def recommend_items(
     cart_items,
@@ -106,25 +286,34 @@ def recommend_items(
     min_lift: float = 1.0,
     min_conf: float = 0.1,
     avoid_similar: bool = True,
+    user_id=None,
+    segment=None,
 ):
     """
     Final recommender strategy:
 
-    1) For each item in cart, try 1->1 rules where antecedent == that item
-       (from business_ready_rules.csv).
+    1) Normalize cart items (fuzzy matching against products in the rules).
+
+    2) Look up 1->1 rules (business_ready_rules.csv) in the prebuilt rule
+       index, where the antecedent matches a cart item exactly or by
+       substring (ex: "strawberries" -> "Organic Strawberries"), plus
+       k->1 rules (association_rules_fp_all.csv) whose whole antecedent
+       is in the cart, found through the itemset trie.
        - Filter by lift and confidence.
-       - Sort by expected_revenue, then lift, then confidence.
+       - Merge the pre-sorted per-antecedent lists so candidates come out
+         ranked by expected_revenue > lift > confidence.
        - Collect consequents not in cart (and not too similar).
 
        If we find at least one such rule for any cart item, we:
          - Use these rule-based recommendations (possibly padded with popular items).
 
-    2) If there are NO matching rules for ANY cart item:
+    3) If there are NO matching rules for ANY cart item:
        - Ignore rules completely.
-       - Recommend popular products from the SAME department(s) as the items
-         in the cart (based on order_products_full_with_price.csv).
+       - Recommend popular products from the SAME aisle(s), then the SAME
+         department(s) as the items in the cart (precomputed top lists
+         from product_meta.csv).
 
-    3) If still not enough, fall back to globally popular products.
+    4) If still not enough, fall back to globally popular products.
 
     This way:
       - Items with strong rules (e.g. Bananas, Organic Strawberries)
@@ -133,196 +322,167 @@ def recommend_items(
         get department-consistent popularity-based suggestions instead of
         random organic produce.
 
-    Robust recommendation engine with:
-    - fuzzy matching
-    - substring matching
-    - fallback rules
-    - rule ranking: expected_revenue > lift > confidence
+    Optional `segment` (customer cluster) or `user_id` (looked up in
+    customer_segments.csv) selects that segment's rules when
+    scripts/run_segment_rules.py has mined them; otherwise the global rules
+    are used.
+
+    Results are cached per normalized cart + parameters; the cache is dropped
+    whenever the loaded rules version changes. The whole request runs on the
+    snapshot current when it started, even if new rules are swapped in.
     """
 
     if not cart_items:
         return []
 
-    rules = load_business_rules()
-    meta = load_product_meta()
-
-    cart_set = set(cart_items)
-    recs = []
-    seen = set()
-
-    # --- 1) Rule-based recommendations, per cart item ---
-    found_any_rule = False
+    with span("recommend.total"):
+        snap = current_snapshot()
+        segment = snap.resolve_segment(user_id=user_id, segment=segment)
 
-    for cart_item in cart_items:
-        # Rules with this item as antecedent
-        r = rules[
-            (rules["antecedents_str"] == cart_item) &
-            (rules["lift"] >= min_lift) &
-            (rules["confidence"] >= min_conf)
-        ].copy()
+        with span("recommend.cache_lookup"):
+            _result_cache.check_version(snap.generation)
+            cache_key = _cache_key(cart_items, top_k, min_lift, min_conf, avoid_similar, segment)
+            cached = _result_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
 
-        if r.empty:
-            continue
-
-        found_any_rule = True
-
-        r = r.sort_values(
-    # Build a list of all product names appearing anywhere in rules
-    all_products = list(
-        set(rules["antecedents_str"].tolist()) |
-        set(rules["consequents_str"].tolist())
-    )
-
-    # ---------------------------------------------------------
-    # 1) Normalize cart items (fuzzy matching)
-    # ---------------------------------------------------------
-    normalized_cart = []
-    for it in cart_items:
-        fm = _fuzzy_match_item(it, all_products)
-        normalized_cart.append(fm if fm else it)
-
-    # ---------------------------------------------------------
-    # 2) Match rules by:
-    #    (A) exact antecedent match
-    #    (B) substring match
-    # ---------------------------------------------------------
-    candidate_rules = pd.DataFrame()
-
-    for item in normalized_cart:
-        # Exact match
-        exact = rules[rules["antecedents_str"].str.lower() == item.lower()]
-
-        # Substring fuzzy match (ex: "strawberries" -> "Organic Strawberries")
-        contains = rules[rules["antecedents_str"].str.contains(item, case=False, na=False)]
-
-        candidate_rules = pd.concat([candidate_rules, exact, contains], ignore_index=True)
-
-    candidate_rules = candidate_rules.drop_duplicates()
-
-    # ---------------------------------------------------------
-    # 3) Apply rule strength filters
-    # ---------------------------------------------------------
-    candidate_rules = candidate_rules[
-        (candidate_rules["lift"] >= min_lift) &
-        (candidate_rules["confidence"] >= min_conf)
-    ]
-
-    # ---------------------------------------------------------
-    # 4) If candidates exist, rank and return top-k
-    # ---------------------------------------------------------
-    if not candidate_rules.empty:
-
-        # Sort by revenue, then lift, then confidence
-        candidate_rules = candidate_rules.sort_values(
-            by=["expected_revenue", "lift", "confidence"],
-            ascending=False
+        recs = _recommend_uncached(
+            cart_items, snap, snap.rule_set(segment), top_k, min_lift, min_conf, avoid_similar
         )
-
-        for _, row in r.iterrows():
-            c = row["consequents_str"]
-            if c in cart_set:
-                continue
-            if avoid_similar and any(_too_similar(c, ci) for ci in cart_items):
-                continue
-            if c not in seen:
-                seen.add(c)
-                recs.append(c)
-            if len(recs) >= top_k:
-                break
-        if len(recs) >= top_k:
-            break
-
-    # If we found at least one rule-based recommendation, return or pad with popularity
-    if found_any_rule:
-        if len(recs) < top_k:
-            pop = meta.sort_values("popularity", ascending=False).index.tolist()
-            for p in pop:
-                if p in cart_set or p in seen:
-                    continue
-                if avoid_similar and any(_too_similar(p, ci) for ci in cart_items):
-                    continue
-                seen.add(p)
-                recs.append(p)
+        _result_cache.put(cache_key, tuple(recs), version=snap.generation)
+        return recs
+
+
+def _recommend_uncached(cart_items, snap, rule_set, top_k, min_lift, min_conf, avoid_similar):
+    index = rule_set.index
+    normalized_cart = _normalize_cart(cart_items, snap.index, snap.popularity)
+    recs, accept = _make_acceptor(normalized_cart, avoid_similar)
+
+    try:
+        with span("recommend.rule_lookup"):
+            keys = []
+            for item in normalized_cart:
+                keys.extend(index.matching_keys(item))
+
+            # k->1 rules whose whole antecedent is in the cart, ranked with the 1->1 ones
+            multi_item_lists = rule_set.trie.match(normalized_cart)
+
+        found_any_rule = False
+        with span("recommend.rule_rank"):
+            candidates = index.iter_candidates(keys, min_lift, min_conf, multi_item_lists)
+            for consequent, _, _, _ in candidates:
+                found_any_rule = True
+                accept(consequent)
                 if len(recs) >= top_k:
-                    break
-        return recs[:top_k]
+                    return recs
 
-    # --- 2) No rules at all: department-based popularity fallback ---
-
-    # Determine departments present in cart
-    depts = set()
-    for ci in cart_items:
-        try:
-            depts.add(str(meta.loc[ci]["department"]))
-        except KeyError:
-            continue
+        return _fill_with_popularity(
+            recs, accept, snap.popularity, normalized_cart, top_k, found_any_rule
+        )
+    finally:
+        if avoid_similar:
+            record("recommend.similar_filter", accept.similar_seconds[0])
 
-    pop_df = meta.sort_values("popularity", ascending=False)
 
-    for p, row in pop_df.iterrows():
-        if p in cart_set or p in seen:
-            continue
-        dept_p = str(row.get("department", ""))
-        if depts and dept_p not in depts:
-            continue  # restrict to departments found in cart
+# -------------------------------------------------------------
+# BATCH RECOMMENDER
+# -------------------------------------------------------------
+def recommend_items_batch(
+    carts,
+    top_k: int = 5,
+    min_lift: float = 1.0,
+    min_conf: float = 0.1,
+    avoid_similar: bool = True,
+    segment=None,
+):
+    """
+    Recommend for many carts at once (e.g. nightly email job).
 
-        if avoid_similar and any(_too_similar(p, ci) for ci in cart_items):
-            continue
+    Carts are encoded as a sparse carts x antecedents matrix and multiplied
+    by the antecedents x rules matrix; each (cart, consequent) pair keeps its
+    best rule, in-cart and too-similar products are masked, and the top-k per
+    cart is taken in one vectorized pass. Ranking (expected_revenue > lift >
+    confidence) and popularity fallbacks are the same as recommend_items.
 
-        seen.add(p)
-        recs.append(p)
-        if len(recs) >= top_k:
-            break
-
-    # --- 3) Final fallback: global popularity if still not enough ---
-    if len(recs) < top_k:
-        pop_all = meta.sort_values("popularity", ascending=False).index.tolist()
-        for p in pop_all:
-            if p in cart_set or p in seen:
-                continue
-            if avoid_similar and any(_too_similar(p, ci) for ci in cart_items):
-                continue
-            seen.add(p)
-            recs.append(p)
-            if len(recs) >= top_k:
-                break
+    Carts already in the result cache are answered from it; only the
+    misses go through the matrix pass. The matrix holds 1->1 rules only, so
+    carts that match multi-item rules in the itemset trie are answered by
+    the single-cart path to keep the same ranking. The same goes for every
+    cart when a mined `segment` is requested (the matrix is global).
 
-    return recs[:top_k]
+    Returns one list of recommendations per cart, in input order.
+    """
+    carts = [list(c) if c else [] for c in carts]
+    if not carts:
+        return []
 
-        recs = []
-        for _, row in candidate_rules.iterrows():
-            c = row["consequents_str"]
+    snap = current_snapshot()
+    index, matrix, popularity = snap.index, snap.matrix, snap.popularity
+    segment = snap.resolve_segment(segment=segment)
+    rule_set = snap.rule_set(segment)
 
-            # Skip if same as cart or too similar
-            if c in normalized_cart:
-                continue
-            if avoid_similar and any(_too_similar(c, x) for x in normalized_cart):
-                continue
+    _result_cache.check_version(snap.generation)
+    results = [[] for _ in carts]
+    todo, todo_keys = [], []
+    for i, cart in enumerate(carts):
+        if not cart:
+            continue
+        cache_key = _cache_key(cart, top_k, min_lift, min_conf, avoid_similar, segment)
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            results[i] = list(cached)
+        else:
+            todo.append(i)
+            todo_keys.append(cache_key)
+    if not todo:
+        return results
+
+    normalized = []
+    matrix_todo, matrix_keys = [], []
+    for i, cache_key in zip(todo, todo_keys):
+        cart = _normalize_cart(carts[i], index, popularity)
+        if segment is not None or rule_set.trie.match(cart):
+            recs = _recommend_uncached(
+                carts[i], snap, rule_set, top_k, min_lift, min_conf, avoid_similar
+            )
+            _result_cache.put(cache_key, tuple(recs), version=snap.generation)
+            results[i] = recs
+        else:
+            normalized.append(cart)
+            matrix_todo.append(i)
+            matrix_keys.append(cache_key)
+    todo, todo_keys = matrix_todo, matrix_keys
+    if not todo:
+        return results
+
+    cart_keys, cart_products, limits = [], [], []
+    for cart in normalized:
+        keys = []
+        for item in cart:
+            keys.extend(index.matching_keys(item))
+        cart_keys.append([matrix.key_ids[k] for k in dict.fromkeys(keys)])
+        pids = [matrix.product_ids[it] for it in cart if it in matrix.product_ids]
+        cart_products.append(pids)
+        # unresolved raw strings are not in the product vocabulary, so the
+        # similarity mask cannot cover them: keep all candidates for those carts
+        limits.append(top_k if len(pids) == len(cart) else len(matrix.products))
+
+    with span("recommend_batch.matrix_score"):
+        rows, cons, has_rule = matrix.score(
+            cart_keys, cart_products, limits,
+            min_lift=min_lift, min_conf=min_conf, avoid_similar=avoid_similar,
+        )
+    bounds = np.searchsorted(rows, np.arange(len(todo) + 1), side="left")
 
-            # Unique & top_k limit
-            if c not in recs:
-                recs.append(c)
+    for j, cart in enumerate(normalized):
+        recs, accept = _make_acceptor(cart, avoid_similar)
+        for c in cons[bounds[j]:bounds[j + 1]]:
+            accept(matrix.products[c])
             if len(recs) >= top_k:
                 break
 
-        if recs:
-            return recs
-
-    # ---------------------------------------------------------
-    # 5) FALLBACK: If no rules matched
-    # ---------------------------------------------------------
-    # Recommend top revenue consequences globally
-    fallback_rules = rules.sort_values(
-        by=["expected_revenue", "lift", "confidence"],
-        ascending=False
-    )
-
-    fallback_recs = []
-    for _, row in fallback_rules.iterrows():
-        c = row["consequents_str"]
-        if c not in normalized_cart and c not in fallback_recs:
-            fallback_recs.append(c)
-        if len(fallback_recs) >= top_k:
-            break
-
-    return fallback_recs
+        recs = _fill_with_popularity(recs, accept, popularity, cart, top_k, bool(has_rule[j]))
+        _result_cache.put(todo_keys[j], tuple(recs), version=snap.generation)
+        results[todo[j]] = recs
+
+    return results
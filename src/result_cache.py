@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Bounded LRU cache with optional TTL for recommendation results.
+
+    Entries are tagged with the rules version they were computed from
+    (an increasing snapshot generation number); when a newer version is seen
+    (see `check_version`), the whole cache is dropped so stale
+    recommendations are never served.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl_seconds: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def check_version(self, version):
+        """
+        Drop all entries if `version` is newer than the cached one.
+        Requests still running on an older snapshot do not roll it back.
+        """
+        with self._lock:
+            if self.version is None or version > self.version:
+                if self._data:
+                    self.invalidations += 1
+                self._data.clear()
+                self.version = version
+
+    def get(self, key):
+        """
+        Return the cached value, or None on miss / expiry.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, version=None):
+        """
+        Store a value. If `version` is given and is no longer the current
+        one (e.g. computed on a snapshot swapped out meanwhile), skip it.
+        """
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "version": self.version,
+            }
@@ -0,0 +1,106 @@
+import heapq
+from collections import defaultdict
+
+import pandas as pd
+from name_index import NameIndex
+
+RANK_COLUMNS = ["expected_revenue", "lift", "confidence"]
+
+
+def normalize_name(name) -> str:
+    """
+    Normalized lookup key for a product name (case/whitespace-insensitive).
+    """
+    return str(name).strip().lower()
+
+
+class RuleIndex:
+    """
+    Inverted index over 1->1 rules, built once at load time.
+
+    For each normalized antecedent we keep its consequents as a list of
+    (-expected_revenue, -lift, -confidence, consequent) tuples, already sorted
+    so that the best rule comes first. Answering a cart is then a few
+    dictionary lookups plus a k-way merge of these short lists.
+
+    by_antecedent only needs to be a read-only mapping of sorted rule lists,
+    so the model bundle can serve it from memory-mapped arrays, along with
+    prebuilt product / antecedent name indexes.
+    """
+
+    def __init__(self, by_antecedent, antecedent_names, products,
+                 product_index=None, antecedent_index=None):
+        self.by_antecedent = by_antecedent
+        self.antecedent_names = antecedent_names
+        self.products = products
+        self.product_index = product_index if product_index is not None else NameIndex(products)
+        self.antecedent_index = (
+            antecedent_index if antecedent_index is not None else NameIndex(by_antecedent)
+        )
+
+    def __len__(self):
+        return sum(len(v) for v in self.by_antecedent.values())
+
+    def matching_keys(self, item: str):
+        """
+        Antecedent keys matching a cart item:
+          (A) exact (case-insensitive) match
+          (B) substring match (ex: "strawberries" -> "Organic Strawberries")
+        """
+        key = normalize_name(item)
+        if not key:
+            return []
+        keys = [key] if key in self.by_antecedent else []
+        keys.extend(k for k in self.antecedent_index.containing(key) if k != key)
+        return keys
+
+    def iter_candidates(self, keys, min_lift: float = 1.0, min_conf: float = 0.1, extra_lists=()):
+        """
+        Yield (consequent, expected_revenue, lift, confidence) for all rules
+        whose antecedent is in `keys`, in global rank order
+        (expected_revenue > lift > confidence), filtered by lift/confidence.
+
+        extra_lists: further pre-sorted rule lists in the same layout
+        (e.g. multi-item rules from the ItemsetTrie) merged into the ranking.
+        """
+        lists = [
+            rules for rules in map(self.by_antecedent.get, dict.fromkeys(keys))
+            if rules is not None
+        ]
+        lists.extend(extra_lists)
+        if not lists:
+            return
+        merged = lists[0] if len(lists) == 1 else heapq.merge(*lists)
+        for neg_rev, neg_lift, neg_conf, consequent in merged:
+            if -neg_lift < min_lift or -neg_conf < min_conf:
+                continue
+            yield consequent, -neg_rev, -neg_lift, -neg_conf
+
+
+def build_rule_index(rules: pd.DataFrame) -> RuleIndex:
+    """
+    Build a RuleIndex from business_ready_rules (antecedents_str,
+    consequents_str, expected_revenue, lift, confidence).
+    """
+    ordered = rules.sort_values(by=RANK_COLUMNS, ascending=False)
+
+    by_antecedent = defaultdict(list)
+    antecedent_names = {}
+    for ant, cons, rev, lift, conf in zip(
+        ordered["antecedents_str"].astype(str),
+        ordered["consequents_str"].astype(str),
+        ordered["expected_revenue"].astype(float),
+        ordered["lift"].astype(float),
+        ordered["confidence"].astype(float),
+    ):
+        key = normalize_name(ant)
+        antecedent_names.setdefault(key, ant)
+        by_antecedent[key].append((-rev, -lift, -conf, cons))
+
+    products = sorted(
+        set(ordered["antecedents_str"].astype(str)) |
+        set(ordered["consequents_str"].astype(str))
+    )
+
+    print(f"[rule_index] Indexed {ordered.shape[0]} rules over {len(by_antecedent)} antecedents.")
+    return RuleIndex(dict(by_antecedent), antecedent_names, products)
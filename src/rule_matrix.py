@@ -0,0 +1,159 @@
+import numpy as np
+from scipy import sparse
+
+
+class RuleMatrix:
+    """
+    Sparse matrix view of a RuleIndex, used to score many carts at once.
+
+    - keys:      normalized antecedent keys (rows of `key_rule`)
+    - products:  product names (consequent / cart vocabulary)
+    - rule_*:    one entry per rule, in global rank order
+                 (expected_revenue > lift > confidence), so a lower rule
+                 id always means a better rule
+    - key_rule:  keys x rules incidence matrix
+    - similar:   products x products "too similar" matrix
+                 (one name contains the other), diagonal included
+    """
+
+    def __init__(self, index):
+        keys = list(index.by_antecedent)
+        key_ids = {k: i for i, k in enumerate(keys)}
+        products = list(index.products)
+        product_ids = {p: i for i, p in enumerate(products)}
+
+        rules = sorted(
+            (entry, key)
+            for key, entries in index.by_antecedent.items()
+            for entry in entries
+        )
+        n_rules = len(rules)
+        rule_key = np.fromiter((key_ids[k] for _, k in rules), dtype=np.int64, count=n_rules)
+        key_rule = sparse.csr_matrix(
+            (np.ones(n_rules), (rule_key, np.arange(n_rules))),
+            shape=(len(keys), n_rules),
+        )
+        self._set_up(
+            keys, key_ids, products, product_ids, key_rule,
+            np.fromiter((product_ids[e[3]] for e, _ in rules), dtype=np.int64, count=n_rules),
+            np.fromiter((-e[1] for e, _ in rules), dtype=float, count=n_rules),
+            np.fromiter((-e[2] for e, _ in rules), dtype=float, count=n_rules),
+            similar_matrix(products, product_ids, index.product_index),
+        )
+
+    @classmethod
+    def from_arrays(cls, keys, key_ids, products, product_ids, key_rule,
+                    rule_consequent, rule_lift, rule_confidence, similar):
+        """
+        RuleMatrix over prebuilt arrays (e.g. memory-mapped from the model
+        bundle). key_ids / product_ids: name -> row / column id lookups.
+        """
+        matrix = cls.__new__(cls)
+        matrix._set_up(
+            keys, key_ids, products, product_ids, key_rule,
+            rule_consequent, rule_lift, rule_confidence, similar,
+        )
+        return matrix
+
+    def _set_up(self, keys, key_ids, products, product_ids, key_rule,
+                rule_consequent, rule_lift, rule_confidence, similar):
+        self.keys = keys
+        self.key_ids = key_ids
+        self.products = products
+        self.product_ids = product_ids
+        self.key_rule = key_rule
+        self.rule_consequent = rule_consequent
+        self.rule_lift = rule_lift
+        self.rule_confidence = rule_confidence
+        self.n_rules = key_rule.shape[1]
+        self.similar = similar
+        self.identity = sparse.identity(len(products), format="csr")
+
+        print(
+            f"[rule_matrix] {len(keys)} keys x {self.n_rules} rules x {len(products)} products."
+        )
+
+    def score(self, cart_keys, cart_products, limits, min_lift: float = 1.0,
+              min_conf: float = 0.1, avoid_similar: bool = True):
+        """
+        Score a batch of carts.
+
+        cart_keys / cart_products: one list of key ids / product ids per cart.
+        limits: max number of candidates to keep per cart (top-k cut).
+
+        Returns (rows, consequents, has_rule):
+          - rows, consequents: candidate (cart, product id) pairs sorted by
+            cart, then best matching rule first; each pair appears once
+            (scored by its best rule) and in-cart / too-similar products
+            are already masked out
+          - has_rule: bool per cart, True if any rule passed the thresholds
+            (before masking), as in the single-cart path
+        """
+        n_carts = len(cart_keys)
+        C_keys = _encode(cart_keys, n_carts, len(self.keys))
+        C_prod = _encode(cart_products, n_carts, len(self.products))
+
+        rule_ok = (self.rule_lift >= min_lift) & (self.rule_confidence >= min_conf)
+        matched = (C_keys @ self.key_rule @ sparse.diags(rule_ok.astype(float))).tocoo()
+        matched.eliminate_zeros()
+
+        rows = matched.row.astype(np.int64)
+        cons = self.rule_consequent[matched.col]
+        score = self.n_rules - matched.col
+        has_rule = np.bincount(rows, minlength=n_carts) > 0
+
+        # keep each (cart, consequent) once, with its best rule
+        order = np.lexsort((-score, cons, rows))
+        rows, cons, score = rows[order], cons[order], score[order]
+        first = np.ones(rows.shape[0], dtype=bool)
+        first[1:] = (rows[1:] != rows[:-1]) | (cons[1:] != cons[:-1])
+        rows, cons, score = rows[first], cons[first], score[first]
+
+        # mask in-cart and too-similar products
+        blocked = C_prod @ (self.similar if avoid_similar else self.identity)
+        if rows.shape[0]:
+            keep = np.asarray(blocked[rows, cons]).ravel() == 0
+            rows, cons, score = rows[keep], cons[keep], score[keep]
+
+        # vectorized top-k per cart
+        order = np.lexsort((-score, rows))
+        rows, cons = rows[order], cons[order]
+        rank = np.arange(rows.shape[0]) - np.searchsorted(rows, rows, side="left")
+        keep = rank < np.asarray(limits)[rows]
+        return rows[keep], cons[keep], has_rule
+
+
+def similar_matrix(products, product_ids, product_index):
+    """
+    products x products "too similar" matrix (one name contains the other,
+    case-insensitive), diagonal included.
+    """
+    rows, cols = [], []
+    for i, p in enumerate(products):
+        for q in product_index.containing(p):
+            j = product_ids[q]
+            rows.extend((i, j))
+            cols.extend((j, i))
+    n_products = len(products)
+    similar = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(n_products, n_products)
+    )
+    similar.data[:] = 1.0
+    return similar
+
+
+def _encode(id_lists, n_rows: int, n_cols: int):
+    """
+    Encode a list of id lists as a (n_rows x n_cols) 0/1 CSR matrix.
+    """
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(ids) for ids in id_lists])
+    indices = np.fromiter(
+        (i for ids in id_lists for i in ids), dtype=np.int64, count=int(indptr[-1])
+    )
+    m = sparse.csr_matrix(
+        (np.ones(indices.shape[0]), indices, indptr), shape=(n_rows, n_cols)
+    )
+    m.sum_duplicates()
+    m.data[:] = 1.0
+    return m
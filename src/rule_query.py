@@ -0,0 +1,293 @@
+import numpy as np
+import pandas as pd
+from itemset_trie import parse_itemset
+from rule_index import RANK_COLUMNS, normalize_name
+
+RANGE_COLUMNS = ["support", "confidence", "lift", "expected_revenue"]
+KEY_INDEXES = [
+    "antecedent",
+    "consequent",
+    "antecedent_department",
+    "consequent_department",
+    "antecedent_aisle",
+    "consequent_aisle",
+]
+SCAN_CHUNK = 4096
+# a range matching more than 1/SCAN_FRACTION of the rules is not used to
+# gather candidates; the rules are scanned in output order instead
+SCAN_FRACTION = 8
+
+
+class _KeyIndex:
+    """
+    Hash index: normalized key -> ascending row ids, stored as one array of
+    row ids grouped by key plus a (start, end) slot per key.
+    """
+
+    def __init__(self, rows: np.ndarray, keys):
+        pairs = pd.DataFrame({"row": rows, "key": keys}).dropna()
+        # normalize each distinct key once, not once per row
+        raw_codes, raw_keys = pd.factorize(pairs["key"])
+        normalized = [normalize_name(k) for k in raw_keys]
+        key_codes, uniques = pd.factorize(np.asarray(normalized, dtype=object))
+        codes = key_codes[raw_codes]
+        rows = pairs["row"].to_numpy(dtype=np.int64)
+
+        order = np.lexsort((rows, codes))
+        rows, codes = rows[order], codes[order]
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (rows[1:] != rows[:-1]) | (codes[1:] != codes[:-1])
+        self.rows, codes = rows[keep], codes[keep]
+
+        offsets = np.zeros(len(uniques) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(codes, minlength=len(uniques)))
+        self.slots = {key: (offsets[i], offsets[i + 1]) for i, key in enumerate(uniques)}
+        self.names = dict(zip(normalized, raw_keys))
+
+    def __len__(self):
+        return len(self.slots)
+
+    def lookup(self, values) -> np.ndarray:
+        """
+        Ascending row ids matching any of `values`.
+        """
+        parts = []
+        for value in values:
+            slot = self.slots.get(normalize_name(value))
+            if slot is not None:
+                parts.append(self.rows[slot[0]:slot[1]])
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+        return np.unique(np.concatenate(parts))
+
+
+class RuleQueryEngine:
+    """
+    Indexed, read-only query layer over a rules table (business_ready_rules
+    or association_rules_fp_all layout).
+
+    Rows are stored in rank order (expected_revenue > lift > confidence), so
+    a row id is also the rule's revenue rank. Indexes built once:
+      - sorted columnar indexes on support, confidence, lift and
+        expected_revenue: a range filter is two binary searches giving a
+        contiguous run of row ids
+      - hash indexes on antecedent and consequent items and, when product
+        meta is given, their departments and aisles (a k->1 rule is found
+        under each of its antecedent items)
+
+    query() picks the most selective index for the filters and, when the
+    results come out of an index in the requested order, stops reading as
+    soon as the requested page is full. Filters:
+      - antecedent, consequent, antecedent_department, consequent_department,
+        antecedent_aisle, consequent_aisle: a name or a list of names (any of)
+      - min_<column>, max_<column> for the range columns (inclusive)
+    """
+
+    def __init__(self, rules: pd.DataFrame, key_indexes: dict):
+        self.rules = rules
+        self.n = rules.shape[0]
+        self.columns = {
+            c: rules[c].to_numpy(dtype=np.float64) for c in RANGE_COLUMNS if c in rules.columns
+        }
+        rows = np.arange(self.n)
+        # ascending by value, ties by descending row id: read backwards, a
+        # column's index lists equal values in rank order
+        self._order = {c: np.lexsort((-rows, v)) for c, v in self.columns.items()}
+        self._sorted = {c: v[self._order[c]] for c, v in self.columns.items()}
+        self._rank = {}
+        self.key_indexes = key_indexes
+
+    def __len__(self):
+        return self.n
+
+    def keys(self, index: str) -> list:
+        """
+        Distinct values of a hash index (e.g. departments), sorted.
+        """
+        return sorted(self._key_index(index).names.values())
+
+    def _key_index(self, name: str) -> _KeyIndex:
+        if name not in self.key_indexes:
+            if name in KEY_INDEXES:
+                raise ValueError(f"No {name} index: build the engine with product meta.")
+            raise ValueError(f"Unknown index {name!r}. Use one of: {sorted(self.key_indexes)}")
+        return self.key_indexes[name]
+
+    def _parse(self, filters: dict):
+        keys, ranges = {}, {}
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name in KEY_INDEXES:
+                self._key_index(name)
+                keys[name] = [value] if isinstance(value, str) else list(value)
+            elif name[:4] in ("min_", "max_") and name[4:] in self.columns:
+                column = name[4:]
+                lo, hi = ranges.get(column, (-np.inf, np.inf))
+                ranges[column] = (float(value), hi) if name[:4] == "min_" else (lo, float(value))
+            else:
+                allowed = list(self.key_indexes) + [
+                    f"{b}_{c}" for c in self.columns for b in ("min", "max")
+                ]
+                raise ValueError(f"Unknown rule filter {name!r}. Use one of: {allowed}")
+        return keys, ranges
+
+    def _span(self, column: str, lo: float, hi: float):
+        values = self._sorted[column]
+        return (
+            int(np.searchsorted(values, lo, side="left")),
+            int(np.searchsorted(values, hi, side="right")),
+        )
+
+    def _mask(self, ids: np.ndarray, ranges: dict) -> np.ndarray:
+        mask = np.ones(len(ids), dtype=bool)
+        for column, (lo, hi) in ranges.items():
+            values = self.columns[column][ids]
+            mask &= (values >= lo) & (values <= hi)
+        return mask
+
+    def _scan(self, ids: np.ndarray, ranges: dict, need=None) -> np.ndarray:
+        """
+        Row ids of `ids` (kept in order) passing `ranges`; with `need`, stop
+        once that many are found.
+        """
+        if need is None or not ranges:
+            return ids[self._mask(ids, ranges)] if ranges else ids
+        found, total, start, chunk = [], 0, 0, SCAN_CHUNK
+        while start < len(ids) and total < need:
+            part = ids[start:start + chunk]
+            part = part[self._mask(part, ranges)]
+            found.append(part)
+            total += len(part)
+            start += chunk
+            chunk *= 2
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def _ordered(self, ids: np.ndarray, order_by: str, ascending: bool) -> np.ndarray:
+        if order_by not in self._rank:
+            rank = np.empty(self.n, dtype=np.int64)
+            rank[self._order[order_by]] = np.arange(self.n)
+            self._rank[order_by] = rank
+        ids = ids[np.argsort(self._rank[order_by][ids], kind="stable")]
+        return ids if ascending else ids[::-1]
+
+    def _select(self, keys: dict, ranges: dict, order_by: str, ascending: bool, need=None):
+        if order_by not in self.columns:
+            raise ValueError(f"order_by must be one of {list(self.columns)}, got {order_by!r}")
+
+        if keys:
+            lists = sorted(
+                (self._key_index(name).lookup(values) for name, values in keys.items()), key=len
+            )
+            ids = lists[0]
+            for other in lists[1:]:
+                ids = np.intersect1d(ids, other, assume_unique=True)
+            return self._ordered(self._scan(ids, ranges), order_by, ascending)
+
+        spans = {column: self._span(column, lo, hi) for column, (lo, hi) in ranges.items()}
+        driver = min(spans, key=lambda c: spans[c][1] - spans[c][0], default=None)
+        if driver is None or driver == order_by or (
+            (spans[driver][1] - spans[driver][0]) * SCAN_FRACTION > self.n
+        ):
+            # read the order_by index in output order
+            a, b = spans.get(order_by, (0, self.n))
+            ids = self._order[order_by][a:b]
+            if not ascending:
+                ids = ids[::-1]
+            rest = {c: r for c, r in ranges.items() if c != order_by}
+            return self._scan(ids, rest, need)
+
+        a, b = spans[driver]
+        ids = self._order[driver][a:b]
+        rest = {c: r for c, r in ranges.items() if c != driver}
+        return self._ordered(self._scan(ids, rest), order_by, ascending)
+
+    def query(
+        self,
+        order_by: str = "expected_revenue",
+        ascending: bool = False,
+        offset: int = 0,
+        limit: int = 50,
+        **filters,
+    ) -> pd.DataFrame:
+        """
+        One page of the rules matching `filters`, ordered by `order_by`
+        (ties in rank order when descending). The index of the returned
+        frame is the rule's rank.
+
+        Example: rules with a Dairy antecedent and lift >= 2, top 50 by revenue
+            engine.query(antecedent_department="dairy eggs", min_lift=2.0, limit=50)
+        """
+        keys, ranges = self._parse(filters)
+        ids = self._select(keys, ranges, order_by, ascending, need=offset + limit)
+        return self.rules.iloc[ids[offset:offset + limit]]
+
+    def count(self, **filters) -> int:
+        """
+        Number of rules matching `filters` (for page counts).
+        """
+        keys, ranges = self._parse(filters)
+        if not keys and len(ranges) <= 1:
+            column, (lo, hi) = next(iter(ranges.items()), ("expected_revenue", (-np.inf, np.inf)))
+            if column in self.columns:
+                a, b = self._span(column, lo, hi)
+                return b - a
+        return len(self._select(keys, ranges, "expected_revenue", False))
+
+
+def _rule_items(rules: pd.DataFrame, side: str):
+    """
+    (row ids, item names) for one side ("antecedent" / "consequent") of
+    the rules. Itemsets of k > 1 items are parsed from the mlxtend
+    frozenset column.
+    """
+    names = rules[f"{side}s_str"].astype(str).to_numpy(dtype=object)
+    len_column = f"{side}_len"
+    if len_column not in rules.columns or f"{side}s" not in rules.columns:
+        return np.arange(len(names)), names
+
+    multi = rules[len_column].to_numpy() > 1
+    rows = [np.flatnonzero(~multi)]
+    items = [names[~multi]]
+    for row, value in zip(np.flatnonzero(multi), rules[f"{side}s"].to_numpy()[multi]):
+        parsed = parse_itemset(value)
+        rows.append(np.full(len(parsed), row))
+        items.append(np.asarray(parsed, dtype=object))
+    return np.concatenate(rows), np.concatenate(items)
+
+
+def build_rule_query_engine(rules: pd.DataFrame, meta: pd.DataFrame = None) -> RuleQueryEngine:
+    """
+    Build a RuleQueryEngine from a rules table (antecedents_str,
+    consequents_str, support, confidence, lift, expected_revenue).
+
+    meta: product meta (index=product_name, department, aisle columns, see
+    product_meta.read_product_meta) for the department / aisle indexes.
+    """
+    ranked = rules.sort_values(by=RANK_COLUMNS, ascending=False, kind="mergesort")
+    ranked = ranked.reset_index(drop=True)
+
+    key_indexes = {}
+    for side in ("antecedent", "consequent"):
+        rows, items = _rule_items(ranked, side)
+        key_indexes[side] = _KeyIndex(rows, items)
+        if meta is not None:
+            item_codes, distinct_items = pd.factorize(items)
+            normalized = pd.Index([normalize_name(i) for i in distinct_items])
+            for level in ("department", "aisle"):
+                lookup = pd.Series(
+                    meta[level].astype(str).to_numpy(),
+                    index=meta.index.map(normalize_name),
+                )
+                lookup = lookup[~lookup.index.duplicated()]
+                levels = lookup.reindex(normalized).to_numpy(dtype=object)
+                key_indexes[f"{side}_{level}"] = _KeyIndex(rows, levels[item_codes])
+
+    engine = RuleQueryEngine(ranked, key_indexes)
+    print(
+        f"[rule_query] Indexed {engine.n} rules: {len(engine.columns)} sorted columns, "
+        f"{len(key_indexes)} hash indexes."
+    )
+    return engine
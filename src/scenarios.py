@@ -0,0 +1,185 @@
+import os
+
+import numpy as np
+import pandas as pd
+from config import DATA_PROCESSED
+from artifacts import publish_csv
+
+SCENARIO_RANKINGS_FILE = "scenario_rankings.csv"
+
+DEFAULT_MONTHLY_ORDERS = (1000, 5000, 10000, 50000)
+DEFAULT_ADOPTION_RATES = (0.05, 0.1, 0.25, 0.5, 1.0)
+DEFAULT_DISCOUNTS = tuple(np.round(np.arange(0.0, 0.51, 0.05), 2))
+DEFAULT_TARGETED_CUSTOMERS = (500, 2000, 5000, 10000)
+
+SCENARIO_COLUMNS = [
+    "antecedents_str", "consequents_str", "monthly_orders", "adoption_rate",
+    "targeted_customers", "rank", "discount", "effective_orders", "revenue_gain",
+    "discount_cost", "net_impact",
+]
+
+
+def revenue_impact(expected_revenue, monthly_orders, adoption_rate):
+    """
+    Revenue Simulation page: effective orders and monthly gain of a rule.
+    Works on scalars or broadcastable arrays.
+    """
+    effective_orders = np.multiply(monthly_orders, adoption_rate)
+    return effective_orders, effective_orders * np.asarray(expected_revenue)
+
+
+def promotion_roi(base_price, discount, customers):
+    """
+    Promotion Efficiency page: revenue with the discount minus revenue at
+    full price, for `customers` buyers of the recommended item.
+    """
+    full_price_revenue = np.multiply(customers, base_price)
+    return full_price_revenue * (1 - np.asarray(discount)) - full_price_revenue
+
+
+def discount_cost(base_price, discount, customers):
+    """
+    Revenue given away by the discount (the opposite of promotion_roi), as a
+    non-negative cost.
+    """
+    return np.multiply(customers, base_price) * np.asarray(discount)
+
+
+def scenario_grid(
+    expected_revenue,
+    base_price,
+    monthly_orders=DEFAULT_MONTHLY_ORDERS,
+    adoption_rates=DEFAULT_ADOPTION_RATES,
+    discounts=DEFAULT_DISCOUNTS,
+    targeted_customers=DEFAULT_TARGETED_CUSTOMERS,
+    discount_elasticity: float = 2.0,
+):
+    """
+    Net monthly impact of every rule under every scenario, as one broadcast
+    computation. Returns an array of shape
+    (rules, monthly_orders, adoption_rates, discounts, targeted_customers).
+
+    net = revenue gain - discount cost, where
+      - the adoption rate is lifted by the discount:
+        min(1, adoption * (1 + discount_elasticity * discount))
+      - revenue gain = monthly_orders * lifted adoption * expected_revenue
+      - discount cost = discount_cost(rule_utility, discount, targeted_customers)
+
+    With discount_elasticity=0 a discount never pays off; the elasticity is
+    the planner's assumption on how much a discount lifts rule adoption.
+    """
+    rev = np.asarray(expected_revenue, dtype="float64")[:, None, None, None, None]
+    price = np.asarray(base_price, dtype="float64")[:, None, None, None, None]
+    orders = np.asarray(monthly_orders, dtype="float64")[None, :, None, None, None]
+    adoption = np.asarray(adoption_rates, dtype="float64")[None, None, :, None, None]
+    discount = np.asarray(discounts, dtype="float64")[None, None, None, :, None]
+    targeted = np.asarray(targeted_customers, dtype="float64")[None, None, None, None, :]
+
+    lifted = np.minimum(1.0, adoption * (1.0 + discount_elasticity * discount))
+    _, gain = revenue_impact(rev, orders, lifted)
+    return gain - discount_cost(price, discount, targeted)
+
+
+def rank_scenarios(
+    rules: pd.DataFrame,
+    monthly_orders=DEFAULT_MONTHLY_ORDERS,
+    adoption_rates=DEFAULT_ADOPTION_RATES,
+    discounts=DEFAULT_DISCOUNTS,
+    targeted_customers=DEFAULT_TARGETED_CUSTOMERS,
+    discount_elasticity: float = 2.0,
+    top_n: int = 50,
+    chunk_rules: int = 2000,
+) -> pd.DataFrame:
+    """
+    Most profitable rule / discount combinations for every market context
+    (monthly_orders x adoption_rate x targeted_customers), best first, with
+    a `rank` column per context.
+
+    `rules` needs antecedents_str, consequents_str, expected_revenue and
+    rule_utility (business_ready_rules.csv or dashboard rule_options.csv).
+    Rules are processed in chunks so memory stays bounded; each chunk keeps
+    only its top_n candidates per context. Within a context, rows are ordered
+    by net_impact (highest first), ties by rule order then discount, and
+    chunks are cut in that same order, so the result does not depend on
+    chunk_rules.
+    """
+    if rules.empty:
+        return pd.DataFrame(columns=SCENARIO_COLUMNS)
+
+    orders = np.asarray(monthly_orders, dtype="float64")
+    adoption = np.asarray(adoption_rates, dtype="float64")
+    discount = np.asarray(discounts, dtype="float64")
+    targeted = np.asarray(targeted_customers, dtype="float64")
+    rev = rules["expected_revenue"].to_numpy(dtype="float64")
+    price = rules["rule_utility"].to_numpy(dtype="float64")
+    n_rules, n_disc = len(rules), len(discount)
+    n_contexts = len(orders) * len(adoption) * len(targeted)
+
+    cand_ids = np.empty((n_contexts, 0), dtype="int64")
+    cand_net = np.empty((n_contexts, 0), dtype="float64")
+    for start in range(0, n_rules, chunk_rules):
+        net = scenario_grid(
+            rev[start:start + chunk_rules],
+            price[start:start + chunk_rules],
+            orders, adoption, discount, targeted,
+            discount_elasticity=discount_elasticity,
+        )
+        # (rules, O, A, D, T) -> (O, A, T, rules * D): one row per context.
+        net = net.transpose(1, 2, 4, 0, 3).reshape(n_contexts, -1)
+        ids = np.arange(net.shape[1]) + start * n_disc
+        # same order as the final selection (net_impact desc, then candidate
+        # id = rule position, discount), so ties at the cut never depend on
+        # the chunking
+        top = np.lexsort((np.broadcast_to(ids, net.shape), -net), axis=1)[:, :top_n]
+        cand_ids = np.concatenate([cand_ids, ids[top]], axis=1)
+        cand_net = np.concatenate([cand_net, np.take_along_axis(net, top, axis=1)], axis=1)
+
+    # lexsort: last key is primary -> net_impact descending, then candidate id
+    order = np.lexsort((cand_ids, -cand_net), axis=1)[:, :top_n]
+    best_ids = np.take_along_axis(cand_ids, order, axis=1)
+    best_net = np.take_along_axis(cand_net, order, axis=1)
+
+    k = best_ids.shape[1]
+    context = np.repeat(np.arange(n_contexts), k)
+    o_i, a_i, t_i = np.unravel_index(context, (len(orders), len(adoption), len(targeted)))
+    rows, d_i = np.divmod(best_ids.reshape(-1), n_disc)
+
+    table = rules.iloc[rows][["antecedents_str", "consequents_str"]].reset_index(drop=True)
+    table["monthly_orders"] = orders[o_i]
+    table["adoption_rate"] = adoption[a_i]
+    table["targeted_customers"] = targeted[t_i]
+    table["rank"] = np.tile(np.arange(1, k + 1), n_contexts)
+    table["discount"] = discount[d_i]
+
+    lifted = np.minimum(1.0, adoption[a_i] * (1.0 + discount_elasticity * discount[d_i]))
+    table["effective_orders"], table["revenue_gain"] = revenue_impact(
+        rev[rows], orders[o_i], lifted
+    )
+    table["discount_cost"] = discount_cost(price[rows], discount[d_i], targeted[t_i])
+    table["net_impact"] = best_net.reshape(-1)
+    return table
+
+
+def build_scenario_rankings(discount_elasticity: float = 2.0, top_n: int = 200, **grid):
+    """
+    Batch version of the dashboard scenario table over business_ready_rules.csv.
+
+    Output:
+      data/processed/scenario_rankings.csv
+    """
+    rules_path = os.path.join(DATA_PROCESSED, "business_ready_rules.csv")
+    if not os.path.exists(rules_path):
+        raise FileNotFoundError(
+            f"{rules_path} not found. Run scripts/run_association_rules.py first."
+        )
+    rules = pd.read_csv(
+        rules_path,
+        usecols=["antecedents_str", "consequents_str", "expected_revenue", "rule_utility"],
+    )
+    print(f"[scenarios] Scoring {rules.shape[0]} rules over the scenario grid...")
+    table = rank_scenarios(rules, discount_elasticity=discount_elasticity, top_n=top_n, **grid)
+
+    out_path = os.path.join(DATA_PROCESSED, SCENARIO_RANKINGS_FILE)
+    publish_csv(table, out_path)
+    print(f"[scenarios] Scenario rankings saved → {out_path}")
+    return table
@@ -0,0 +1,126 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+from config import DATA_INTERIM, DATA_PROCESSED
+from artifacts import SEGMENTS_DIR, SEGMENTS_MANIFEST, publish_json, segment_dir
+from association_rules import build_price_map, mine_rules_from_transactions
+from profiling import (
+    add_profile_records, current_stage, profile_records, profile_stage, profiling_enabled,
+    reset_profile, set_profiling_enabled,
+)
+from transactions import transactions_from_frame
+
+
+def _mine_segment(segment, transactions, price_map, min_support, min_conf, min_lift,
+                  profile: bool = True):
+    """
+    Worker: mine and publish one segment's rules. Runs in its own process;
+    its profile records are sent back with the result.
+    """
+    set_profiling_enabled(profile)
+    reset_profile()  # pool processes are reused (and forked ones inherit records)
+    start = time.perf_counter()
+    out_dir = segment_dir(segment)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with profile_stage(f"segment_rules:{segment}", rows_in=len(transactions)) as prof:
+        rules, business_rules, _ = mine_rules_from_transactions(
+            transactions,
+            price_map,
+            min_support=min_support,
+            min_conf=min_conf,
+            min_lift=min_lift,
+            out_dir=out_dir,
+            tag=f"segment_rules:{segment}",
+        )
+        prof.rows_out = int(rules.shape[0])
+    result = {
+        "segment": segment,
+        "transactions": len(transactions),
+        "rules": int(rules.shape[0]),
+        "business_rules": int(business_rules.shape[0]),
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+    return result, profile_records()
+
+
+def mine_segment_rules(
+    top_n_products: int = 500,
+    min_support: float = 0.002,
+    min_conf: float = 0.1,
+    min_lift: float = 1.0,
+    max_workers: int = None,
+):
+    """
+    Mine one rule set per customer segment (cluster from customer_segments.csv).
+
+    Order lines are partitioned by the user's cluster and each partition is
+    mined with FP-Growth + utility in a separate worker process. All segments
+    share the global top_n_products vocabulary, so their rules are comparable.
+
+    Outputs:
+      data/processed/segments/segment_<k>/business_ready_rules.csv
+      data/processed/segments/segment_<k>/association_rules_fp_all.csv
+      data/processed/segments/segment_<k>/top_rules_per_item.csv
+      data/processed/segments/manifest.json (written last)
+    """
+    seg_path = os.path.join(DATA_PROCESSED, "customer_segments.csv")
+    full_path = os.path.join(DATA_INTERIM, "order_products_full_with_price.csv")
+    if not os.path.exists(seg_path):
+        raise FileNotFoundError(
+            f"{seg_path} not found. Run scripts/run_clustering.py first."
+        )
+    if not os.path.exists(full_path):
+        raise FileNotFoundError(
+            f"{full_path} not found. Run scripts/run_enrichment.py first."
+        )
+
+    print("[segment_rules] Loading segments and order lines...")
+    segments = pd.read_csv(seg_path, usecols=["user_id", "cluster"])
+    full = pd.read_csv(full_path, usecols=["order_id", "user_id", "product_name", "price"])
+
+    top_products = full["product_name"].value_counts().head(top_n_products).index
+    price_map = build_price_map(full)
+    full = full.merge(segments, on="user_id", how="inner")
+
+    jobs = {}
+    for segment, part in full.groupby("cluster"):
+        print(f"[segment_rules] Segment {segment}: {part['order_id'].nunique()} orders")
+        jobs[int(segment)] = transactions_from_frame(part, top_products=top_products)
+    del full
+
+    os.makedirs(SEGMENTS_DIR, exist_ok=True)
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(
+                _mine_segment, segment, transactions, price_map,
+                min_support, min_conf, min_lift, profiling_enabled(),
+            )
+            for segment, transactions in jobs.items()
+        ]
+        for future in as_completed(futures):
+            result, records = future.result()
+            add_profile_records(records, parent=current_stage())
+            print(f"[segment_rules] Segment {result['segment']} done: {result}")
+            results.append(result)
+    wall = time.perf_counter() - start
+
+    manifest = {
+        "created_at": time.time(),
+        "params": {
+            "top_n_products": top_n_products,
+            "min_support": min_support,
+            "min_conf": min_conf,
+            "min_lift": min_lift,
+        },
+        "segments": sorted(results, key=lambda r: r["segment"]),
+        "wall_seconds": round(wall, 2),
+    }
+    publish_json(manifest, SEGMENTS_MANIFEST)
+    print(f"[segment_rules] {len(results)} segments mined in {wall:.2f}s (wall)")
+    print(f"[segment_rules] Manifest saved → {SEGMENTS_MANIFEST}")
+    return manifest
@@ -0,0 +1,314 @@
+import os
+import threading
+import time
+
+import pandas as pd
+from config import DATA_PROCESSED
+from latency import span
+from artifacts import SEGMENTS_MANIFEST, read_segments_manifest, segment_dir
+from itemset_trie import TRIE_COLUMNS, ItemsetTrie, build_itemset_trie
+from popularity import build_popularity_rankings
+from product_meta import PRODUCT_META_FILE, read_product_meta
+from rule_index import build_rule_index
+from rule_matrix import RuleMatrix
+
+BUSINESS_RULES_FILE = "business_ready_rules.csv"
+ALL_RULES_FILE = "association_rules_fp_all.csv"
+CUSTOMER_SEGMENTS_FILE = "customer_segments.csv"
+# Serve from data/processed/model_bundle.bin when it exists (USE_MODEL_BUNDLE=0: always the CSVs)
+USE_MODEL_BUNDLE = os.environ.get("USE_MODEL_BUNDLE", "1") != "0"
+
+
+def file_version(path: str) -> str:
+    """
+    Version tag of a published artifact: mtime (ns) + size.
+    """
+    st = os.stat(path)
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+def _bundle_path():
+    from model_bundle import MODEL_BUNDLE_FILE
+
+    if USE_MODEL_BUNDLE and os.path.exists(MODEL_BUNDLE_FILE):
+        return MODEL_BUNDLE_FILE
+    return None
+
+
+def _csv_version_or_none():
+    try:
+        return published_csv_version()
+    except FileNotFoundError:
+        return None
+
+
+def published_version() -> str:
+    """
+    Version watched for hot reloads: the CSV artifacts, plus the model bundle
+    when there is one. Republishing either one changes it.
+    """
+    bundle_path = _bundle_path()
+    if bundle_path is None:
+        return published_csv_version()
+    return f"bundle:{file_version(bundle_path)}|{_csv_version_or_none() or 'csv:missing'}"
+
+
+def published_csv_version() -> str:
+    """
+    Combined version of the rules (1->1 and k->1), product meta, segment
+    rule sets and customer segments (user -> segment map) on disk.
+    """
+    rules_path = os.path.join(DATA_PROCESSED, BUSINESS_RULES_FILE)
+    if not os.path.exists(rules_path):
+        raise FileNotFoundError(
+            f"{rules_path} not found. Run scripts/run_association_rules.py first."
+        )
+
+    def _optional(name):
+        path = os.path.join(DATA_PROCESSED, name)
+        return file_version(path) if os.path.exists(path) else "missing"
+
+    segments_version = (
+        file_version(SEGMENTS_MANIFEST) if os.path.exists(SEGMENTS_MANIFEST) else "missing"
+    )
+    return (
+        f"rules:{file_version(rules_path)}"
+        f"|all_rules:{_optional(ALL_RULES_FILE)}"
+        f"|meta:{_optional(PRODUCT_META_FILE)}"
+        f"|segments:{segments_version}"
+        f"|customers:{_optional(CUSTOMER_SEGMENTS_FILE)}"
+    )
+
+
+class RuleSet:
+    """
+    Rule index + itemset trie of one rule set (global or per segment).
+    """
+
+    def __init__(self, index, trie):
+        self.index = index
+        self.trie = trie
+
+
+def _load_rule_set(folder: str, tag: str):
+    """
+    Load business_ready_rules.csv (+ optional association_rules_fp_all.csv)
+    from `folder` and build its RuleIndex and ItemsetTrie.
+    """
+    with span("snapshot.read_rules_csv"):
+        rules = pd.read_csv(os.path.join(folder, BUSINESS_RULES_FILE))
+    with span("snapshot.build_rule_index"):
+        index = build_rule_index(rules)
+
+    all_rules_path = os.path.join(folder, ALL_RULES_FILE)
+    if os.path.exists(all_rules_path):
+        with span("snapshot.build_itemset_trie"):
+            trie = build_itemset_trie(pd.read_csv(all_rules_path, usecols=TRIE_COLUMNS))
+    else:
+        print(f"[snapshot] {all_rules_path} not found, {tag} serves 1->1 rules only.")
+        trie = ItemsetTrie()
+    return rules, index, trie
+
+
+def _load_segments():
+    """
+    Per-segment rule sets (from segments/manifest.json) and the
+    user_id -> segment map (from customer_segments.csv).
+    """
+    manifest = read_segments_manifest()
+    if manifest is None:
+        return {}, {}
+
+    segments = {}
+    for entry in manifest["segments"]:
+        segment = int(entry["segment"])
+        _, index, trie = _load_rule_set(segment_dir(segment), f"segment {segment}")
+        segments[segment] = RuleSet(index, trie)
+
+    user_segments = {}
+    seg_path = os.path.join(DATA_PROCESSED, CUSTOMER_SEGMENTS_FILE)
+    if os.path.exists(seg_path):
+        seg_df = pd.read_csv(seg_path, usecols=["user_id", "cluster"])
+        user_segments = dict(
+            zip(seg_df["user_id"].astype(int), seg_df["cluster"].astype(int))
+        )
+
+    print(f"[snapshot] Loaded {len(segments)} segment rule sets, {len(user_segments)} users.")
+    return segments, user_segments
+
+
+class RecommenderSnapshot:
+    """
+    Everything the recommender needs for one version of the rules, fully
+    built before it is published. Requests take a reference to the current
+    snapshot once and use it to the end, so swapping in a new snapshot
+    never affects in-flight requests.
+
+    rules / meta are frames, or functions building them on first use (the
+    model bundle serves recommendations without them).
+    """
+
+    def __init__(self, version, rules, index, matrix, trie, meta, popularity,
+                 segments=None, user_segments=None, generation: int = 0):
+        self.version = version
+        self.generation = generation
+        self._rules = rules
+        self.index = index
+        self.matrix = matrix
+        self.trie = trie
+        self._meta = meta
+        self.popularity = popularity
+        self.segments = segments or {}
+        self.user_segments = user_segments if user_segments is not None else {}
+        self.global_rules = RuleSet(index, trie)
+        self.loaded_at = time.time()
+        self._rule_queries = None
+
+    @property
+    def rules(self) -> pd.DataFrame:
+        if callable(self._rules):
+            self._rules = self._rules()
+        return self._rules
+
+    @property
+    def meta(self) -> pd.DataFrame:
+        if callable(self._meta):
+            self._meta = self._meta()
+        return self._meta
+
+    def rule_queries(self):
+        """
+        RuleQueryEngine over the 1->1 rules, built on first use.
+        """
+        if self._rule_queries is None:
+            from rule_query import build_rule_query_engine
+
+            with span("snapshot.build_rule_query_engine"):
+                self._rule_queries = build_rule_query_engine(self.rules, self.meta)
+        return self._rule_queries
+
+    def resolve_segment(self, user_id=None, segment=None):
+        """
+        Segment whose rules should be served (explicit segment first, then
+        the user's cluster), or None for the global rules.
+        """
+        if segment is None and user_id is not None:
+            segment = self.user_segments.get(int(user_id))
+        if segment is not None and int(segment) in self.segments:
+            return int(segment)
+        return None
+
+    def rule_set(self, segment=None) -> RuleSet:
+        """
+        Rule set of a resolved segment, or the global rules for None.
+        """
+        if segment is None:
+            return self.global_rules
+        return self.segments[segment]
+
+
+def _snapshot_from_bundle(bundle, version: str, generation: int) -> RecommenderSnapshot:
+    """
+    Build a snapshot over the memory-mapped model bundle: the rule indexes,
+    tries, rule matrix, name indexes and user -> segment map answer lookups
+    from the mapped arrays, without CSV parsing or per-process index copies.
+    """
+    start = time.perf_counter()
+    with span("snapshot.total"):
+        with span("snapshot.map_indexes"):
+            index = bundle.rule_index("global")
+            trie = bundle.itemset_trie("global")
+            matrix = bundle.rule_matrix("global")
+            segments = {
+                segment: RuleSet(
+                    bundle.rule_index(f"segment_{segment}"),
+                    bundle.itemset_trie(f"segment_{segment}"),
+                )
+                for segment in bundle.meta["segments"]
+            }
+            user_segments = bundle.user_segments()
+        with span("snapshot.build_popularity"):
+            popularity = bundle.popularity()
+
+    print(
+        f"[snapshot] Mapped snapshot {version} from {bundle.path} "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    return RecommenderSnapshot(
+        version, lambda: bundle.rules_frame("global"), index, matrix, trie,
+        bundle.meta_frame, popularity,
+        segments=segments, user_segments=user_segments, generation=generation,
+    )
+
+
+def build_snapshot(generation: int = 0) -> RecommenderSnapshot:
+    """
+    Load the model bundle (model_bundle.bin) if there is one and it was built
+    from the current CSVs. Otherwise load business_ready_rules.csv,
+    association_rules_fp_all.csv (multi-item rules, optional), per-segment
+    rule sets (optional) and product_meta.csv, and build all indexes.
+    `generation` increases with every snapshot published by a process.
+    """
+    version = published_version()
+    bundle_path = _bundle_path()
+    if bundle_path is not None:
+        from model_bundle import ModelBundle
+
+        try:
+            with span("snapshot.map_bundle"):
+                bundle = ModelBundle(bundle_path)
+        except ValueError as exc:
+            bundle = None
+            print(f"[snapshot] Warning: {exc} Loading the CSVs.")
+        if bundle is not None:
+            csv_version = _csv_version_or_none()
+            if csv_version is None or csv_version == bundle.meta["source_version"]:
+                return _snapshot_from_bundle(bundle, version, generation)
+            print(
+                "[snapshot] Warning: the CSV artifacts changed after the model bundle was "
+                "built; loading the CSVs. Run scripts/run_model_bundle.py to refresh it."
+            )
+
+    start = time.perf_counter()
+
+    with span("snapshot.total"):
+        rules, index, trie = _load_rule_set(DATA_PROCESSED, "global rules")
+        with span("snapshot.build_rule_matrix"):
+            matrix = RuleMatrix(index)
+        with span("snapshot.load_segments"):
+            segments, user_segments = _load_segments()
+
+        with span("snapshot.read_product_meta"):
+            meta = read_product_meta()
+        with span("snapshot.build_popularity"):
+            popularity = build_popularity_rankings(meta)
+
+    print(f"[snapshot] Built snapshot {version} in {time.perf_counter() - start:.2f}s")
+    return RecommenderSnapshot(
+        version, rules, index, matrix, trie, meta, popularity,
+        segments=segments, user_segments=user_segments, generation=generation,
+    )
+
+
+class SnapshotWatcher(threading.Thread):
+    """
+    Background thread that polls the published artifacts every
+    `interval` seconds and calls `reload()` when their version changes.
+    Loading and indexing happen in this thread, off the request path.
+    """
+
+    def __init__(self, reload, interval: float = 5.0):
+        super().__init__(name="rules-snapshot-watcher", daemon=True)
+        self.reload = reload
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.reload()
+            except Exception as exc:  # keep serving the current snapshot
+                print(f"[snapshot] Reload failed, keeping current snapshot: {exc}")
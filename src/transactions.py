@@ -2,16 +2,28 @@ import os
 import pandas as pd
 from mlxtend.preprocessing import TransactionEncoder
 from config import DATA_INTERIM
+from profiling import profile_stage
 
+# columns needed for transactions + the price map (association_rules.build_price_map)
+TRANSACTION_COLUMNS = ["order_id", "product_name", "price"]
 
-def build_transactions(top_n_products: int = 500):
+
+def build_transactions(top_n_products: int = 500, use_sketch: bool = False,
+                       chunksize: int = 1_000_000):
     """
     Build transactions as list of product_name per order, restricted
     to the top_n_products most frequent products.
 
+    With use_sketch=True the top products come from the streaming sketches
+    (data/processed/sketches/stream_stats.npz, scripts/run_sketches.py)
+    instead of a value_counts over the full table, and the order lines are
+    streamed in chunks (order_id, product_name, price only), keeping just the
+    lines of those products: the full table is never in memory.
+
     Returns:
       transactions: list of lists
-      full_price: full merged DataFrame with price
+      full_price: full merged DataFrame with price (use_sketch=True: only the
+                  kept lines and columns)
     """
     full_path = os.path.join(DATA_INTERIM, "order_products_full_with_price.csv")
     if not os.path.exists(full_path):
@@ -19,33 +31,66 @@ def build_transactions(top_n_products: int = 500):
             f"{full_path} not found. Run run_enrichment.py first."
         )
 
-    full = pd.read_csv(full_path)
+    if not use_sketch:
+        with profile_stage("read_csv:order_products_full_with_price.csv") as prof:
+            full = pd.read_csv(full_path)
+            prof.rows_out = len(full)
+        transactions = transactions_from_frame(full, top_n_products=top_n_products)
+        return transactions, full
 
-    top_products = (
-        full["product_name"]
-        .value_counts()
-        .head(top_n_products)
-        .index
-    )
+    from sketches import load_stream_stats
+    top_products = load_stream_stats().top_products(top_n_products)
+    keep = set(top_products)
+    with profile_stage("stream_csv:order_products_full_with_price.csv") as prof:
+        parts, rows_in = [], 0
+        for chunk in pd.read_csv(full_path, usecols=TRANSACTION_COLUMNS, chunksize=chunksize):
+            rows_in += len(chunk)
+            parts.append(chunk[chunk["product_name"].isin(keep)])
+        full = pd.concat(parts, ignore_index=True)
+        prof.rows_in = rows_in
+        prof.rows_out = len(full)
+    print(f"[transactions] Kept {len(full)} of {rows_in} order lines (sketch top products).")
+    transactions = transactions_from_frame(full, top_products=top_products)
+    return transactions, full
 
-    filtered = full[full["product_name"].isin(top_products)]
 
-    transactions = (
-        filtered.groupby("order_id")["product_name"]
-        .apply(list)
-        .tolist()
-    )
+def transactions_from_frame(full: pd.DataFrame, top_n_products: int = 500, top_products=None):
+    """
+    Build transactions (list of product_name per order) from order lines,
+    restricted to the top_n_products most frequent products, or to an
+    explicit `top_products` list when given (e.g. to share one vocabulary
+    across customer segments).
+    """
+    with profile_stage("build_transactions", rows_in=len(full)) as prof:
+        if top_products is None:
+            top_products = (
+                full["product_name"]
+                .value_counts()
+                .head(top_n_products)
+                .index
+            )
+
+        filtered = full[full["product_name"].isin(top_products)]
+
+        transactions = (
+            filtered.groupby("order_id")["product_name"]
+            .apply(list)
+            .tolist()
+        )
+        prof.rows_out = len(transactions)
 
     print(f"[transactions] Built {len(transactions)} transactions, {len(top_products)} products.")
-    return transactions, full
+    return transactions
 
 
 def encode_transactions(transactions):
     """
     One-hot encode list-of-lists transactions into a basket DataFrame.
     """
-    te = TransactionEncoder()
-    te_array = te.fit(transactions).transform(transactions)
-    basket = pd.DataFrame(te_array, columns=te.columns_).astype(bool)
+    with profile_stage("encode_transactions", rows_in=len(transactions)) as prof:
+        te = TransactionEncoder()
+        te_array = te.fit(transactions).transform(transactions)
+        basket = pd.DataFrame(te_array, columns=te.columns_).astype(bool)
+        prof.rows_out = basket.shape[0]
     print(f"[transactions] Basket shape: {basket.shape}")
     return basket
\ No newline at end of file
@@ -0,0 +1,286 @@
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from config import DATA_INTERIM, DATA_PROCESSED
+from artifacts import publish_csv
+from association_rules import build_price_map, is_similar_name
+from profiling import profile_stage
+
+WINDOWED_RULES_FILE = "windowed_rules.csv"
+WINDOW_HISTORY_FILE = "windowed_rules_history.csv"
+HISTORY_TOP_RULES = 50
+
+ORDER_COLUMNS = [
+    "order_id",
+    "user_id",
+    "order_number",
+    "order_dow",
+    "order_hour_of_day",
+    "days_since_prior_order",
+    "product_name",
+    "price",
+]
+HOUR_BANDS = {"night": (0, 6), "morning": (6, 12), "afternoon": (12, 18), "evening": (18, 24)}
+
+
+def add_recency(full: pd.DataFrame) -> pd.Series:
+    """
+    Days between each order line's order and its user's last prior order.
+
+    Instacart has no calendar dates: days_since_prior_order is accumulated
+    along order_number per user, and every user's last order is day 0.
+    """
+    orders = (
+        full[["order_id", "user_id", "order_number", "days_since_prior_order"]]
+        .drop_duplicates("order_id")
+        .sort_values(["user_id", "order_number"])
+    )
+    elapsed = orders["days_since_prior_order"].fillna(0.0).groupby(orders["user_id"]).cumsum()
+    days_before_last = elapsed.groupby(orders["user_id"]).transform("max") - elapsed
+    return full["order_id"].map(pd.Series(days_before_last.to_numpy(), index=orders["order_id"]))
+
+
+class BucketCounts:
+    """
+    Counts of one time bucket over a fixed product vocabulary:
+      - orders: orders containing at least one vocabulary product
+      - items:  orders per product
+      - pairs:  orders per product pair (symmetric sparse matrix, zero diagonal)
+    """
+
+    def __init__(self, orders, items, pairs):
+        self.orders = float(orders)
+        self.items = items
+        self.pairs = pairs
+
+    @classmethod
+    def from_lines(cls, order_ids, item_codes, n_items: int):
+        _, order_rows = np.unique(np.asarray(order_ids), return_inverse=True)
+        item_codes = np.asarray(item_codes)
+        n_orders = int(order_rows.max()) + 1 if len(order_rows) else 0
+        basket = sparse.csr_matrix(
+            (np.ones(len(item_codes), dtype=np.float64), (order_rows, item_codes)),
+            shape=(n_orders, n_items),
+        )
+        basket.data[:] = 1.0  # a product counts once per order
+        co = (basket.T @ basket).tocsr()
+        items = co.diagonal()
+        co.setdiag(0)
+        co.eliminate_zeros()
+        return cls(n_orders, items, co)
+
+
+class WindowedRuleMiner:
+    """
+    1->1 rules over a sliding window of time buckets with exponentially
+    decayed counts.
+
+    Buckets are added oldest first (add_bucket). The window keeps the last
+    `window_buckets` buckets; a bucket of age k (0 = newest) weighs
+    0.5 ** (k / half_life_buckets). The decayed totals are updated in place:
+
+        totals = decay * totals + new_bucket - decay ** window_buckets * evicted_bucket
+
+    so moving the window costs one bucket, not a re-mine of the window.
+    """
+
+    def __init__(self, products, window_buckets: int = 6, half_life_buckets: float = 2.0):
+        self.products = np.asarray(products, dtype=object)
+        self.window_buckets = window_buckets
+        self.decay = 0.5 ** (1.0 / half_life_buckets) if half_life_buckets else 1.0
+        self.buckets = deque()
+        self.last_period = None
+        n_items = len(self.products)
+        self.orders = 0.0
+        self.items = np.zeros(n_items)
+        self.pairs = sparse.csr_matrix((n_items, n_items))
+
+    def add_bucket(self, period: int, counts: BucketCounts):
+        """
+        Slide the window to `period`. Skipped periods count as empty buckets.
+        """
+        if self.last_period is not None:
+            if period <= self.last_period:
+                raise ValueError(f"Buckets must be added in order: {period} after {self.last_period}")
+            for _ in range(min(period - self.last_period - 1, self.window_buckets)):
+                self._push(None)
+        self._push(counts)
+        self.last_period = period
+
+    def _push(self, counts):
+        d = self.decay
+        self.orders *= d
+        self.items = self.items * d
+        self.pairs = self.pairs * d
+        if counts is not None:
+            self.orders += counts.orders
+            self.items = self.items + counts.items
+            self.pairs = self.pairs + counts.pairs
+        self.buckets.append(counts)
+
+        if len(self.buckets) > self.window_buckets:
+            old = self.buckets.popleft()
+            if old is not None:
+                w = d ** self.window_buckets
+                self.orders = max(self.orders - w * old.orders, 0.0)
+                self.items = np.maximum(self.items - w * old.items, 0.0)
+                self.pairs = (self.pairs - w * old.pairs).tocsr()
+                # drop float residue of evicted pairs
+                self.pairs.data[self.pairs.data < 1e-9] = 0.0
+                self.pairs.eliminate_zeros()
+
+    @property
+    def window_start(self):
+        return self.last_period - len(self.buckets) + 1
+
+    def rules(
+        self,
+        price_map: pd.Series = None,
+        min_support: float = 0.002,
+        min_conf: float = 0.1,
+        min_lift: float = 1.0,
+        avoid_similar: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Rules of the current window, sorted like business_ready_rules.csv
+        (expected_revenue, lift, confidence). Supports are decayed shares of
+        the window's orders.
+        """
+        n = self.orders
+        pairs = self.pairs.tocoo()
+        if n <= 0 or pairs.nnz == 0:
+            return pd.DataFrame()
+
+        support = pairs.data / n
+        keep = support >= min_support
+        a, c, support = pairs.row[keep], pairs.col[keep], support[keep]
+        confidence = pairs.data[keep] / self.items[a]
+        consequent_support = self.items[c] / n
+        lift = confidence / consequent_support
+        keep = (confidence >= min_conf) & (lift >= min_lift)
+        a, c = a[keep], c[keep]
+
+        rules = pd.DataFrame({
+            "antecedents_str": self.products[a],
+            "consequents_str": self.products[c],
+            "antecedent support": self.items[a] / n,
+            "consequent support": consequent_support[keep],
+            "support": support[keep],
+            "confidence": confidence[keep],
+            "lift": lift[keep],
+        })
+        if price_map is not None:
+            prices = price_map.reindex(self.products).fillna(0.0).to_numpy()
+            rules["rule_utility"] = prices[a] + prices[c]
+            rules["expected_revenue"] = rules["support"] * rules["rule_utility"]
+        else:
+            rules["rule_utility"] = 0.0
+            rules["expected_revenue"] = 0.0
+        if avoid_similar and not rules.empty:
+            similar = [
+                is_similar_name(x, y)
+                for x, y in zip(rules["antecedents_str"], rules["consequents_str"])
+            ]
+            rules = rules[~np.asarray(similar, dtype=bool)]
+        rules["weighted_orders"] = n
+        return rules.sort_values(
+            ["expected_revenue", "lift", "confidence"], ascending=False, kind="mergesort"
+        ).reset_index(drop=True)
+
+
+def _slices(lines: pd.DataFrame, slice_by: str):
+    yield "all", lines
+    if slice_by == "dow":
+        for dow, part in lines.groupby("order_dow", sort=True):
+            yield f"dow={dow}", part
+    elif slice_by == "hour":
+        for band, (lo, hi) in HOUR_BANDS.items():
+            yield f"hour={band}", lines[lines["order_hour_of_day"].between(lo, hi - 1)]
+    elif slice_by is not None:
+        raise ValueError(f"slice_by must be None, 'dow' or 'hour', got {slice_by!r}")
+
+
+def mine_windowed_rules(
+    top_n_products: int = 500,
+    bucket_days: int = 30,
+    window_buckets: int = 6,
+    half_life_buckets: float = 2.0,
+    slice_by: str = None,
+    min_support: float = 0.002,
+    min_conf: float = 0.1,
+    min_lift: float = 1.0,
+    history: bool = False,
+):
+    """
+    Mine 1->1 rules on the most recent time window, with recency decay.
+
+    Order lines are bucketed by days before the user's last order
+    (bucket_days per bucket) and the window slides bucket by bucket from the
+    oldest to the newest. With slice_by="dow" or "hour" the same is done for
+    each day of week / hour band (night, morning, afternoon, evening).
+
+    Outputs:
+      data/processed/windowed_rules.csv          (latest window, one block per slice)
+      data/processed/windowed_rules_history.csv  (history=True: top rules of every
+                                                  window position, for rule stability)
+    """
+    full_path = os.path.join(DATA_INTERIM, "order_products_full_with_price.csv")
+    if not os.path.exists(full_path):
+        raise FileNotFoundError(f"{full_path} not found. Run run_enrichment.py first.")
+
+    with profile_stage("read_csv:order_products_full_with_price.csv") as prof:
+        full = pd.read_csv(full_path, usecols=ORDER_COLUMNS)
+        prof.rows_out = len(full)
+    price_map = build_price_map(full)
+
+    vocabulary = full["product_name"].value_counts().head(top_n_products).index
+    with profile_stage("windowed_rules:bucketing", rows_in=len(full)) as prof:
+        days_before_last = add_recency(full)
+        horizon = float(days_before_last.max())
+        lines = full[full["product_name"].isin(vocabulary)].copy()
+        lines["period"] = ((horizon - days_before_last[lines.index]) // bucket_days).astype("int64")
+        lines["item"] = pd.Categorical(lines["product_name"], categories=vocabulary).codes
+        prof.rows_out = len(lines)
+    del full
+    print(
+        f"[windowed_rules] {len(vocabulary)} products, {lines['period'].max() + 1} buckets "
+        f"of {bucket_days} days, window={window_buckets}, half-life={half_life_buckets}"
+    )
+
+    latest, past = [], []
+    for slice_name, part in _slices(lines, slice_by):
+        miner = WindowedRuleMiner(vocabulary, window_buckets, half_life_buckets)
+        with profile_stage(f"windowed_rules:{slice_name}", rows_in=len(part)) as prof:
+            for period, bucket in part.groupby("period", sort=True):
+                miner.add_bucket(
+                    period,
+                    BucketCounts.from_lines(bucket["order_id"], bucket["item"], len(vocabulary)),
+                )
+                if history and len(miner.buckets) == window_buckets:
+                    rules = miner.rules(price_map, min_support, min_conf, min_lift)
+                    rules = rules.head(HISTORY_TOP_RULES)
+                    rules.insert(0, "window_end", period)
+                    rules.insert(0, "slice", slice_name)
+                    past.append(rules)
+
+            rules = miner.rules(price_map, min_support, min_conf, min_lift)
+            prof.rows_out = len(rules)
+        rules.insert(0, "window_end", miner.last_period)
+        rules.insert(0, "window_start", miner.window_start)
+        rules.insert(0, "slice", slice_name)
+        latest.append(rules)
+        print(f"[windowed_rules] {slice_name}: {rules.shape[0]} rules in the latest window")
+
+    out_path = os.path.join(DATA_PROCESSED, WINDOWED_RULES_FILE)
+    windowed = pd.concat(latest, ignore_index=True)
+    publish_csv(windowed, out_path)
+    print(f"[windowed_rules] Windowed rules saved → {out_path}")
+
+    if history:
+        history_path = os.path.join(DATA_PROCESSED, WINDOW_HISTORY_FILE)
+        publish_csv(pd.concat(past, ignore_index=True) if past else pd.DataFrame(), history_path)
+        print(f"[windowed_rules] Window history saved → {history_path}")
+    return windowed
@@ -1,11 +1,21 @@
 
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
 import sys
 import os
+import json
 
+# Heavy modules (pandas, plotly, the recommender) are imported inside the
+# pages that use them. The Home page only reads kpis.json with json, so it
+# renders without loading them.
+
+# -----------------------------------------------------------
+# PAGE CONFIG
+# -----------------------------------------------------------
+st.set_page_config(
+    page_title="Instacart - Retail Analytics & Recommendations",
+    page_icon="🛒",
+    layout="wide"
+)
 
 instacart_css = """
 <style>
@@ -79,44 +89,83 @@ st.markdown(instacart_css, unsafe_allow_html=True)
 
 # Make src importable
 sys.path.append("src")
-from recommender import recommend_items
+from config import DATA_PROCESSED
 
-# -----------------------------------------------------------
-# PAGE CONFIG
-# -----------------------------------------------------------
-st.set_page_config(
-    page_title="Instacart - Retail Analytics & Recommendations",
-    page_icon="🛒",
-    layout="wide"
-)
+KPIS_PATH = os.path.join(DATA_PROCESSED, "dashboard", "kpis.json")
 
 # -----------------------------------------------------------
 # LOAD DATA
 # -----------------------------------------------------------
-@st.cache_data
-def load_processed():
-    seg = pd.read_csv("data/processed/customer_segments.csv")
-    rules = pd.read_csv("data/processed/business_ready_rules.csv")
-    top_rules = pd.read_csv("data/processed/top_rules_per_item.csv")
-    return seg, rules, top_rules
+# Each page declares the precomputed views it needs
+# (scripts/run_dashboard_aggregates.py); they are read on the first visit of a
+# page and then shared by all sessions of the server process (read-only).
+PAGE_ARTIFACTS = {
+    "🏠 Home": [],
+    "👥 Customer Segmentation": ["cluster_counts", "buyer_types", "segment_sample"],
+    "🔗 Product Associations": ["top_bundles", "rule_scatter", "rule_queries"],
+    "💰 Revenue Simulation": ["rules_by_antecedent", "antecedents"],
+    "📉 Promotion Efficiency": ["rules_by_antecedent", "antecedents"],
+    "🛒 Recommendation Engine": [],
+}
+
+
+def load_kpis():
+    """
+    Headline KPIs (kpis.json) without pandas, or None if not built yet.
+    """
+    if not os.path.exists(KPIS_PATH):
+        return None
+    with open(KPIS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@st.cache_resource
+def load_aggregates():
+    from dashboard_aggregates import load_dashboard_aggregates
+    return load_dashboard_aggregates()
+
+
+@st.cache_resource(show_spinner="Loading page data...")
+def load_page_artifacts(page_name):
+    agg = load_aggregates()
+    agg.preload(PAGE_ARTIFACTS[page_name])
+    return agg
+
+
+@st.cache_resource(show_spinner="Loading recommendation rules...")
+def load_recommender():
+    import recommender
+    recommender.current_snapshot()
+    return recommender
+
 
-seg_df, rules_df, top_rules_df = load_processed()
+@st.cache_data
+def best_scenarios(monthly_orders, adoption_rate, targeted_customers, elasticity):
+    from scenarios import DEFAULT_DISCOUNTS, rank_scenarios
+
+    agg = load_aggregates()
+    return rank_scenarios(
+        agg.rule_options,
+        monthly_orders=[monthly_orders],
+        adoption_rates=[adoption_rate],
+        discounts=DEFAULT_DISCOUNTS,
+        targeted_customers=[targeted_customers],
+        discount_elasticity=elasticity,
+        top_n=20,
+    )
 
 # -----------------------------------------------------------
 # SIDEBAR NAVIGATION
 # -----------------------------------------------------------
 st.sidebar.title("📊 Navigation")
-page = st.sidebar.radio(
-    "Go to:",
-    [
-        "🏠 Home",
-        "👥 Customer Segmentation",
-        "🔗 Product Associations",
-        "💰 Revenue Simulation",
-        "📉 Promotion Efficiency",
-        "🛒 Recommendation Engine",
-    ]
-)
+page = st.sidebar.radio("Go to:", list(PAGE_ARTIFACTS))
+agg = None
+if PAGE_ARTIFACTS[page]:
+    try:
+        agg = load_page_artifacts(page)
+    except FileNotFoundError as exc:
+        st.error(f"{exc}")
+        st.stop()
 
 # -----------------------------------------------------------
 # HOME PAGE
@@ -125,10 +174,22 @@ if page == "🏠 Home":
     st.title("🛒 Instacart - Retail Analytics & Recommendation Dashboard")
     st.markdown("#### Built by DSTI Group 14 — MSc AI & Data Science")
 
-    c1, c2, c3 = st.columns(3)
-    c1.metric("Customers", f"{seg_df['user_id'].nunique():,}")
-    c2.metric("Customer Segments", seg_df['cluster'].nunique())
-    c3.metric("Association Rules", f"{rules_df.shape[0]:,}")
+    kpis = load_kpis()
+    if kpis is None:
+        st.info(
+            "Dashboard aggregates are not built yet. Run "
+            "`python scripts/run_dashboard_aggregates.py` (build_dashboard_aggregates)."
+        )
+    else:
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Customers", f"{kpis['customers']:,}")
+        c2.metric("Customer Segments", kpis["segments"])
+        c3.metric("Association Rules", f"{kpis['rules']:,}")
+        if "stream" in kpis:
+            c4, c5, c6 = st.columns(3)
+            c4.metric("Orders (≈)", f"{kpis['stream']['orders']:,}")
+            c5.metric("Distinct Products (≈)", f"{kpis['stream']['products']:,}")
+            c6.metric("Order Lines", f"{kpis['stream']['order_lines']:,}")
 
     st.write("### Dataset Overview")
     st.write("""
@@ -140,49 +201,64 @@ if page == "🏠 Home":
 # CUSTOMER SEGMENTATION
 # -----------------------------------------------------------
 elif page == "👥 Customer Segmentation":
+    import plotly.express as px
+
     st.title("👥 Customer Segmentation Analysis")
 
     st.subheader("Cluster Distribution")
-    fig = px.histogram(seg_df, x="cluster", color="cluster")
+    fig = px.bar(agg.cluster_counts, x="cluster", y="customers", color="cluster")
     st.plotly_chart(fig, use_container_width=True)
 
     st.subheader("Customer KPIs")
     c1, c2, c3 = st.columns(3)
-    c1.metric("Avg Basket Size", round(seg_df["avg_basket_size"].mean(), 2))
-    c2.metric("Avg Orders / Customer", round(seg_df["total_orders"].mean(), 2))
-    c3.metric("Basket Variability (Std)", round(seg_df["order_gap_std"].mean(), 2))
+    c1.metric("Avg Basket Size", round(agg.kpis["avg_basket_size"], 2))
+    c2.metric("Avg Orders / Customer", round(agg.kpis["avg_orders"], 2))
+    c3.metric("Basket Variability (Std)", round(agg.kpis["avg_order_gap_std"], 2))
 
     # Buyer type classification
     st.subheader("Buyer Type: Frequent vs Irregular")
-    seg_df["buyer_type"] = seg_df["total_orders"].apply(
-        lambda x: "Frequent Buyer" if x >= 50 else "Irregular Buyer"
+    fig = px.pie(
+        agg.buyer_types,
+        names="buyer_type",
+        values="customers",
+        title="Buyer Type Distribution",
     )
-    fig = px.pie(seg_df, names="buyer_type", title="Buyer Type Distribution")
     st.plotly_chart(fig, use_container_width=True)
 
     st.subheader("Feature Comparison")
-    x_feature = st.selectbox("X-axis feature", seg_df.columns)
-    y_feature = st.selectbox("Y-axis feature", seg_df.columns)
-    fig = px.scatter(seg_df, x=x_feature, y=y_feature, color="cluster")
+    x_feature = st.selectbox("X-axis feature", agg.kpis["feature_columns"])
+    y_feature = st.selectbox("Y-axis feature", agg.kpis["feature_columns"])
+    view = st.radio(
+        "View",
+        ["Density (all customers)", "Sampled customers"],
+        horizontal=True,
+    )
+    if view == "Density (all customers)":
+        # Pre-binned 2D histogram per cluster: one bubble per non-empty cell.
+        fig = px.scatter(
+            agg.density(x_feature, y_feature),
+            x="x",
+            y="y",
+            size="customers",
+            color="cluster",
+            labels={"x": x_feature, "y": y_feature},
+        )
+    else:
+        fig = px.scatter(agg.segment_sample, x=x_feature, y=y_feature, color="cluster")
     st.plotly_chart(fig, use_container_width=True)
 
 # -----------------------------------------------------------
 # PRODUCT ASSOCIATIONS
 # -----------------------------------------------------------
 elif page == "🔗 Product Associations":
+    import plotly.express as px
+
     st.title("🔗 Product Associations (Frequent Bundles & Co‑Purchases)")
 
     st.subheader("Top 20 Bundles by Expected Revenue")
-    top_bundles = rules_df.sort_values("expected_revenue", ascending=False).head(20)
+    top_bundles = agg.top_bundles
 
-    st.dataframe(top_bundles[[
-        "antecedents_str",
-        "consequents_str",
-        "support",
-        "confidence",
-        "lift",
-        "expected_revenue",
-    ]])
+    st.dataframe(top_bundles)
 
     fig = px.bar(
         top_bundles,
@@ -196,7 +272,7 @@ elif page == "🔗 Product Associations":
 
     st.subheader("Rule Strength Visualization")
     fig = px.scatter(
-        rules_df.head(500),
+        agg.rule_scatter,
         x="support",
         y="confidence",
         size="expected_revenue",
@@ -205,8 +281,42 @@ elif page == "🔗 Product Associations":
     )
     st.plotly_chart(fig, use_container_width=True)
 
+    st.subheader("Rule Explorer")
+    # Indexed queries over business_ready_rules.csv (src/rule_query.py),
+    # built once per server process with the page's other artifacts.
+    rule_queries = agg.rule_queries
+
+    c1, c2, c3, c4 = st.columns(4)
+    departments = c1.multiselect(
+        "Antecedent department", rule_queries.keys("antecedent_department")
+    )
+    min_lift = c2.slider("Minimum lift", 1.0, 5.0, 1.0, 0.1)
+    min_conf = c3.slider("Minimum confidence", 0.0, 1.0, 0.1, 0.05)
+    order_by = c4.selectbox("Order by", ["expected_revenue", "lift", "confidence", "support"])
+
+    filters = dict(
+        antecedent_department=departments or None,
+        min_lift=min_lift,
+        min_confidence=min_conf,
+    )
+    page_size = 50
+    total = rule_queries.count(**filters)
+    pages = max(1, -(-total // page_size))
+    page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+    st.caption(f"{total:,} matching rules")
+    st.dataframe(
+        rule_queries.query(
+            order_by=order_by,
+            offset=(page_number - 1) * page_size,
+            limit=page_size,
+            **filters,
+        )[["antecedents_str", "consequents_str", "support", "confidence", "lift", "expected_revenue"]]
+    )
+
 
 elif page == "💰 Revenue Simulation":
+    from scenarios import revenue_impact
+
     st.title("💰 Revenue Simulation Tool")
 
     st.write("""
@@ -221,7 +331,7 @@ elif page == "💰 Revenue Simulation":
 
     with colA:
         st.subheader("Antecedent Product")
-        antecedent_options = sorted(rules_df["antecedents_str"].unique())
+        antecedent_options = agg.antecedents
         selected_antecedent = st.selectbox(
             "Select a product:",
             antecedent_options,
@@ -229,7 +339,7 @@ elif page == "💰 Revenue Simulation":
         )
 
     # Filter rules for selected antecedent
-    filtered_rules = rules_df[rules_df["antecedents_str"] == selected_antecedent]
+    filtered_rules = agg.rules_by_antecedent[selected_antecedent]
 
     with colB:
         st.subheader("Consequent (Recommended) Product")
@@ -274,19 +384,42 @@ elif page == "💰 Revenue Simulation":
     # ----------------------------------------------------------
     # 4) Result (side-by-side KPIs)
     # ----------------------------------------------------------
-    effective_orders = monthly_orders * adoption_rate
-    estimated_monthly_gain = effective_orders * expected_rev
+    effective_orders, estimated_monthly_gain = revenue_impact(
+        expected_rev, monthly_orders, adoption_rate
+    )
 
     k1, k2 = st.columns(2)
     k1.metric("Effective Orders", f"{int(effective_orders):,}")
     k2.metric("Estimated Monthly Revenue Impact", f"${estimated_monthly_gain:,.2f}")
 
+    # ----------------------------------------------------------
+    # 5) Best rule / discount combinations over all rules
+    # ----------------------------------------------------------
+    st.subheader("Best Rule / Discount Combinations")
+    c1, c2 = st.columns(2)
+    with c1:
+        scenario_targeted = st.slider(
+            "Targeted Customers / Month", 100, 10000, 2000, key="rev_scenario_targeted"
+        )
+    with c2:
+        elasticity = st.slider(
+            "Discount Elasticity",
+            min_value=0.0, max_value=5.0, value=2.0, step=0.5,
+            help="Adoption lift per unit of discount (2.0: a 10% discount lifts adoption by 20%).",
+            key="rev_scenario_elasticity",
+        )
+    st.dataframe(
+        best_scenarios(monthly_orders, adoption_rate, scenario_targeted, elasticity)
+    )
+
 
 # -----------------------------------------------------------
 # PROMOTION EFFICIENCY
 # -----------------------------------------------------------
 
 elif page == "📉 Promotion Efficiency":
+    from scenarios import promotion_roi
+
     st.title("📉 Promotion Efficiency (ROI Calculator)")
 
     st.write("""
@@ -301,7 +434,7 @@ elif page == "📉 Promotion Efficiency":
 
     with colA:
         st.subheader("Antecedent Product")
-        antecedent_options = sorted(rules_df["antecedents_str"].unique())
+        antecedent_options = agg.antecedents
         selected_antecedent = st.selectbox(
             "Select a product:",
             antecedent_options,
@@ -309,7 +442,7 @@ elif page == "📉 Promotion Efficiency":
         )
 
     # Filter rules for chosen antecedent
-    filtered_rules = rules_df[rules_df["antecedents_str"] == selected_antecedent]
+    filtered_rules = agg.rules_by_antecedent[selected_antecedent]
 
     with colB:
         st.subheader("Consequent (Recommended) Product")
@@ -374,11 +507,8 @@ elif page == "📉 Promotion Efficiency":
     # ----------------------------------------------------------
     # 5. ROI Calculations
     # ----------------------------------------------------------
-    targeted_revenue = targeted_customers * base_price * (1 - discount)
-    untargeted_revenue = untargeted_customers * base_price * (1 - discount)
-
-    roi_targeted = targeted_revenue - (targeted_customers * base_price)
-    roi_untargeted = untargeted_revenue - (untargeted_customers * base_price)
+    roi_targeted = promotion_roi(base_price, discount, targeted_customers)
+    roi_untargeted = promotion_roi(base_price, discount, untargeted_customers)
 
     # ----------------------------------------------------------
     # 6. ROI Output (side-by-side)
@@ -405,6 +535,10 @@ elif page == "📉 Promotion Efficiency":
 elif page == "🛒 Recommendation Engine":
     st.title("🛒 Product Recommendation Engine")
 
+    # Rules, indexes and product metadata load on the first visit of this
+    # page (once per server process), not on the first click.
+    recommender = load_recommender()
+
     user_input = st.text_input(
         "Enter cart items (comma-separated):",
         placeholder="banana, organic strawberries"
@@ -418,7 +552,7 @@ elif page == "🛒 Recommendation Engine":
         if not cart:
             st.warning("Please enter at least one item.")
         else:
-            recs = recommend_items(
+            recs = recommender.recommend_items(
                 cart_items=cart,
                 top_k=top_k,
                 min_lift=1.0,